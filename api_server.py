@@ -0,0 +1,464 @@
+"""Headless JSON-over-HTTP API for VehicleRentalService.
+
+    python api_server.py [--host 127.0.0.1] [--port 8080] [--workers 4]
+
+Endpoints (bodies and responses are JSON):
+
+    GET  /health
+    GET  /vehicles[?<page>]
+    GET  /availability?start=&end=[&vtype=&brand=&year=&model=&min_rate=&max_rate=&driver=&limit=]
+    POST /quotes                            {vehicle_ids, start, end, driver} -> [{VehicleID, total_cost, driver_fee}]
+    GET  /reservations[?<page>]             active reservations
+    POST /reservations                      {vehicle_id, start, end, name, phone, email, drivers_license, driver, location}
+    GET  /reservations/<id>
+    POST /reservations/<id>/extend          {end}
+    POST /reservations/<id>/return          {distance_km}
+    GET  /maintenance[?<page>]              active maintenance
+    POST /maintenance                       {vehicle_id, checklist, cost, notes}
+    POST /maintenance/<id>/finish
+    GET  /customers?q=[&limit=]             name prefix, or phone prefix when q is digits
+    POST /customers/resolve                 {customers: [{name, phone, email, drivers_license}, ...]} -> {ids}
+    GET  /search?q=[&kinds=customer,vehicle,damage,maintenance&limit=]
+    GET  /reports/usage[?start=&end=&vtype=]
+    GET  /reports/locations
+
+The three listings return one page at a time: {"rows": [...], "next_cursor"}.
+<page> is sort=<column>&desc=1&limit=<n, default 200>&q=<search text>&cursor=<next_cursor
+of the previous page>. Keep sort, desc and q the same while following cursors.
+In /quotes, start, end and driver are each one value for every vehicle or a list with one per vehicle;
+each driver value is read like any other flag, so "false" means no driver.
+start and end are ISO 8601 times; an end at or before the start, or a time that
+does not parse, gets a 400.
+
+Connections are HTTP/1.1 keep-alive and may pipeline requests. Each
+request is handed to the worker pool as soon as it has been read, and
+the responses are written back in request order. A write waits for the
+requests before it on the same connection, and a read waits for the
+writes before it. A client therefore always sees its own changes.
+"""
+import argparse
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import db
+import metrics
+from db_pool import DEFAULT_POOL_SIZE
+from rental_system import Customer, DictRow, MaintenanceRecord, VehicleRentalService
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+MAX_PIPELINE = 64  # requests read ahead per connection before reading pauses
+IDLE_TIMEOUT = 60.0
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 411: "Length Required", 413: "Payload Too Large",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error", 501: "Not Implemented"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "body", "keep_alive")
+
+    def __init__(self, method, path, query, body, keep_alive):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+        self.keep_alive = keep_alive
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise HttpError(400, "Request body is not valid JSON.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Request body must be a JSON object.")
+        return data
+
+
+# --- Routes ---
+
+ROUTES = []  # (method, compiled path pattern, handler)
+
+
+def route(method, pattern):
+    """Registers handler(service, request, *path_groups) -> (status, payload)."""
+    def register(handler):
+        ROUTES.append((method, re.compile(f"^{pattern}$"), handler))
+        return handler
+    return register
+
+
+def required(data, name):
+    value = data.get(name)
+    if value in (None, ""):
+        raise HttpError(400, f"Missing '{name}'.")
+    return value
+
+
+def number(data, name, convert=float, default=None):
+    value = data.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"'{name}' must be a number.")
+
+
+def required_number(data, name, convert=float):
+    required(data, name)
+    return number(data, name, convert)
+
+
+def flag(data, name):
+    return truthy(data.get(name, False))
+
+
+def truthy(value):
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+@route("GET", "/health")
+def health(service, request):
+    return 200, {"status": "ok"}
+
+
+def page(list_page, request, default_sort):
+    q = request.query
+    return list_page(q.get("sort", default_sort), flag(q, "desc"), q.get("cursor"),
+                     number(q, "limit", int, db.DEFAULT_PAGE_SIZE), q.get("q"))
+
+
+@route("GET", "/vehicles")
+def list_vehicles(service, request):
+    return 200, page(service.get_vehicles_page, request, "VehicleID")
+
+
+@route("GET", "/availability")
+def search_availability(service, request):
+    q = request.query
+    return 200, service.search_available_vehicles(
+        required(q, "start"), required(q, "end"), q.get("vtype"), q.get("brand"),
+        number(q, "year", int), q.get("model"), number(q, "min_rate"), number(q, "max_rate"),
+        flag(q, "driver"), number(q, "limit", int))
+
+
+@route("POST", "/quotes")
+def quote(service, request):
+    data = request.json()
+    vehicle_ids = required(data, "vehicle_ids")
+    if not isinstance(vehicle_ids, list) or not all(isinstance(vid, int) for vid in vehicle_ids):
+        raise HttpError(400, "'vehicle_ids' must be a list of integers.")
+    driver = data.get("driver", False)
+    driver = [truthy(value) for value in driver] if isinstance(driver, list) else truthy(driver)
+    return 200, service.quote_vehicles(vehicle_ids, required(data, "start"), required(data, "end"), driver)
+
+
+@route("GET", "/reservations")
+def list_reservations(service, request):
+    return 200, page(service.get_active_reservations_page, request, "start_datetime")
+
+
+@route("POST", "/reservations")
+def create_reservation(service, request):
+    data = request.json()
+    customer = Customer(required(data, "name"), data.get("phone", ""), required(data, "email"),
+                        data.get("drivers_license"))
+    res_id, total_cost = service.make_reservation(
+        required_number(data, "vehicle_id", int), customer,
+        required(data, "start"), required(data, "end"), flag(data, "driver"), data.get("location", ""))
+    return 201, {"ReservationID": res_id, "total_cost": total_cost}
+
+
+@route("GET", r"/reservations/(\d+)")
+def get_reservation(service, request, rid):
+    details = service.get_reservation_details(int(rid))
+    if details is None:
+        raise HttpError(404, "Reservation not found.")
+    return 200, details
+
+
+@route("POST", r"/reservations/(\d+)/extend")
+def extend_reservation(service, request, rid):
+    new_total = service.update_reservation_return(int(rid), required(request.json(), "end"))
+    return 200, {"ReservationID": int(rid), "total_cost": new_total}
+
+
+@route("POST", r"/reservations/(\d+)/return")
+def return_reservation(service, request, rid):
+    distance_km = number(request.json(), "distance_km", default=0.0)
+    base, damages, final = service.finalize_return(int(rid), distance_km)
+    return 200, {"ReservationID": int(rid), "base_cost": base, "damage_cost": damages, "final_cost": final}
+
+
+@route("GET", "/maintenance")
+def list_maintenance(service, request):
+    return 200, page(service.get_active_maintenance_page, request, "MaintenanceID")
+
+
+@route("POST", "/maintenance")
+def create_maintenance(service, request):
+    data = request.json()
+    record = MaintenanceRecord(required_number(data, "vehicle_id", int),
+                               data.get("checklist", ""), number(data, "cost", default=0.0), data.get("notes", ""))
+    ok, msg = service.start_maintenance(record)
+    if not ok:
+        raise db.ConflictError(msg)  # already in maintenance, or booked
+    return 201, {"vehicle_id": record.vehicleID}
+
+
+@route("POST", r"/maintenance/(\d+)/finish")
+def finish_maintenance(service, request, mid):
+    service.finish_maintenance(int(mid))
+    return 200, {"MaintenanceID": int(mid)}
+
+
+@route("GET", "/customers")
+def find_customers(service, request):
+    q = request.query
+    return 200, service.find_customers(required(q, "q"), number(q, "limit", int, 10))
+
+
+@route("POST", "/customers/resolve")
+def resolve_customers(service, request):
+    entries = required(request.json(), "customers")
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise HttpError(400, "'customers' must be a list of objects.")
+    customers = [Customer(required(entry, "name"), entry.get("phone", ""), required(entry, "email"),
+                          entry.get("drivers_license")) for entry in entries]
+    return 200, {"ids": service.resolve_customers(customers)}
+
+
+@route("GET", "/search")
+def search(service, request):
+    q = request.query
+    kinds = [kind for kind in q.get("kinds", "").split(",") if kind]
+    return 200, service.search(required(q, "q"), kinds or None, number(q, "limit", int, 20))
+
+
+@route("GET", "/reports/usage")
+def usage_report(service, request):
+    q = request.query
+    return 200, service.get_usage_report(q.get("start"), q.get("end"), q.get("vtype"))
+
+
+@route("GET", "/reports/locations")
+def location_report(service, request):
+    return 200, service.get_location_report()
+
+
+def dispatch(service, request):
+    """Runs on a worker thread; returns (status, payload) and never raises."""
+    allowed = []
+    try:
+        for method, pattern, handler in ROUTES:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            return handler(service, request, *match.groups())
+        if allowed:
+            raise HttpError(405, f"Use {' or '.join(allowed)} for {request.path}.")
+        raise HttpError(404, f"No endpoint at {request.path}.")
+    except HttpError as e:
+        return e.status, {"error": str(e)}
+    except db.ConflictError as e:
+        return 409, {"error": str(e)}
+    except ValueError as e:
+        message = str(e)
+        if "not found" in message.lower():
+            return 404, {"error": message}
+        return 400, {"error": message}
+    except Exception as e:
+        return 500, {"error": f"{type(e).__name__}: {e}"}
+
+
+# --- HTTP/1.1 ---
+
+async def read_request(reader):
+    """Reads one request; returns None when the client closed the connection between requests."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HttpError(400, "Incomplete request.")
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "Request headers are too large.")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise HttpError(400, "Malformed request line.")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HttpError(501, "Chunked request bodies are not supported; send Content-Length.")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length.")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Request body is too large.")
+    if method == "POST" and "content-length" not in headers:
+        raise HttpError(411, "POST requests need a Content-Length.")
+    try:
+        body = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError:
+        raise HttpError(400, "Incomplete request body.")
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    url = urlsplit(target)
+    return Request(method.upper(), unquote(url.path).rstrip("/") or "/", dict(parse_qsl(url.query)), body, keep_alive)
+
+
+def to_json(value):
+    """json.dumps fallback: service rows become their dict form, anything else (e.g. dates) a string."""
+    if isinstance(value, DictRow):
+        return value.as_dict()
+    return str(value)
+
+
+def encode_response(status, payload, keep_alive):
+    body = json.dumps(payload, default=to_json).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+class ApiServer:
+    def __init__(self, service=None, workers=DEFAULT_POOL_SIZE):
+        self.service = service if service is not None else VehicleRentalService()
+        # Worker threads borrow pooled connections, so more workers than the pool only adds waiting.
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.pool, self.service.prepare_storage)
+        self._server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.pool.shutdown(wait=True)
+
+    async def handle_connection(self, reader, writer):
+        responses = asyncio.Queue(MAX_PIPELINE)
+        sender = asyncio.create_task(self._send_responses(writer, responses))
+        in_flight = []  # tasks for this connection that have not finished yet
+        last_write = None
+        try:
+            while not sender.done():
+                try:
+                    request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except HttpError as e:  # the stream can't be trusted after this, so answer and close
+                    await responses.put((self._finished(e.status, {"error": str(e)}), False))
+                    break
+                except (asyncio.TimeoutError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                in_flight = [task for task in in_flight if not task.done()]
+                if request.method == "GET":
+                    waits_for = [last_write] if last_write is not None and not last_write.done() else []
+                else:
+                    waits_for = list(in_flight)
+                task = asyncio.create_task(self._execute(request, waits_for))
+                in_flight.append(task)
+                if request.method != "GET":
+                    last_write = task
+                await responses.put((task, request.keep_alive))
+                if not request.keep_alive:
+                    break
+        finally:
+            await responses.put(None)
+            await sender
+
+    async def _execute(self, request, waits_for):
+        if waits_for:
+            await asyncio.wait(waits_for)
+        return await asyncio.get_running_loop().run_in_executor(self.pool, dispatch, self.service, request)
+
+    @staticmethod
+    def _finished(status, payload):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result((status, payload))
+        return future
+
+    async def _send_responses(self, writer, responses):
+        try:
+            while True:
+                item = await responses.get()
+                if item is None:
+                    break
+                pending, keep_alive = item
+                status, payload = await pending
+                writer.write(encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            # Drain anything still queued so the reader is never stuck on a full queue.
+            while not responses.empty():
+                responses.get_nowait()
+            writer.close()
+
+
+async def serve(host, port, workers):
+    metrics.start_exporters_from_env()
+    server = ApiServer(workers=workers)
+    host, port = await server.start(host, port)
+    print(f"Vehicle rental API listening on http://{host}:{port} with {workers} workers", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=DEFAULT_POOL_SIZE,
+                        help="worker threads for service calls (default: the connection pool size)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
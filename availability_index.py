@@ -0,0 +1,263 @@
+"""In-memory index of which vehicles are booked or blocked, and when.
+
+Each vehicle keeps its active reservations sorted by start time, alongside a
+running maximum of their end times. An overlap query is then a bisect plus a
+short backwards walk instead of two SQL round trips. Datetimes are kept as
+the ISO strings stored in the database and compared the same way SQLite
+compares them, so the index and the SQL check always agree.
+
+A vehicle is "blocked" while its Vehicle.available flag is 0, which is what
+an active maintenance job sets.
+"""
+import sqlite3
+import threading
+from bisect import bisect_left
+
+
+class VehicleSchedule:
+    __slots__ = ("starts", "ends", "max_ends", "reservation_ids", "blocked")
+
+    def __init__(self, blocked=False):
+        self.starts = []
+        self.ends = []
+        self.max_ends = []  # max_ends[i] == max(ends[:i + 1])
+        self.reservation_ids = []
+        self.blocked = blocked
+
+    def _refresh_max_ends(self, from_pos):
+        running = self.max_ends[from_pos - 1] if from_pos > 0 else None
+        for i in range(from_pos, len(self.ends)):
+            end = self.ends[i]
+            running = end if running is None or end > running else running
+            self.max_ends[i] = running
+
+    def insert(self, rid, start, end):
+        pos = bisect_left(self.starts, start)
+        self.starts.insert(pos, start)
+        self.ends.insert(pos, end)
+        self.reservation_ids.insert(pos, rid)
+        self.max_ends.insert(pos, end)
+        self._refresh_max_ends(pos)
+
+    def remove(self, rid):
+        try:
+            pos = self.reservation_ids.index(rid)
+        except ValueError:
+            return None
+        start, end = self.starts[pos], self.ends[pos]
+        del self.starts[pos], self.ends[pos], self.reservation_ids[pos], self.max_ends[pos]
+        self._refresh_max_ends(pos)
+        return start, end
+
+    def overlaps(self, start, end, exclude_res_id=None):
+        """True if an active reservation satisfies res.end > start AND res.start < end."""
+        i = bisect_left(self.starts, end) - 1
+        while i >= 0 and self.max_ends[i] > start:
+            if self.ends[i] > start and self.reservation_ids[i] != exclude_res_id:
+                return True
+            i -= 1
+        return False
+
+    def intervals(self):
+        return sorted(zip(self.reservation_ids, self.starts, self.ends))
+
+
+class AvailabilityIndex:
+    """Availability cache for one database file.
+
+    Writers hand their deltas to apply_committed() after their transaction
+    commits. Commits made by other connections, including other counters'
+    processes, are noticed on a dedicated probe connection: PRAGMA
+    data_version says something was committed, and ScheduleVersion (see the
+    schedule_version migration) says whether it touched vehicles or
+    reservations, in which case the index reloads on the next query.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._schedules = {}
+        self._reservation_vehicle = {}
+        self._loaded = False
+        self._data_version = None
+        self._version = None
+        self._probe = None
+
+    # --- Loading and freshness ---
+
+    def _probe_conn(self):
+        if self._probe is None:
+            self._probe = sqlite3.connect(self.db_file, check_same_thread=False)
+        return self._probe
+
+    def load(self, conn):
+        data_version = self._probe_conn().execute("PRAGMA data_version").fetchone()[0]
+        # One read transaction, so the version matches the rows it was read with.
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute("BEGIN")
+        try:
+            version = schedule_version(conn)
+            schedules, reservation_vehicle = build_schedules(conn)
+        finally:
+            if own_transaction:
+                conn.execute("COMMIT")
+        with self._lock:
+            self._schedules = schedules
+            self._reservation_vehicle = reservation_vehicle
+            self._data_version = data_version
+            self._version = version
+            self._loaded = True
+
+    def ensure_fresh(self, conn):
+        with self._lock:
+            if self._loaded:
+                data_version = self._probe_conn().execute("PRAGMA data_version").fetchone()[0]
+                if data_version == self._data_version:
+                    return
+                if schedule_version(self._probe_conn()) == self._version:
+                    self._data_version = data_version  # the commits left vehicles and reservations alone
+                    return
+            self.load(conn)
+
+    def committed_versions(self, conn):
+        """Inside a write transaction: (ScheduleVersion before it, ScheduleVersion with its changes so far).
+
+        The writer holds the write lock, so the probe's committed value is
+        the one the transaction started from and nobody else can move it.
+        """
+        with self._lock:
+            return schedule_version(self._probe_conn()), schedule_version(conn)
+
+    def apply_committed(self, apply, before, after):
+        """Applies a committed write's delta if the index was current when the write began.
+
+        before and after come from committed_versions(). An index older than
+        before missed someone else's commit, so it is dropped and reloads on
+        the next query instead; one at or past after already holds the write.
+        A commit by anyone else after this one moves ScheduleVersion past
+        after, which ensure_fresh() then notices.
+        """
+        with self._lock:
+            if not self._loaded or self._version >= after:
+                return
+            if self._version < before:
+                self._loaded = False
+                return
+            apply(self)
+            self._version = after
+
+    def close(self):
+        with self._lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+            self._loaded = False
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    # --- Queries ---
+
+    def is_available(self, vehicle_id, start_dt_iso, end_dt_iso, exclude_res_id=None):
+        with self._lock:
+            schedule = self._schedules.get(vehicle_id)
+            if schedule is None or schedule.blocked:
+                return False
+            return not schedule.overlaps(start_dt_iso, end_dt_iso, exclude_res_id)
+
+    def vehicle_ids(self):
+        with self._lock:
+            return list(self._schedules)
+
+    # --- Deltas from committed writes ---
+
+    def add_vehicle(self, vehicle_id, available=True):
+        with self._lock:
+            self._schedules.setdefault(vehicle_id, VehicleSchedule(blocked=not available))
+
+    def set_blocked(self, vehicle_id, blocked):
+        with self._lock:
+            schedule = self._schedules.get(vehicle_id)
+            if schedule is not None:
+                schedule.blocked = blocked
+
+    def add_reservation(self, rid, vehicle_id, start_dt_iso, end_dt_iso):
+        with self._lock:
+            # A reload between the commit and this delta may already contain rid.
+            self.remove_reservation(rid)
+            schedule = self._schedules.setdefault(vehicle_id, VehicleSchedule())
+            schedule.insert(rid, start_dt_iso, end_dt_iso)
+            self._reservation_vehicle[rid] = vehicle_id
+
+    def update_reservation_end(self, rid, new_end_dt_iso):
+        with self._lock:
+            vehicle_id = self._reservation_vehicle.get(rid)
+            if vehicle_id is None:
+                return
+            schedule = self._schedules[vehicle_id]
+            removed = schedule.remove(rid)
+            if removed is not None:
+                schedule.insert(rid, removed[0], new_end_dt_iso)
+
+    def remove_reservation(self, rid):
+        with self._lock:
+            vehicle_id = self._reservation_vehicle.pop(rid, None)
+            if vehicle_id is not None:
+                self._schedules[vehicle_id].remove(rid)
+
+    # --- Consistency ---
+
+    def diff_against(self, conn):
+        """Compares the index with the database and returns a list of mismatch descriptions."""
+        expected, _ = build_schedules(conn)
+        problems = []
+        with self._lock:
+            for vid in sorted(set(expected) | set(self._schedules)):
+                want = expected.get(vid)
+                have = self._schedules.get(vid)
+                if want is None:
+                    problems.append(f"vehicle {vid}: indexed but not in the database")
+                elif have is None:
+                    problems.append(f"vehicle {vid}: missing from the index")
+                else:
+                    if want.blocked != have.blocked:
+                        problems.append(f"vehicle {vid}: blocked={have.blocked}, database says {want.blocked}")
+                    if want.intervals() != have.intervals():
+                        problems.append(f"vehicle {vid}: reservations {have.intervals()} != database {want.intervals()}")
+        return problems
+
+
+def build_schedules(conn):
+    """Reads vehicles, active reservations and maintenance blocks straight from SQL."""
+    schedules = {}
+    for vid, available in conn.execute("SELECT VehicleID, available FROM Vehicle"):
+        schedules[vid] = VehicleSchedule(blocked=(available == 0))
+
+    reservation_vehicle = {}
+    rows = conn.execute("""
+    SELECT ReservationID, vehicle_id, start_datetime, end_datetime
+    FROM Reservation
+    WHERE status='active' AND start_datetime IS NOT NULL AND end_datetime IS NOT NULL
+    ORDER BY start_datetime
+    """)
+    for rid, vid, start, end in rows:
+        schedule = schedules.get(vid)
+        if schedule is None:
+            # Orphan reservation: the SQL check treats a missing vehicle as unavailable too.
+            continue
+        schedule.starts.append(start)
+        schedule.ends.append(end)
+        schedule.reservation_ids.append(rid)
+        schedule.max_ends.append(end)
+        reservation_vehicle[rid] = vid
+
+    for schedule in schedules.values():
+        schedule._refresh_max_ends(0)
+    return schedules, reservation_vehicle
+
+
+def schedule_version(conn):
+    row = conn.execute("SELECT version FROM ScheduleVersion WHERE id = 1").fetchone()
+    return row[0] if row else 0
@@ -0,0 +1,419 @@
+"""Times every public db.py function and VehicleRentalService method at several dataset sizes.
+
+For each size (reservations; default 1k, 100k and 1M) a dataset is made
+with generate_dataset.py. With --data-dir the datasets are kept and
+reused across runs; each run works on a fresh copy. Every case first
+gets one warm-up call. It is then repeated until it has run for
+--min-time seconds (at least 3 runs, at most --max-runs), and the median
+and fastest run are kept. Read cases run before write cases, so all
+reads see the generated data unchanged. Any setup a write needs is done
+outside the timed call. Examples are a booking to finalize or a vehicle
+to send to the workshop. The in-memory availability index and catalog
+are refreshed after setup, so the timed call does not pay for a reload
+that setup caused.
+
+Results are written as JSON to --output. With --baseline, each case is
+compared with the same size and case in that file. A case regresses if
+it is more than --tolerance slower and at least --noise-ms slower in
+absolute terms; any regression makes the script exit 1.
+--save-baseline writes the results to the baseline file instead. A new
+public function with no case here also fails the run, so that the suite
+keeps covering everything.
+
+    python benchmarks/bench_db_suite.py [--sizes 1k,100k,1M] [--data-dir DIR] [--baseline benchmarks/results/baseline.json]
+"""
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+
+import db  # noqa: E402
+import db_stats  # noqa: E402
+from generate_dataset import NOW, generate, parse_count  # noqa: E402
+from rental_system import Customer, MaintenanceRecord, Vehicle, VehicleRentalService  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+
+# Public names that are plumbing rather than operations; timing them says nothing about the data size.
+NOT_TIMED = {
+    "db.get_manager", "db.get_availability_index", "db.get_vehicle_catalog", "db.set_storage_profile",
+    "db.get_booking_writer", "db.close_connections",
+}
+WRITE_POOL = 64  # spare vehicles added up front for write cases that need one per run
+
+
+class Case:
+    def __init__(self, name, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup  # untimed; run(setup()) is timed. Without a setup, run() is timed.
+
+
+class Context:
+    """Ids and values picked from the dataset, plus helpers that set up write cases."""
+
+    def __init__(self, system):
+        self.system = system
+        self.counter = itertools.count()
+        with db.get_manager().connection() as conn:
+            self.vehicle = conn.execute("""
+            SELECT VehicleID, plate, vtype, brand, year, model FROM Vehicle
+            WHERE available=1 ORDER BY VehicleID LIMIT 1""").fetchone()
+            self.active_rid = conn.execute(
+                "SELECT ReservationID FROM Reservation WHERE status='active' ORDER BY ReservationID DESC LIMIT 1").fetchone()[0]
+            self.damaged_rid = conn.execute(
+                "SELECT reservation_id FROM DamageContract ORDER BY reservation_id LIMIT 1").fetchone()[0]
+            self.customer_name, self.customer_phone = conn.execute(
+                "SELECT name, phone FROM Customer ORDER BY CustomerID LIMIT 1").fetchone()
+        self.search_start = (NOW + timedelta(days=7)).isoformat()
+        self.search_end = (NOW + timedelta(days=10)).isoformat()
+        self.day = NOW.date()
+        self.booking_vid = self._add_vehicle("SUITE-BOOK")
+        self.spare = [self._add_vehicle(f"SUITE-{i}") for i in range(WRITE_POOL)]
+        self.customer_id = db.find_or_create_customer("Suite Customer", "0917", "suite@example.com", "SUITE-LIC")
+
+    @staticmethod
+    def _add_vehicle(plate):
+        db.add_vehicle("Suite", "Bench", 2024, plate, "Sedan", 1500.0)
+        return db.get_vehicle_by_plate(plate)[0]
+
+    def n(self):
+        return next(self.counter)
+
+    def window(self):
+        """A booking window on booking_vid that no earlier call has used."""
+        start = datetime(2040, 1, 1, 9) + timedelta(days=3 * self.n())
+        return start.isoformat(), (start + timedelta(days=2)).isoformat()
+
+    def booking(self):
+        return db.create_reservation(self.booking_vid, self.customer_id, False, *self.window(), "Cebu")[0]
+
+    def spare_vehicle(self):
+        if not self.spare:
+            self.spare.append(self._add_vehicle(f"SUITE-X{self.n()}"))
+        return self.spare.pop()
+
+    def vehicle_in_shop(self):
+        vid = self.spare_vehicle()
+        db.start_maintenance(vid, "Oil change", 1500.0, "")
+        with db.get_manager().connection() as conn:
+            return conn.execute("SELECT MaintenanceID FROM Maintenance WHERE vehicle_id=? AND status='active'",
+                                (vid,)).fetchone()[0]
+
+
+def read_cases(ctx):
+    s = ctx.system
+    vid, plate, vtype, brand, year, model = ctx.vehicle
+    start, end = ctx.search_start, ctx.search_end
+    first_day, last_day = ctx.day - timedelta(days=7), ctx.day + timedelta(days=35)
+    quarter = ((NOW - timedelta(days=90)).date().isoformat(), NOW.date().isoformat())
+    day_start, day_end = f"{ctx.day.isoformat()}T00:00:00", f"{(ctx.day + timedelta(days=1)).isoformat()}T00:00:00"
+    # Keyset cursors from the middle of each listing: a deep page should cost the same as the first.
+    active_start = db.get_reservation_details(ctx.active_rid)[4]
+    next_vehicles = s.get_vehicles_page("model")["next_cursor"]
+    next_reservations = s.get_active_reservations_page("customer_name")["next_cursor"]
+    # Every vehicle quoted for the search window, as when pricing the candidates for one rental.
+    quote_ids = [row[0] for row in db.get_all_vehicles()]
+    return [
+        Case("db.init_db", db.init_db),
+        Case("db.get_all_vehicles", db.get_all_vehicles),
+        Case("db.get_vehicles_page", lambda: db.get_vehicles_page("model")),
+        Case("db.get_vehicles_page[deep]", lambda: db.get_vehicles_page("model", False, (model, vid))),
+        Case("db.get_vehicles_page[search]", lambda: db.get_vehicles_page("daily_rate", True, search=brand)),
+        Case("db.get_vehicle_by_plate", lambda: db.get_vehicle_by_plate(plate)),
+        Case("db.get_vehicle_types", db.get_vehicle_types),
+        Case("db.get_brands_by_type", lambda: db.get_brands_by_type(vtype)),
+        Case("db.get_years_by_type_and_brand", lambda: db.get_years_by_type_and_brand(vtype, brand)),
+        Case("db.get_models_by_type_brand_and_year", lambda: db.get_models_by_type_brand_and_year(vtype, brand, year)),
+        Case("db.get_available_vehicles_by_model", lambda: db.get_available_vehicles_by_model(vtype, brand, year, model)),
+        Case("db.get_catalog_counts", lambda: db.get_catalog_counts(vtype)),
+        Case("db.search_available_vehicles", lambda: db.search_available_vehicles(start, end)),
+        Case("db.is_vehicle_available", lambda: db.is_vehicle_available(vid, start, end)),
+        Case("db.is_vehicle_available_sql", lambda: db.is_vehicle_available_sql(vid, start, end)),
+        Case("db.verify_availability_index", db.verify_availability_index),
+        Case("db.billable_days", lambda: db.billable_days(start, end)),
+        Case("db.calculate_cost", lambda: db.calculate_cost(vid, start, end, True)),
+        Case("db.quote_costs", lambda: db.quote_costs(quote_ids, start, end, True)),
+        Case("db.list_active_reservations", db.list_active_reservations),
+        Case("db.list_active_reservations_page", db.list_active_reservations_page),
+        Case("db.list_active_reservations_page[deep]",
+             lambda: db.list_active_reservations_page("start_datetime", False, (active_start, ctx.active_rid))),
+        Case("db.list_active_reservations_page[plate]", lambda: db.list_active_reservations_page("plate", True)),
+        Case("db.list_active_reservations_page[customer]", lambda: db.list_active_reservations_page("customer_name")),
+        Case("db.get_active_reservations_dates", db.get_active_reservations_dates),
+        Case("db.get_bookings_for_date", lambda: db.get_bookings_for_date(day_start, day_end)),
+        Case("db.get_daily_booking_counts", lambda: db.get_daily_booking_counts(first_day.isoformat(), last_day.isoformat())),
+        Case("db.get_fleet_size", db.get_fleet_size),
+        Case("db.get_fleet_status", db.get_fleet_status),
+        Case("db.get_reservation_details", lambda: db.get_reservation_details(ctx.active_rid)),
+        Case("db.get_damage_contracts", lambda: db.get_damage_contracts(ctx.damaged_rid)),
+        Case("db.get_final_costs", lambda: db.get_final_costs(ctx.damaged_rid)),
+        Case("db.get_all_vehicle_list", db.get_all_vehicle_list),
+        Case("db.get_active_maintenance", db.get_active_maintenance),
+        Case("db.get_active_maintenance_page", lambda: db.get_active_maintenance_page("cost", True)),
+        Case("db.get_vehicle_usage_report", db.get_vehicle_usage_report),
+        Case("db.get_vehicle_usage_report[90 days]", lambda: db.get_vehicle_usage_report(*quarter)),
+        Case("db.get_location_usage_report", db.get_location_usage_report),
+        Case("db.verify_usage_rollups", db.verify_usage_rollups),
+        Case("db.find_customers", lambda: db.find_customers(ctx.customer_name[:3])),
+        Case("db.find_customers[phone]", lambda: db.find_customers(ctx.customer_phone[:6])),
+        Case("db.search", lambda: db.search(brand)),
+        Case("db.search[plate prefix]", lambda: db.search(plate[:3])),
+        Case("db.search[notes]", lambda: db.search("scratch", kinds=["damage", "maintenance"])),
+
+        Case("service.prepare_storage", s.prepare_storage),
+        Case("service.get_all_vehicles", s.get_all_vehicles),
+        Case("service.get_vehicles_page", lambda: s.get_vehicles_page("model", cursor=next_vehicles)),
+        Case("service.get_vehicle_by_plate", lambda: s.get_vehicle_by_plate(plate)),
+        Case("service.get_vehicle_types", s.get_vehicle_types),
+        Case("service.get_brands_by_type", lambda: s.get_brands_by_type(vtype)),
+        Case("service.get_years_by_type_and_brand", lambda: s.get_years_by_type_and_brand(vtype, brand)),
+        Case("service.get_models_by_type_brand_and_year", lambda: s.get_models_by_type_brand_and_year(vtype, brand, year)),
+        Case("service.get_catalog_counts", lambda: s.get_catalog_counts(vtype, brand)),
+        Case("service.get_available_vehicles_list", lambda: s.get_available_vehicles_list(vtype, brand, year, model, start, end)),
+        Case("service.search_available_vehicles", lambda: s.search_available_vehicles(start, end, vtype)),
+        Case("service.quote_vehicles", lambda: s.quote_vehicles(quote_ids, start, end)),
+        Case("service.get_all_vehicle_list_fmt", s.get_all_vehicle_list_fmt),
+        Case("service.get_active_reservations", s.get_active_reservations),
+        Case("service.get_active_reservations_page",
+             lambda: s.get_active_reservations_page("customer_name", cursor=next_reservations)),
+        Case("service.get_active_reservations_dates", s.get_active_reservations_dates),
+        Case("service.get_daily_booking_counts", lambda: s.get_daily_booking_counts(first_day, last_day)),
+        Case("service.get_fleet_size", s.get_fleet_size),
+        Case("service.get_active_reservations_dropdown_fmt", s.get_active_reservations_dropdown_fmt),
+        Case("service.get_bookings_for_date", lambda: s.get_bookings_for_date(day_start, day_end)),
+        Case("service.get_reservation_details", lambda: s.get_reservation_details(ctx.active_rid)),
+        Case("service.get_damage_contracts", lambda: s.get_damage_contracts(ctx.damaged_rid)),
+        Case("service.get_active_maintenance", s.get_active_maintenance),
+        Case("service.get_active_maintenance_page", s.get_active_maintenance_page),
+        Case("service.get_usage_report", s.get_usage_report),
+        Case("service.get_usage_report[90 days]", lambda: s.get_usage_report(*quarter)),
+        Case("service.get_location_report", s.get_location_report),
+        Case("service.find_customers", lambda: s.find_customers(ctx.customer_name[:5])),
+        Case("service.search", lambda: s.search(f"{brand} {model}")),
+    ]
+
+
+def write_cases(ctx):
+    s = ctx.system
+    customer = Customer("Suite Customer", "0917", "suite@example.com", "SUITE-LIC")
+
+    def new_customer():
+        n = ctx.n()
+        return f"New {n}", "0917", f"suite-new-{n}@example.com", f"SUITE-NEW-{n}"
+
+    def nothing():
+        return None
+
+    def customer_batch():
+        # 1000 entries: 500 new customers, each twice with the email in a different case.
+        n = ctx.n()
+        batch = [(f"Batch {n}-{i}", "0917", f"batch-{n}-{i}@example.com", f"BATCH-{n}-{i}") for i in range(500)]
+        return batch + [(name, phone, email.upper(), None) for name, phone, email, _ in batch]
+
+    def later_end():
+        # A booking and an end date a day later; no other booking is inside that extra day.
+        rid = ctx.booking()
+        with db.get_manager().connection() as conn:
+            end = conn.execute("SELECT end_datetime FROM Reservation WHERE ReservationID=?", (rid,)).fetchone()[0]
+        return rid, (datetime.fromisoformat(end) + timedelta(hours=12)).isoformat()
+
+    # Cases that change the fleet (and so invalidate the catalog) come last.
+    return [
+        Case("db.find_or_create_customer[new]", lambda args: db.find_or_create_customer(*args), new_customer),
+        Case("db.find_or_create_customer[existing]",
+             lambda _: db.find_or_create_customer("Suite Customer", "0917", "suite@example.com", "SUITE-LIC"), nothing),
+        Case("db.create_reservation",
+             lambda window: db.create_reservation(ctx.booking_vid, ctx.customer_id, False, *window, "Cebu"), ctx.window),
+        Case("db.book_reservation",
+             lambda window: db.book_reservation(ctx.booking_vid, *new_customer(), *window, False, "Cebu"), ctx.window),
+        Case("db.submit_booking",
+             lambda window: db.submit_booking(ctx.booking_vid, *new_customer(), *window, False, "Cebu").result(), ctx.window),
+        Case("db.update_reservation_end_date", lambda args: db.update_reservation_end_date(*args), later_end),
+        Case("db.add_damage", lambda rid: db.add_damage(rid, "Scratch", 1500.0, ""), ctx.booking),
+        Case("db.finalize_reservation", lambda rid: db.finalize_reservation(rid, 3000.0, 120.0), ctx.booking),
+        Case("db.resolve_customers[1000]", db.resolve_customers, customer_batch),
+        Case("service.resolve_customers[1000]",
+             lambda batch: s.resolve_customers([Customer(*entry) for entry in batch]), customer_batch),
+        Case("db.rebuild_usage_rollups", lambda _: db.rebuild_usage_rollups(), nothing),
+
+        Case("service.make_reservation",
+             lambda window: s.make_reservation(ctx.booking_vid, customer, *window, False, "Cebu"), ctx.window),
+        Case("service.update_reservation_return", lambda args: s.update_reservation_return(*args), later_end),
+        Case("service.finalize_return", lambda rid: s.finalize_return(rid, 120.0), ctx.booking),
+
+        Case("db.start_maintenance", lambda vid: db.start_maintenance(vid, "Oil change", 1500.0, ""), ctx.spare_vehicle),
+        Case("db.finish_maintenance", db.finish_maintenance, ctx.vehicle_in_shop),
+        Case("service.start_maintenance",
+             lambda vid: s.start_maintenance(MaintenanceRecord(vid, "Oil change", 1500.0, "")), ctx.spare_vehicle),
+        Case("service.finish_maintenance", s.finish_maintenance, ctx.vehicle_in_shop),
+        Case("db.add_vehicle",
+             lambda n: db.add_vehicle("Suite", "Bench", 2024, f"SUITE-ADD-{n}", "Sedan", 1500.0), ctx.n),
+        Case("service.add_new_vehicle",
+             lambda n: s.add_new_vehicle(Vehicle("Suite", "Bench", 2024, f"SUITE-NEW-{n}", "Sedan", 1500.0)), ctx.n),
+    ]
+
+
+def uncovered(cases):
+    """Public db.py functions and service methods that have no case and are not in NOT_TIMED."""
+    covered = {case.name.split("[")[0] for case in cases} | NOT_TIMED
+    public = [f"db.{name}" for name, func in inspect.getmembers(db, inspect.isfunction)
+              if func.__module__ == db.__name__ and not name.startswith("_")]
+    public += [f"service.{name}" for name, _ in inspect.getmembers(VehicleRentalService, inspect.isfunction)
+               if not name.startswith("_")]
+    return sorted(set(public) - covered)
+
+
+def time_case(case, min_time, max_runs):
+    def once():
+        args = case.setup() if case.setup else None
+        if case.setup:
+            db.get_availability_index()
+            db.get_vehicle_catalog()
+        started = time.perf_counter()
+        if case.setup:
+            case.run(args)
+        else:
+            case.run()
+        return time.perf_counter() - started
+
+    once()  # warm-up: caches, statement cache, index load
+    runs = []
+    spent = 0.0
+    while len(runs) < max_runs and (len(runs) < 3 or spent < min_time):
+        runs.append(once())
+        spent += runs[-1]
+    return {"median_ms": statistics.median(runs) * 1000, "min_ms": min(runs) * 1000, "runs": len(runs)}
+
+
+def dataset_copy(size, seed, data_dir, work_dir):
+    """Path to a fresh working copy of the dataset for `size`, generating it first if needed."""
+    cached = os.path.join(data_dir, f"dataset_{size}_seed{seed}.db")
+    generated_s = None
+    if not os.path.exists(cached):
+        started = time.perf_counter()
+        generate(cached + ".tmp", size, seed=seed)
+        os.replace(cached + ".tmp", cached)
+        generated_s = time.perf_counter() - started
+    work = os.path.join(work_dir, f"work_{size}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(work + suffix):
+            os.remove(work + suffix)
+    shutil.copyfile(cached, work)
+    return work, generated_s
+
+
+def run_size(size, args, data_dir, work_dir):
+    work, generated_s = dataset_copy(size, args.seed, data_dir, work_dir)
+    db.close_connections()
+    db.DB_FILE = work
+    try:
+        db.init_db()
+        if args.db_stats:
+            db_stats.enable()
+        ctx = Context(VehicleRentalService())
+        cases = read_cases(ctx) + write_cases(ctx)
+        missing = uncovered(cases)
+        results = {}
+        for case in cases:
+            if args.only and not any(part in case.name for part in args.only):
+                continue
+            results[case.name] = time_case(case, args.min_time, args.max_runs)
+            r = results[case.name]
+            print(f"  {case.name:45} {r['median_ms']:10.3f} ms  (min {r['min_ms']:.3f}, {r['runs']} runs)", flush=True)
+    finally:
+        db_stats.disable()
+        db.close_connections()
+    return {"generate_s": generated_s, "cases": results}, missing
+
+
+def compare(results, baseline, tolerance, noise_ms):
+    """Prints cases that moved beyond the tolerance; returns the regressions."""
+    regressions = []
+    for size, current in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size, {}).get("cases", {})
+        for name, now in current["cases"].items():
+            if name not in before:
+                continue
+            old, new = before[name]["median_ms"], now["median_ms"]
+            ratio = new / old if old else float("inf")
+            if abs(new - old) < noise_ms or abs(ratio - 1) <= tolerance:
+                continue
+            kind = "slower" if new > old else "faster"
+            print(f"  {size:>8} {name:45} {old:10.3f} -> {new:10.3f} ms  ({ratio:.2f}x, {kind})")
+            if kind == "slower":
+                regressions.append((size, name))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,100k,1M", help="comma-separated reservation counts, e.g. 1k,100k,1M")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--data-dir", help="keep generated datasets here and reuse them (default: a temp dir)")
+    parser.add_argument("--only", nargs="*", help="run only cases whose name contains one of these")
+    parser.add_argument("--min-time", type=float, default=0.3, help="seconds to spend timing each case")
+    parser.add_argument("--max-runs", type=int, default=WRITE_POOL // 2)
+    parser.add_argument("--db-stats", action="store_true", help="run with db_stats recording on, to measure its overhead")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="results file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, as a fraction (0.5 = 50%%)")
+    parser.add_argument("--noise-ms", type=float, default=0.2, help="ignore differences smaller than this")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="rental_suite_")
+    data_dir = args.data_dir or work_dir
+    os.makedirs(data_dir, exist_ok=True)
+    results = {
+        "meta": {"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "sqlite": sqlite3.sqlite_version, "platform": platform.platform(), "machine": platform.machine(),
+                 "seed": args.seed, "db_stats": args.db_stats},
+        "sizes": {},
+    }
+    missing = []
+    for size in (parse_count(text) for text in args.sizes.split(",")):
+        print(f"{size} reservations:", flush=True)
+        results["sizes"][str(size)], missing = run_size(size, args, data_dir, work_dir)
+    if not args.data_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    target = args.baseline if args.save_baseline else args.output
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    with open(target, "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    print(f"Results written to {target}")
+
+    failed = False
+    if missing:
+        print("FAIL: no benchmark case for: " + ", ".join(missing))
+        failed = True
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.baseline} ({baseline['meta'].get('created')}, "
+              f"tolerance {args.tolerance:.0%}, noise floor {args.noise_ms} ms):")
+        regressions = compare(results, baseline, args.tolerance, args.noise_ms)
+        if regressions:
+            print(f"FAIL: {len(regressions)} case(s) slower than the baseline")
+            failed = True
+        else:
+            print("  no regressions")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Worst-case Tk event-loop stall with database calls inline versus on TkExecutor.
+
+A heartbeat is scheduled with after() every few milliseconds. The same
+session-like workload runs twice:
+- "inline" runs each call on the event-loop thread, as the tabs used to.
+- "executor" submits each call to TkExecutor.
+The workload is a date-filtered usage report, calendar counts, the
+vehicle and reservation lists, an availability search, and a write that
+has to wait behind another connection's lock.
+The largest gap between heartbeats is the longest the window would have
+been frozen. The executor run also checks that a burst of superseding
+requests on one channel delivers only the last result.
+
+It uses tkinter.Tcl(), which is the same event loop without a window,
+so it runs headless.
+
+    python benchmarks/bench_event_loop_stall.py [--reservations 100000] [--lock-ms 400] [--max-stall-ms 50]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tkinter
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["RENTAL_DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="rental_stall_"), "stall.db")
+
+import db  # noqa: E402
+from rental_system import Customer, VehicleRentalService  # noqa: E402
+from tk_executor import TkExecutor  # noqa: E402
+
+HEARTBEAT_MS = 5
+SPACING_MS = 30  # gap between workload calls, like a user clicking around
+
+
+def seed(vehicles, reservations):
+    rng = random.Random(11)
+    base = datetime(2024, 1, 1)
+    with db.get_manager().transaction() as conn:
+        conn.executemany(
+            "INSERT INTO Vehicle (brand, model, year, plate, vtype, daily_rate) VALUES (?, ?, ?, ?, ?, ?)",
+            [("Brand", f"Model{i % 13}", 2015 + i % 10, f"STALL-{i}", ("Sedan", "SUV", "Van")[i % 3], 1500.0)
+             for i in range(vehicles)])
+        conn.execute("INSERT INTO Customer (name, email, drivers_license) VALUES ('Bench', 'b@x', 'B')")
+        rows = []
+        for _ in range(reservations):
+            start = base + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 3))
+            end = start + timedelta(minutes=rng.randint(60, 60 * 24 * 10))
+            rows.append((rng.randint(1, vehicles), 1, start.isoformat(), end.isoformat(),
+                         rng.choice(("active", "returned", "returned")), round(rng.uniform(0, 500), 1), "Cebu"))
+        conn.executemany("""
+        INSERT INTO Reservation (vehicle_id, customer_id, start_datetime, end_datetime, status, distance_km, location)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+    db.add_vehicle("Lock", "Target", 2024, "LOCK-1", "Sedan", 1000.0)
+
+
+class Locker:
+    """Holds the write lock from a separate connection for a while, like another counter mid-transaction."""
+
+    def __init__(self, hold_ms):
+        self.hold_ms = hold_ms
+
+    def hold(self):
+        locked = threading.Event()
+
+        def run():
+            conn = sqlite3.connect(db.DB_FILE, isolation_level=None)
+            conn.execute("BEGIN IMMEDIATE")
+            locked.set()
+            time.sleep(self.hold_ms / 1000.0)
+            conn.execute("COMMIT")
+            conn.close()
+
+        threading.Thread(target=run, daemon=True).start()
+        locked.wait()
+
+
+def build_workload(system, lock_ms):
+    lock_vid = db.get_vehicle_by_plate("LOCK-1")[0]
+    res_id, _ = system.make_reservation(lock_vid, Customer("Lock", "0917", "l@x", "L"),
+                                        "2031-01-01T09:00:00", "2031-01-02T09:00:00", False, "Cebu")
+    extension = [0]
+
+    def write_behind_lock():
+        Locker(lock_ms).hold()
+        extension[0] += 1
+        new_end = datetime(2031, 1, 2, 9) + timedelta(hours=extension[0])
+        return system.update_reservation_return(res_id, new_end.isoformat())
+
+    return [
+        ("usage report (date filter)", lambda: system.get_usage_report("2024-01-01", "2026-12-31")),
+        ("calendar counts", lambda: system.get_daily_booking_counts(date(2025, 5, 26), date(2025, 7, 6))),
+        ("vehicle list", system.get_all_vehicles),
+        ("active reservations", system.get_active_reservations),
+        ("availability search", lambda: system.search_available_vehicles("2025-06-01T09:00:00", "2025-06-04T09:00:00")),
+        ("write behind a lock", write_behind_lock),
+        ("usage report (all time)", system.get_usage_report),
+    ]
+
+
+def run(mode, workload):
+    root = tkinter.Tcl()
+    executor = TkExecutor(root)
+    lateness = []
+    last = [time.perf_counter()]
+    remaining = [len(workload)]
+    superseded = {"delivered": 0}
+    stopped = []
+
+    def beat():
+        now = time.perf_counter()
+        lateness.append(max(0.0, now - last[0] - HEARTBEAT_MS / 1000.0))
+        last[0] = now
+        root.after(HEARTBEAT_MS, beat)
+
+    def finished(_=None):
+        remaining[0] -= 1
+        if not remaining[0]:
+            root.after(50, lambda: stopped.append(True))
+
+    def failed(error):
+        print(f"    call failed: {error}")
+        finished()
+
+    def inline(call):
+        try:
+            call()
+        except Exception as e:
+            print(f"    call failed: {e}")
+        finished()
+
+    for i, (_, call) in enumerate(workload):
+        if mode == "inline":
+            root.after(SPACING_MS * (i + 1), lambda c=call: inline(c))
+        else:
+            root.after(SPACING_MS * (i + 1), lambda c=call: executor.submit(c, on_done=finished, on_error=failed))
+
+    if mode == "executor":
+        remaining[0] += 1
+
+        def burst():
+            def delivered(result):
+                superseded["delivered"] += 1
+                finished()
+            for _ in range(10):
+                executor.submit(time.sleep, 0.02, on_done=delivered, on_error=failed, channel="cascade")
+        root.after(SPACING_MS, burst)
+
+    started = time.perf_counter()
+    root.after(HEARTBEAT_MS, beat)
+    while not stopped:  # mainloop() needs a Tk window, so pump the Tcl event loop directly
+        root.dooneevent()
+    elapsed = time.perf_counter() - started
+    executor.shutdown()
+    lateness.sort()
+    worst = lateness[-1] if lateness else 0.0
+    p99 = lateness[int(len(lateness) * 0.99)] if lateness else 0.0
+    return worst, p99, elapsed, superseded["delivered"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=500)
+    parser.add_argument("--reservations", type=int, default=100000)
+    parser.add_argument("--lock-ms", type=int, default=400, help="how long the other connection holds the write lock")
+    parser.add_argument("--max-stall-ms", type=float, default=None,
+                        help="exit non-zero if the executor run stalls longer than this")
+    args = parser.parse_args()
+
+    db.init_db()
+    seed(args.vehicles, args.reservations)
+    system = VehicleRentalService()
+    workload = build_workload(system, args.lock_ms)
+    print(f"{args.vehicles} vehicles, {args.reservations} reservations, write lock held {args.lock_ms} ms")
+    for name, call in workload:  # warm caches and indexes so both modes see the same state
+        if name != "write behind a lock":
+            call()
+
+    results = {}
+    for mode in ("inline", "executor"):
+        worst, p99, elapsed, delivered = run(mode, workload)
+        results[mode] = worst
+        print(f"  {mode:9} worst stall {worst * 1000:7.1f} ms   p99 {p99 * 1000:6.1f} ms   session {elapsed:5.2f} s")
+        if mode == "executor":
+            print(f"            10 superseding requests on one channel delivered {delivered} result(s)")
+            if delivered != 1:
+                print("FAIL: superseded requests were delivered")
+                sys.exit(1)
+    db.close_connections()
+
+    if args.max_stall_ms is not None and results["executor"] * 1000 > args.max_stall_ms:
+        print(f"FAIL: executor stall exceeded {args.max_stall_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
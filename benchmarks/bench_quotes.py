@@ -0,0 +1,97 @@
+"""Batch pricing (db.quote_costs) against calling db.calculate_cost once per quote.
+
+Seeds a temporary fleet and prices the same random quotes both ways:
+vehicles, pickup and return times down to the second, and driver flags.
+Every total and driver fee must be equal. Three batch runs are timed:
+- "batch": the installed quote_engine (NumPy if available).
+- "batch, plain loop": quote_engine with NumPy switched off.
+- "batch, one window": the whole fleet priced for a single pickup/return,
+  like quoting every candidate vehicle.
+
+    python benchmarks/bench_quotes.py [--quotes 100000] [--vehicles 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["RENTAL_DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="rental_quotes_"), "quotes.db")
+
+import db  # noqa: E402
+import quote_engine  # noqa: E402
+
+
+def seed(vehicles):
+    rng = random.Random(5)
+    with db.get_manager().transaction() as conn:
+        conn.executemany("INSERT INTO Vehicle (brand, model, year, plate, vtype, daily_rate) VALUES (?, ?, ?, ?, ?, ?)",
+                         [("Toyota", "Vios", 2020, f"QUOTE-{i}", "Sedan", round(rng.uniform(800, 6000), 2))
+                          for i in range(vehicles)])
+
+
+def make_quotes(count, vehicles, seed=9):
+    rng = random.Random(seed)
+    base = datetime(2030, 1, 1)
+    ids, starts, ends, flags = [], [], [], []
+    for _ in range(count):
+        start = base + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        # Mostly whole-hour rentals, some a few seconds past a day boundary, a few zero-length.
+        length = rng.choice((rng.randint(1, 14 * 24) * 3600, rng.randint(1, 10) * 86400 + rng.randint(1, 59), 0))
+        ids.append(rng.randint(1, vehicles))
+        starts.append(start.isoformat())
+        ends.append((start + timedelta(seconds=length)).isoformat())
+        flags.append(rng.random() < 0.3)
+    return ids, starts, ends, flags
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=100000)
+    parser.add_argument("--vehicles", type=int, default=1000)
+    args = parser.parse_args()
+
+    db.init_db()
+    seed(args.vehicles)
+    ids, starts, ends, flags = make_quotes(args.quotes, args.vehicles)
+    numpy = quote_engine.np
+
+    scalar_time, scalar = timed(lambda: [db.calculate_cost(*quote) for quote in zip(ids, starts, ends, flags)])
+    expected = ([total for total, _ in scalar], [fee for _, fee in scalar])
+    runs = [("calculate_cost per quote", scalar_time, expected)]
+    runs.append(("batch", *timed(lambda: db.quote_costs(ids, starts, ends, flags))))
+    quote_engine.np = None
+    runs.append(("batch, plain loop", *timed(lambda: db.quote_costs(ids, starts, ends, flags))))
+    quote_engine.np = numpy
+
+    fleet = list(range(1, args.vehicles + 1)) * (args.quotes // args.vehicles)
+    window = (starts[0], ends[0], flags[0])
+    one_window_time, one_window = timed(lambda: db.quote_costs(fleet, *window))
+    one_window_expected = [db.calculate_cost(vid, *window) for vid in range(1, args.vehicles + 1)]
+
+    print(f"{args.quotes} quotes over {args.vehicles} vehicles (NumPy {'on' if numpy else 'not installed'})")
+    ok = True
+    for name, seconds, (totals, fees) in runs:
+        same = totals == expected[0] and fees == expected[1]
+        ok = ok and same
+        print(f"  {name:<26}{seconds * 1000:>10.1f} ms  {scalar_time / seconds:>6.1f}x"
+              f"{'' if same else '  MISMATCH'}")
+    same = list(zip(*one_window)) == one_window_expected * (args.quotes // args.vehicles)
+    ok = ok and same
+    print(f"  {'batch, one window':<26}{one_window_time * 1000:>10.1f} ms  {scalar_time / one_window_time:>6.1f}x"
+          f"  ({len(fleet)} quotes){'' if same else '  MISMATCH'}")
+    db.close_connections()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
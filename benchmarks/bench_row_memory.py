@@ -0,0 +1,112 @@
+"""Memory per listed row: the old per-row dicts versus the slotted row objects of rental_system.
+
+For the five listings that used to copy every SQLite tuple into a dict
+(vehicles, active reservations, a day's bookings, active maintenance,
+damage contracts), it builds the list both ways from the same seeded
+database. It measures the bytes held per row with tracemalloc and the
+time to build the list. It also checks that each object reads the same
+as the dict it replaces.
+
+    python benchmarks/bench_row_memory.py [--rows 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["RENTAL_DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="rental_rows_"), "rows.db")
+
+import db  # noqa: E402
+from rental_system import VehicleRentalService  # noqa: E402
+
+DAY = ("2030-01-02T00:00:00", "2030-01-03T00:00:00")
+
+# The dict keys each listing used to build, in column order.
+LEGACY_KEYS = {
+    "vehicles": ("VehicleID", "brand", "model", "year", "plate", "vtype", "daily_rate"),
+    "active reservations": ("ReservationID", "plate", "model", "customer_name", "start_datetime", "end_datetime",
+                            "status", "location"),
+    "bookings for a day": ("ReservationID", "plate", "model", "customer_name", "start_datetime", "end_datetime",
+                           "location"),
+    "active maintenance": ("MaintenanceID", "plate", "brand", "model", "checklist", "cost", "start_date", "notes"),
+    "damage contracts": ("condition", "damage_cost", "notes", "created_at"),
+}
+
+
+def seed(rows):
+    with db.get_manager().transaction() as conn:
+        conn.executemany("INSERT INTO Vehicle (brand, model, year, plate, vtype, daily_rate) VALUES (?, ?, ?, ?, ?, ?)",
+                         [("Toyota", f"Model {i % 40}", 2010 + i % 15, f"ROW-{i:07d}", "Sedan", 1500.0 + i % 9)
+                          for i in range(rows)])
+        conn.executemany("INSERT INTO Customer (name, email, drivers_license) VALUES (?, ?, ?)",
+                         [(f"Customer {i}", f"c{i}@example.com", f"LIC-{i}") for i in range(1000)])
+        conn.executemany("""
+        INSERT INTO Reservation (vehicle_id, customer_id, driver_flag, start_datetime, end_datetime, location, status)
+        VALUES (?, ?, 0, '2030-01-01T09:00:00', '2030-01-05T09:00:00', 'Cebu', 'active')""",
+                         [(i + 1, i % 1000 + 1) for i in range(rows)])
+        conn.executemany("""
+        INSERT INTO Maintenance (vehicle_id, checklist, cost, start_date, notes, status)
+        VALUES (?, 'Oil Change, Brakes', 1500.0, '2030-01-01T09:00:00', 'Routine service', 'active')""",
+                         [(i + 1,) for i in range(rows)])
+        conn.executemany("""
+        INSERT INTO DamageContract (reservation_id, condition, damage_cost, notes, created_at)
+        VALUES (1, 'Scratch', 500.0, 'Rear bumper', '2030-01-05T09:00:00')""", [()] * rows)
+
+
+def legacy(fetch, keys):
+    return lambda: [dict(zip(keys, row)) for row in fetch()]
+
+
+def measure(build):
+    """(bytes held by the result, seconds to build it, result)."""
+    build()  # warm the page cache and the statement cache
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started  # timed untraced; tracemalloc slows allocation down
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held, elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    db.init_db()
+    seed(args.rows)
+    service = VehicleRentalService()
+    listings = {
+        "vehicles": (db.get_all_vehicles, service.get_all_vehicles),
+        "active reservations": (db.list_active_reservations, service.get_active_reservations),
+        "bookings for a day": (lambda: db.get_bookings_for_date(*DAY), lambda: service.get_bookings_for_date(*DAY)),
+        "active maintenance": (db.get_active_maintenance, service.get_active_maintenance),
+        "damage contracts": (lambda: db.get_damage_contracts(1), lambda: service.get_damage_contracts(1)),
+    }
+
+    print(f"{args.rows} rows per listing")
+    print(f"  {'listing':<22}{'dict B/row':>12}{'object B/row':>14}{'saved':>8}{'dict ms':>10}{'object ms':>11}")
+    ok = True
+    for name, (fetch, rows) in listings.items():
+        keys = LEGACY_KEYS[name]
+        dict_bytes, dict_time, dicts = measure(legacy(fetch, keys))
+        object_bytes, object_time, objects = measure(rows)
+        if [row.as_dict() for row in objects] != dicts or any(row[key] != old[key] for row, old in
+                                                               zip(objects, dicts) for key in keys):
+            print(f"  MISMATCH in {name}")
+            ok = False
+        count = len(dicts)
+        print(f"  {name:<22}{dict_bytes / count:>12.0f}{object_bytes / count:>14.0f}"
+              f"{1 - object_bytes / dict_bytes:>8.0%}{dict_time * 1000:>10.1f}{object_time * 1000:>11.1f}")
+    db.close_connections()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Startup time: time to the login window and to the first populated tab, against budgets.
+
+Each run starts a fresh interpreter that goes through main.start_app().
+When the login window is on screen it logs in, then waits until the
+Vehicles tab has been built and its first load has finished. Times are
+measured from process spawn, so interpreter start-up and imports count.
+Two things are also checked at login time: tkcalendar must not have
+been imported yet, and no database connection may have been opened.
+
+The script exits 1 if a median time exceeds its budget or a check
+fails. Without a display only the imports before login can be measured;
+it reports those and exits 2.
+
+    python benchmarks/bench_startup.py [--runs 5] [--vehicles 2000] [--login-budget-ms 1500] [--first-tab-budget-ms 3000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Runs in the child; prints one JSON line. time.monotonic() is system-wide on Linux,
+# so the parent can subtract its own spawn timestamp.
+CHILD = r"""
+import json, sys, time
+report = {}
+import main
+report["imported"] = time.monotonic()
+report["tkcalendar_before_login"] = "tkcalendar" in sys.modules
+try:
+    app, login = main.start_app()
+except Exception as e:  # typically TclError: no display
+    report["error"] = str(e)
+    print(json.dumps(report))
+    sys.exit(0)
+
+import db
+
+def wait_for_login():
+    if not login.winfo_viewable():
+        app.after(5, wait_for_login)
+        return
+    report["login_window"] = time.monotonic()
+    report["db_opened_before_login"] = db._manager is not None
+    login.username_entry.insert(0, login.correct_username)
+    login.password_entry.insert(0, login.correct_password)
+    login.handle_login()
+    wait_for_first_tab()
+
+def wait_for_first_tab():
+    if "Vehicles" not in app.tab_instances or app.executor.busy:
+        app.after(5, wait_for_first_tab)
+        return
+    app.update_idletasks()
+    report["first_tab"] = time.monotonic()
+    print(json.dumps(report))
+    app.on_close()
+
+app.after(0, wait_for_login)
+app.mainloop()
+"""
+
+
+def seed(db_file, vehicles):
+    env = dict(os.environ, RENTAL_DB_FILE=db_file)
+    script = ("import db; db.init_db()\n"
+              f"[db.add_vehicle('Brand', 'Model%d' % (i % 20), 2015 + i % 10, 'BOOT-%d' % i, 'Sedan', 1000.0) for i in range({vehicles})]")
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True)
+
+
+def run_once(db_file):
+    env = dict(os.environ, RENTAL_DB_FILE=db_file)
+    spawned = time.monotonic()
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        raise RuntimeError(f"startup run produced no report:\n{out.stderr}")
+    report = json.loads(lines[-1])
+    for key in ("imported", "login_window", "first_tab"):
+        if key in report:
+            report[key] = (report[key] - spawned) * 1000
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--login-budget-ms", type=float, default=1500)
+    parser.add_argument("--first-tab-budget-ms", type=float, default=3000)
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(prefix="rental_startup_"), "startup.db")
+    seed(db_file, args.vehicles)
+
+    reports = [run_once(db_file) for _ in range(args.runs)]
+    failures = []
+    if any(r["tkcalendar_before_login"] for r in reports):
+        failures.append("tkcalendar was imported before the login window")
+    if any(r.get("db_opened_before_login") for r in reports):
+        failures.append("a database connection was opened before the login window")
+
+    imported = statistics.median(r["imported"] for r in reports)
+    print(f"{args.runs} runs, {args.vehicles} vehicles; medians from process spawn:")
+    print(f"  imports done          {imported:8.1f} ms")
+
+    headless = any("error" in r for r in reports)
+    if headless:
+        print(f"  login window / first tab: skipped ({reports[0]['error']})")
+    else:
+        login = statistics.median(r["login_window"] for r in reports)
+        first_tab = statistics.median(r["first_tab"] for r in reports)
+        print(f"  login window shown    {login:8.1f} ms   (budget {args.login_budget_ms:.0f} ms)")
+        print(f"  first tab populated   {first_tab:8.1f} ms   (budget {args.first_tab_budget_ms:.0f} ms, includes login)")
+        if login > args.login_budget_ms:
+            failures.append(f"time to login window {login:.0f} ms is over budget")
+        if first_tab > args.first_tab_budget_ms:
+            failures.append(f"time to first tab {first_tab:.0f} ms is over budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    if headless:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compares booking and report throughput under each storage profile.
+
+Each profile gets a fresh database in a temporary directory. Writer threads
+create reservations while reader threads run the usage report, which is the
+mix that used to fail with "database is locked" on the default rollback journal.
+
+    python benchmarks/bench_storage_profiles.py [--seconds 3] [--writers 2] [--readers 2]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+_tmp = tempfile.mkdtemp(prefix="rental_bench_")
+os.environ["RENTAL_DB_FILE"] = os.path.join(_tmp, "import.db")
+
+import db  # noqa: E402
+from db_pool import STORAGE_PROFILES  # noqa: E402
+
+VEHICLES = 50
+
+
+def seed():
+    for i in range(VEHICLES):
+        db.add_vehicle("Brand", f"Model{i % 5}", 2020, f"BENCH-{i}", "Sedan", 1000 + i)
+    return db.find_or_create_customer("Bench", "000", "bench@example.com", "BENCH-LIC")
+
+
+def run_profile(name, seconds, writers, readers):
+    db.DB_FILE = os.path.join(_tmp, f"{name}.db")
+    db.set_storage_profile(name)
+    db.init_db()
+    customer_id = seed()
+
+    stop = threading.Event()
+    counts = {"bookings": 0, "reports": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def writer(worker):
+        start = datetime(2030, 1, 1) + timedelta(days=worker * 10000)
+        n = 0
+        while not stop.is_set():
+            s = start + timedelta(hours=2 * n)
+            e = s + timedelta(hours=1)
+            try:
+                db.create_reservation(1 + n % VEHICLES, customer_id, False, s.isoformat(), e.isoformat(), "Bench")
+                with lock:
+                    counts["bookings"] += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    counts["locked"] += 1
+            n += 1
+
+    def reader():
+        while not stop.is_set():
+            try:
+                db.get_vehicle_usage_report()
+                with lock:
+                    counts["reports"] += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    counts["locked"] += 1
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    db.close_connections()
+
+    return {
+        "profile": name,
+        "bookings_per_s": counts["bookings"] / seconds,
+        "reports_per_s": counts["reports"] / seconds,
+        "locked_errors": counts["locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'profile':<15}{'bookings/s':>12}{'reports/s':>12}{'locked':>8}")
+    for name in STORAGE_PROFILES:
+        r = run_profile(name, args.seconds, args.writers, args.readers)
+        print(f"{r['profile']:<15}{r['bookings_per_s']:>12.1f}{r['reports_per_s']:>12.1f}{r['locked_errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""TableModel against the old list-of-dicts handling, on vehicle-shaped rows.
+
+Compares three things: header clicks (re-sorting every time versus
+reading cached orders), typing a search one letter at a time (a full
+rescan per keystroke versus narrowing the previous matches), and adding
+one vehicle (reloading and re-sorting everything versus upsert).
+Results are checked for equality. No display needed.
+
+    python benchmarks/bench_table_model.py [--rows 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tabs.table_model import TableModel  # noqa: E402
+
+SEARCH_FIELDS = ('brand', 'model', 'year', 'plate', 'vtype')
+
+
+def sort_key(column_key):
+    # Same choices as VehiclesTab.sort_key
+    if column_key in ('VehicleID', 'year'):
+        return lambda x: int(x.get(column_key, 0))
+    elif column_key == 'daily_rate':
+        return lambda x: float(x.get(column_key, 0.0))
+    return lambda x: x.get(column_key, '')
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    brands = ("Toyota", "Honda", "Ford", "Nissan", "Mitsubishi", "Hyundai")
+    types = ("Sedan", "SUV", "Van", "Pickup")
+    return [{'VehicleID': i, 'brand': rng.choice(brands), 'model': f"Model {rng.randint(1, 60)}",
+             'year': rng.randint(2008, 2025), 'plate': f"{rng.choice('ABCDEFGH')}{rng.choice('JKLMNP')}X-{i:06d}",
+             'vtype': rng.choice(types), 'daily_rate': float(rng.randint(800, 6000))}
+            for i in range(1, count + 1)]
+
+
+def legacy_filter(rows, text):
+    text = text.lower()
+    return [r for r in rows if text in " ".join(str(r[f]) for f in SEARCH_FIELDS).lower()]
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+    clicks = ['daily_rate', 'model', 'daily_rate', 'year', 'model', 'daily_rate']
+    print(f"{args.rows} rows")
+
+    # --- Header clicks ---
+    legacy = list(rows)
+
+    def legacy_clicks():
+        for i, column in enumerate(clicks):
+            legacy.sort(key=sort_key(column), reverse=i % 2 == 1)
+        return legacy
+
+    model = TableModel('VehicleID', sort_key, SEARCH_FIELDS)
+    load_time, _ = timed(lambda: model.load(rows))
+
+    def model_clicks():
+        for i, column in enumerate(clicks):
+            model.sort(column, i % 2 == 1)
+        return model.rows
+
+    legacy_time, legacy_rows = timed(legacy_clicks)
+    model_time, model_rows = timed(model_clicks)
+    column = clicks[-1]
+    assert [sort_key(column)(r) for r in legacy_rows] == [r[column] for r in model_rows]
+    print(f"  load into model          {load_time * 1000:8.1f} ms (once per refresh)")
+    print(f"  {len(clicks)} header clicks   legacy {legacy_time * 1000:8.1f} ms   model {model_time * 1000:8.1f} ms")
+
+    # --- Search as you type ---
+    keystrokes = ["t", "to", "toy", "toyo", "toyot", "toyota"]
+    legacy_time, legacy_hits = timed(lambda: [legacy_filter(legacy, text) for text in keystrokes][-1])
+    model_time, _ = timed(lambda: [model.set_filter(text) for text in keystrokes])
+    assert len(model.rows) == len(legacy_hits)
+    print(f"  typing '{keystrokes[-1]}'          legacy {legacy_time * 1000:8.1f} ms   model {model_time * 1000:8.1f} ms"
+          f"   ({len(legacy_hits)} matches)")
+    model.set_filter("")
+
+    # --- One new vehicle ---
+    new_row = dict(make_rows(1, seed=99)[0], VehicleID=args.rows + 1)
+
+    def legacy_add():
+        fresh = rows + [new_row]  # what refresh_vehicle_list re-fetched
+        fresh.sort(key=sort_key(column), reverse=model.sort_reverse)
+        return fresh
+
+    legacy_time, legacy_rows = timed(legacy_add)
+    model_time, _ = timed(lambda: model.upsert(new_row))
+    assert [sort_key(column)(r) for r in legacy_rows] == [r[column] for r in model.rows]
+    print(f"  add one vehicle          legacy {legacy_time * 1000:8.1f} ms   model {model_time * 1000:8.3f} ms"
+          " (legacy excludes the DB re-fetch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compares the old Python-loop usage report with the rollup and grouped SQL versions.
+
+Seeds a temporary database, then times the old loop, the rollup read behind
+the unfiltered report and the grouped scan used for date-filtered reports,
+and checks that the old loop and the rollup agree on every vehicle. Counts must match exactly. Hours and distance
+must match to 1e-9 relative, since the two paths sum floats in different
+orders. The "D days, H hours" text is compared too; the only differences
+allowed there are totals the old loop's float drift left just below a whole
+hour (e.g. 12166.999999999998 rendered as 22 hours instead of 23).
+
+    python benchmarks/bench_usage_report.py [--vehicles 500] [--reservations 200000]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["RENTAL_DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="rental_usage_"), "usage.db")
+os.environ["RENTAL_DB_PROFILE"] = "bulk-load"
+
+import db  # noqa: E402
+
+
+def legacy_usage_report():
+    """get_vehicle_usage_report as it was before the aggregation moved into SQL."""
+    with db.get_manager().connection() as conn:
+        all_vehicles = conn.execute("SELECT VehicleID, brand, model, plate FROM Vehicle").fetchall()
+        usage_data = {}
+        for vid, brand, model, plate in all_vehicles:
+            usage_data[vid] = {'vehicle_id': vid, 'plate': plate, 'brand': brand, 'model': model,
+                               'usage_hours': 0.0, 'reservation_count': 0, 'total_distance_km': 0.0}
+        reservation_rows = conn.execute("""
+        SELECT r.vehicle_id, r.start_datetime, r.end_datetime, r.distance_km
+        FROM Reservation r WHERE r.status IN ('active', 'returned')
+        """).fetchall()
+
+    for vid, start_dt_iso, end_dt_iso, distance_km in reservation_rows:
+        if vid in usage_data:
+            try:
+                duration = datetime.fromisoformat(end_dt_iso) - datetime.fromisoformat(start_dt_iso)
+                usage_data[vid]['usage_hours'] += duration.total_seconds() / 3600.0
+                usage_data[vid]['reservation_count'] += 1
+                usage_data[vid]['total_distance_km'] += distance_km or 0.0
+            except Exception:
+                continue
+    return list(usage_data.values())
+
+
+def seed(vehicles, reservations):
+    rng = random.Random(42)
+    base = datetime(2020, 1, 1)
+    with db.get_manager().transaction() as conn:
+        conn.executemany(
+            "INSERT INTO Vehicle (brand, model, year, plate, vtype, daily_rate) VALUES (?, ?, ?, ?, ?, ?)",
+            [("Brand", f"Model{i % 17}", 2015 + i % 10, f"USAGE-{i}", ("Sedan", "SUV", "Van")[i % 3], 1000.0)
+             for i in range(vehicles)])
+        conn.execute("INSERT INTO Customer (name, email, drivers_license) VALUES ('Bench', 'b@x', 'B')")
+        rows = []
+        for _ in range(reservations):
+            start = base + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 4))
+            end = start + timedelta(minutes=rng.randint(30, 60 * 24 * 14))
+            rows.append((rng.randint(1, vehicles), 1, start.isoformat(), end.isoformat(),
+                         rng.choice(("active", "returned", "returned", "cancelled")),
+                         round(rng.uniform(0, 900), 1), "Manila"))
+        conn.executemany("""
+        INSERT INTO Reservation (vehicle_id, customer_id, start_datetime, end_datetime, status, distance_km, location)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+
+
+def display(hours):
+    return f"{int(hours // 24)} days, {int(hours % 24)} hours"
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=500)
+    parser.add_argument("--reservations", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db.init_db()
+    seed(args.vehicles, args.reservations)
+
+    old, old_s = timed(legacy_usage_report, args.repeat)
+    new, new_s = timed(db.get_vehicle_usage_report, args.repeat)
+    # A start bound that matches everything forces the grouped scan over Reservation.
+    _, scan_s = timed(lambda: db.get_vehicle_usage_report(start_iso="0000"), args.repeat)
+
+    old_by_id = {row['vehicle_id']: row for row in old}
+    mismatches = 0
+    drift_fixed = 0
+    for row in new:
+        ref = old_by_id.pop(row['vehicle_id'])
+        if (row['reservation_count'] != ref['reservation_count']
+                or not math.isclose(row['usage_hours'], ref['usage_hours'], rel_tol=1e-9, abs_tol=1e-9)
+                or not math.isclose(row['total_distance_km'], ref['total_distance_km'], rel_tol=1e-9, abs_tol=1e-9)
+                or (row['plate'], row['brand'], row['model']) != (ref['plate'], ref['brand'], ref['model'])):
+            mismatches += 1
+        elif display(row['usage_hours']) != display(ref['usage_hours']):
+            if row['usage_hours'] != round(row['usage_hours']):
+                mismatches += 1
+            else:
+                drift_fixed += 1
+    mismatches += len(old_by_id)
+
+    print(f"vehicles={args.vehicles} reservations={args.reservations}")
+    print(f"python loop : {old_s * 1000:8.1f} ms")
+    print(f"grouped SQL : {scan_s * 1000:8.1f} ms  ({old_s / scan_s:.1f}x)")
+    print(f"rollup read : {new_s * 1000:8.1f} ms  ({old_s / new_s:.1f}x)")
+    print(f"display differences from legacy float drift: {drift_fixed}")
+    print(f"mismatched vehicles: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Render time and memory of VirtualTable at 100, 10k and 100k rows.
+
+For each size this fills a VirtualTable with vehicle-like rows, then
+reports four things: the time to the first drawn frame, the time for a
+sort click (re-sort, set_rows, redraw), how many widgets exist, and
+the growth in resident memory. Sizes up to --legacy-max are also rendered
+the old way, with one CTkLabel per cell in a CTkScrollableFrame, for
+comparison. Needs a display (on a headless box run it under xvfb-run).
+
+    python benchmarks/bench_virtual_table.py [--sizes 100 10000 100000] [--legacy-max 1000]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import customtkinter as ctk  # noqa: E402
+from tabs.virtual_table import ROW_COLORS, VirtualTable  # noqa: E402
+
+COLUMNS = [
+    ("ID", 'VehicleID', 1, "w", lambda row: f"{row['VehicleID']}"),
+    ("Brand/Model", 'model', 4, "w", lambda row: f"{row['brand']} {row['model']}"),
+    ("Year", 'year', 1, "center", lambda row: f"{row['year']}"),
+    ("Plate", 'plate', 2, "w", lambda row: f"{row['plate']}"),
+    ("Type", 'vtype', 2, "w", lambda row: f"{row['vtype']}"),
+    ("Rate/day", 'daily_rate', 2, "e", lambda row: f"₱{row['daily_rate']:.2f}"),
+]
+
+
+def make_rows(count):
+    brands = ("Toyota", "Honda", "Ford", "Nissan", "Mitsubishi")
+    types = ("Sedan", "SUV", "Van", "Pickup")
+    return [{'VehicleID': i, 'brand': brands[i % 5], 'model': f"Model {i % 37}", 'year': 2010 + i % 15,
+             'plate': f"BEN-{i:06d}", 'vtype': types[i % 4], 'daily_rate': 1000.0 + (i * 7919) % 4000}
+            for i in range(count)]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return float("nan")
+
+
+def widget_count(widget):
+    return 1 + sum(widget_count(child) for child in widget.winfo_children())
+
+
+def render_legacy(frame, rows):
+    """The pre-VirtualTable approach: destroy everything, then one label per cell."""
+    for widget in frame.winfo_children():
+        widget.destroy()
+    for i, row in enumerate(rows):
+        color = ROW_COLORS[i % 2]
+        for col, (_, _, _, anchor, formatter) in enumerate(COLUMNS):
+            ctk.CTkLabel(frame, text=formatter(row), anchor=anchor, fg_color=color).grid(
+                row=i, column=col, sticky="ew", padx=2, pady=1)
+
+
+def measure(root, rows, legacy):
+    gc.collect()
+    rss_before = rss_mb()
+    container = ctk.CTkFrame(root, width=900, height=600)
+    container.pack(fill="both", expand=True)
+    started = time.perf_counter()
+    if legacy:
+        table = ctk.CTkScrollableFrame(container)
+        table.pack(fill="both", expand=True)
+        render_legacy(table, rows)
+    else:
+        table = VirtualTable(container, COLUMNS)
+        table.pack(fill="both", expand=True)
+        table.set_rows(rows)
+    root.update()
+    first_frame = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows.sort(key=lambda row: row['daily_rate'])
+    if legacy:
+        render_legacy(table, rows)
+    else:
+        table.set_rows(rows)
+    root.update()
+    sort_click = time.perf_counter() - started
+
+    widgets = widget_count(container)
+    rss_growth = rss_mb() - rss_before
+    container.destroy()
+    root.update()
+    return first_frame, sort_click, widgets, rss_growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=1000,
+                        help="largest size also rendered the old way (it is very slow)")
+    args = parser.parse_args()
+
+    try:
+        root = ctk.CTk()
+    except Exception as e:
+        print(f"Cannot open a window ({e}); run this under a display or xvfb-run.")
+        sys.exit(2)
+    root.geometry("1000x700")
+    root.update()
+
+    print(f"{'rows':>8} {'table':>8} {'first frame':>12} {'sort click':>11} {'widgets':>8} {'RSS +MB':>8}")
+    for size in args.sizes:
+        variants = [("virtual", False)] + ([("legacy", True)] if size <= args.legacy_max else [])
+        for name, legacy in variants:
+            first_frame, sort_click, widgets, rss_growth = measure(root, make_rows(size), legacy)
+            print(f"{size:>8} {name:>8} {first_frame * 1000:>10.1f}ms {sort_click * 1000:>9.1f}ms "
+                  f"{widgets:>8} {rss_growth:>8.1f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Fails unless api_server.py answers bad pickup/return times with 400 and books nothing.
+
+Runs requests straight through api_server.dispatch against a temporary
+database: bookings, availability searches, quotes and extensions whose
+return is at or before the pickup, or whose times are not ISO 8601. Each
+must get a 400, and the vehicle must still be free afterwards. A valid
+booking and extension must still succeed, and a quote with "driver":
+"false" must not charge the driver fee. Bookings, extensions and
+maintenance that clash with the valid booking must get a 409.
+
+    python benchmarks/check_api_validation.py
+"""
+import json
+import os
+import sys
+import tempfile
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["RENTAL_DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="rental_api_checks_"), "api.db")
+
+import api_server  # noqa: E402
+import db  # noqa: E402
+from rental_system import VehicleRentalService  # noqa: E402
+
+CUSTOMER = {"name": "Check Client", "phone": "0917", "email": "check@example.com", "location": "Cebu"}
+
+
+def call(service, method, target, body=None):
+    url = urlsplit(target)
+    request = api_server.Request(method, url.path, dict(parse_qsl(url.query)),
+                                 json.dumps(body).encode() if body is not None else b"", True)
+    return api_server.dispatch(service, request)
+
+
+def booking(start, end):
+    return dict(CUSTOMER, vehicle_id=1, start=start, end=end)
+
+
+def quote(start, end, driver=False):
+    return {"vehicle_ids": [1, 1], "start": start, "end": end, "driver": driver}
+
+
+def main():
+    db.init_db()
+    db.add_vehicle("Toyota", "Vios", 2020, "CHECK-1", "Sedan", 1500)
+    service = VehicleRentalService()
+    rejected = [
+        ("POST", "/reservations", booking("2030-01-05T10:00", "2030-01-01T10:00")),
+        ("POST", "/reservations", booking("2030-01-01T10:00", "2030-01-01T10:00")),
+        ("POST", "/reservations", booking("next monday", "2030-01-03T10:00")),
+        ("POST", "/reservations", booking(20300101, "2030-01-03T10:00")),
+        ("POST", "/reservations", booking("2030-01-01T10:00+08:00", "2030-01-03T10:00")),
+        ("GET", "/availability?start=2030-01-05T10:00&end=2030-01-01T10:00", None),
+        ("GET", "/availability?start=2030-01-01&end=soon", None),
+        ("POST", "/quotes", quote("2030-01-05T10:00", "2030-01-01T10:00")),
+        ("POST", "/quotes", quote(["2030-01-01T10:00", "2030-01-05T10:00"], "2030-01-03T10:00")),
+        ("POST", "/quotes", quote("2030-01-01T10:00+08:00", "2030-01-03T10:00")),
+        ("POST", "/quotes", quote("2030-01-01T10:00", ["2030-01-03T10:00", "2030-01-03T10:00Z"])),
+    ]
+    failures = []
+    for method, target, body in rejected:
+        status, payload = call(service, method, target, body)
+        if status != 400:
+            failures.append(f"{method} {target} {body or ''} -> {status} {payload}")
+    if not db.is_vehicle_available(1, "2029-12-01T00:00:00", "2030-02-01T00:00:00"):
+        failures.append("a rejected booking still holds the vehicle")
+
+    for driver, charged in (("false", [False, False]), ("true", [True, True]), (["false", "yes"], [False, True])):
+        status, quotes = call(service, "POST", "/quotes", quote("2030-01-01T10:00", "2030-01-03T10:00", driver))
+        if status != 200 or [q["driver_fee"] > 0 for q in quotes] != charged:
+            failures.append(f"quote with driver={driver!r} -> {status} {quotes}")
+
+    status, created = call(service, "POST", "/reservations", booking("2030-01-01T10:00", "2030-01-03T10:00"))
+    if status != 201:
+        failures.append(f"valid booking -> {status} {created}")
+    else:
+        extend = f"/reservations/{created['ReservationID']}/extend"
+        for end in ("2030-01-01T09:00", "2030-01-01T10:00", "later"):
+            status, payload = call(service, "POST", extend, {"end": end})
+            if status != 400:
+                failures.append(f"extend to {end!r} -> {status} {payload}")
+        status, payload = call(service, "POST", extend, {"end": "2030-01-04T10:00"})
+        if status != 200:
+            failures.append(f"valid extension -> {status} {payload}")
+
+        status, payload = call(service, "POST", "/reservations", booking("2030-01-05T10:00", "2030-01-06T10:00"))
+        if status != 201:
+            failures.append(f"booking after the extension -> {status} {payload}")
+        clashes = [
+            ("POST", "/reservations", booking("2030-01-02T10:00", "2030-01-05T10:00")),
+            ("POST", extend, {"end": "2030-01-06T10:00"}),
+            ("POST", "/maintenance", {"vehicle_id": 1}),
+        ]
+        for method, target, body in clashes:
+            status, payload = call(service, method, target, body)
+            if status != 409:
+                failures.append(f"{method} {target} {body} -> {status} {payload}, expected 409")
+    db.close_connections()
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print(f"OK: {len(rejected) + 3} bad time windows rejected with 400; valid booking, extension and quotes accepted;"
+          " clashes answered with 409.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Fails if the availability index misses a commit made by another process.
+
+Seeds a small database, loads the index, and then has a second, raw
+sqlite3 connection commit a booking at the worst moments for this
+process's own writes:
+
+  * right after this process's COMMIT, before its index delta is applied;
+  * before this process's write, with no query in between to notice it.
+
+Each time the index must end up agreeing with SQL. A write of this
+process's own, with nobody else committing, must not force a reload.
+
+    python benchmarks/check_index_sync.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["RENTAL_DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="rental_index_sync_"), "sync.db")
+
+import db  # noqa: E402
+
+WINDOWS = [("2030-01-0%dT10:00:00" % day, "2030-01-0%dT10:00:00" % (day + 1)) for day in range(1, 9, 2)]
+
+
+def seed():
+    db.init_db()
+    for i in range(1, 5):
+        db.add_vehicle("Toyota", "Vios", 2020, f"SYNC-{i}", "Sedan", 1500)
+    with db.get_manager().transaction() as conn:
+        conn.execute("INSERT INTO Customer (name, email, drivers_license) VALUES ('Sync', 'sync@example.com', 'SYNC-LIC')")
+
+
+def other_process_books(vehicle_id, window):
+    conn = sqlite3.connect(db.DB_FILE)
+    with conn:
+        conn.execute("""
+        INSERT INTO Reservation (vehicle_id, customer_id, driver_flag, start_datetime, end_datetime, location, status)
+        VALUES (?, 1, 0, ?, ?, 'Cebu', 'active')""", (vehicle_id, *window))
+    conn.close()
+
+
+def main():
+    seed()
+    index = db.get_availability_index()
+    loads = []
+    load = index.load
+    index.load = lambda conn: (loads.append(1), load(conn))
+    failures = []
+
+    def check(case, vehicle_id, window, available):
+        if db.is_vehicle_available(vehicle_id, *window) != available:
+            failures.append(f"{case}: vehicle {vehicle_id} {window} should be {'free' if available else 'booked'}")
+        failures.extend(f"{case}: {problem}" for problem in db.verify_availability_index())
+
+    db.create_reservation(1, 1, 0, *WINDOWS[0], "Cebu")
+    check("own booking", 1, WINDOWS[0], False)
+    if loads:
+        failures.append(f"own booking: reloaded the index {len(loads)} time(s) instead of applying the delta")
+
+    # after_commit callbacks run in order, so this commit lands between ours and our index delta.
+    with db.get_manager().transaction():
+        db.get_manager().after_commit(lambda: other_process_books(2, WINDOWS[1]))
+        db.create_reservation(1, 1, 0, *WINDOWS[1], "Cebu")
+    check("commit between ours and our delta", 2, WINDOWS[1], False)
+    check("commit between ours and our delta", 1, WINDOWS[1], False)
+
+    other_process_books(3, WINDOWS[2])
+    db.create_reservation(1, 1, 0, *WINDOWS[2], "Cebu")
+    check("commit before ours", 3, WINDOWS[2], False)
+
+    other_process_books(2, WINDOWS[3])
+    db.start_maintenance(4, "Oil Change", 500, "")
+    check("commit before a maintenance block", 2, WINDOWS[3], False)
+    check("commit before a maintenance block", 4, WINDOWS[3], False)
+    db.close_connections()
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print("OK: the availability index picks up other processes' commits around its own writes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Fails if paging any listing, in any sort order, skips or repeats a row.
+
+Seeds a small database where every nullable sort column has NULLs, then
+follows next_cursor through the vehicle, active reservation and active
+maintenance listings, for every sort, ascending and descending, two rows
+a page. Each walk must return every row once, in the order of the
+unpaged listing.
+
+    python benchmarks/check_paging.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["RENTAL_DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="rental_paging_"), "paging.db")
+
+import db  # noqa: E402
+
+PAGE = 2
+
+
+def seed():
+    db.init_db()
+    with db.get_manager().transaction() as conn:
+        # Every other value NULL, including plate, which is UNIQUE but not NOT NULL.
+        conn.executemany("INSERT INTO Vehicle (brand, model, year, plate, vtype, daily_rate) VALUES (?, ?, ?, ?, ?, ?)",
+                         [(None if i % 2 else "Toyota", None if i % 3 else f"Model {i % 4}", None if i % 2 else 2020 + i % 3,
+                           None if i % 4 == 1 else f"PG-{i}", None if i % 3 == 1 else "Sedan",
+                           None if i % 2 else 1000.0 + i % 3) for i in range(9)])
+        conn.executemany("INSERT INTO Customer (name, email, drivers_license) VALUES (?, ?, ?)",
+                         [(None if i % 2 else f"Customer {i % 3}", f"pg{i}@example.com", f"PG-LIC-{i}") for i in range(9)])
+        conn.executemany("""
+        INSERT INTO Reservation (vehicle_id, customer_id, driver_flag, start_datetime, end_datetime, location, status)
+        VALUES (?, ?, 0, ?, ?, ?, 'active')""",
+                         [(i + 1, i + 1, f"2030-01-0{1 + i % 3}T09:00:00", f"2030-01-0{5 + i % 2}T09:00:00",
+                           None if i % 2 else "Cebu") for i in range(9)])
+        conn.executemany("""
+        INSERT INTO Maintenance (vehicle_id, checklist, cost, start_date, notes, status)
+        VALUES (?, 'Oil Change', ?, ?, '', 'active')""",
+                         [(i + 1, None if i % 2 else 500.0 * (i % 3), None if i % 3 else "2030-01-01T09:00:00")
+                          for i in range(9)])
+
+
+def walk(list_page, sort, descending):
+    rows, cursor = list_page(sort, descending, None, PAGE)
+    pages = 1
+    while cursor is not None and pages <= 100:
+        page, cursor = list_page(sort, descending, cursor, PAGE)
+        rows += page
+        pages += 1
+    return rows
+
+
+def main():
+    seed()
+    listings = {
+        "vehicles": (db.get_vehicles_page, db.VEHICLE_SORTS),
+        "active reservations": (db.list_active_reservations_page, db.RESERVATION_SORTS),
+        "active maintenance": (db.get_active_maintenance_page, db.MAINTENANCE_SORTS),
+    }
+    failures = []
+    for name, (list_page, sorts) in listings.items():
+        for sort in sorts:
+            for descending in (False, True):
+                expected = list_page(sort, descending, None, db.MAX_PAGE_SIZE)[0]
+                paged = walk(list_page, sort, descending)
+                if paged != expected:
+                    failures.append(f"{name} by {sort}{' desc' if descending else ''}: "
+                                    f"{len(paged)} of {len(expected)} rows")
+    db.close_connections()
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print("OK: every listing pages through all of its rows in every sort order.")
+
+
+if __name__ == "__main__":
+    main()
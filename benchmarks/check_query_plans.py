@@ -0,0 +1,105 @@
+"""Fails if any hot db.py query falls back to a full-table SCAN.
+
+Runs each hot-path function against a small seeded database and records
+every statement it issues through a trace callback. It then runs EXPLAIN
+QUERY PLAN on each SELECT/UPDATE/DELETE. A scan is accepted only when it
+walks a partial index, which holds active rows and nothing else.
+
+    python benchmarks/check_query_plans.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["RENTAL_DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="rental_plans_"), "plans.db")
+
+import db  # noqa: E402
+
+
+def seed():
+    db.init_db()
+    db.add_vehicle("Toyota", "Vios", 2020, "PLAN-1", "Sedan", 1500)
+    db.add_vehicle("Honda", "City", 2021, "PLAN-2", "Sedan", 1700)
+    cid = db.find_or_create_customer("Plan", "0917", "plan@example.com", "PLAN-LIC")
+    rid, _ = db.create_reservation(1, cid, False, "2030-01-01T09:00:00", "2030-01-03T09:00:00", "Manila")
+    db.add_damage(rid, "Scratch", 100.0, "rear bumper")
+    # Loading the availability index and vehicle catalog reads every vehicle once by
+    # design; keep it out of the trace.
+    db.get_availability_index()
+    db.get_vehicle_catalog()
+    return cid, rid
+
+
+def hot_calls(cid, rid):
+    """(name, callable) pairs for every query on a booking/return/maintenance path."""
+    return [
+        ("is_vehicle_available", lambda: db.is_vehicle_available(1, "2030-01-02T00:00:00", "2030-01-04T00:00:00")),
+        ("is_vehicle_available(exclude)", lambda: db.is_vehicle_available(1, "2030-01-02T00:00:00", "2030-01-04T00:00:00", exclude_res_id=rid)),
+        ("get_bookings_for_date", lambda: db.get_bookings_for_date("2030-01-02T00:00:00", "2030-01-03T00:00:00")),
+        ("list_active_reservations", db.list_active_reservations),
+        ("get_active_reservations_dates", db.get_active_reservations_dates),
+        ("get_daily_booking_counts", lambda: db.get_daily_booking_counts("2029-12-30", "2030-02-09")),
+        ("get_reservation_details", lambda: db.get_reservation_details(rid)),
+        ("get_damage_contracts", lambda: db.get_damage_contracts(rid)),
+        ("get_final_costs", lambda: db.get_final_costs(rid)),
+        ("get_brands_by_type", lambda: db.get_brands_by_type("Sedan")),
+        ("get_years_by_type_and_brand", lambda: db.get_years_by_type_and_brand("Sedan", "Toyota")),
+        ("get_models_by_type_brand_and_year", lambda: db.get_models_by_type_brand_and_year("Sedan", "Toyota", 2020)),
+        ("get_available_vehicles_by_model", lambda: db.get_available_vehicles_by_model("Sedan", "Toyota", 2020, "Vios")),
+        ("find_or_create_customer(existing)", lambda: db.find_or_create_customer("Plan", "0917", "plan@example.com", "PLAN-LIC")),
+        ("update_reservation_end_date", lambda: db.update_reservation_end_date(rid, "2030-01-04T09:00:00")),
+        ("start_maintenance", lambda: db.start_maintenance(2, "Oil Change", 0.0, "")),
+        ("get_active_maintenance", db.get_active_maintenance),
+        ("finalize_reservation", lambda: db.finalize_reservation(rid, 1000.0, 10.0)),
+        ("get_fleet_status", db.get_fleet_status),
+    ]
+
+
+def partial_indexes(conn):
+    rows = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='index' AND sql IS NOT NULL").fetchall()
+    return {name for name, sql in rows if " WHERE " in sql.upper()}
+
+
+def full_scans(conn, statement, allowed):
+    """Returns the plan lines of `statement` that scan a table or a non-partial index."""
+    bad = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + statement):
+        detail = row[3]
+        if not detail.startswith("SCAN "):
+            continue
+        if " INDEX " in detail and detail.rsplit(" ", 1)[-1] in allowed:
+            continue
+        bad.append(detail)
+    return bad
+
+
+def main():
+    cid, rid = seed()
+    failures = []
+
+    with db.get_manager().connection() as conn:
+        allowed = partial_indexes(conn)
+        for name, call in hot_calls(cid, rid):
+            statements = []
+            conn.set_trace_callback(statements.append)
+            try:
+                call()
+            finally:
+                conn.set_trace_callback(None)
+
+            for statement in statements:
+                if statement.lstrip().split(None, 1)[0].upper() not in ("SELECT", "UPDATE", "DELETE"):
+                    continue
+                for detail in full_scans(conn, statement, allowed):
+                    failures.append((name, detail, " ".join(statement.split())))
+
+    if failures:
+        for name, detail, statement in failures:
+            print(f"FAIL {name}: {detail}\n     {statement}")
+        sys.exit(1)
+    print("OK: no hot query falls back to a full scan.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Deterministic synthetic dataset: fills a new database with a fleet and its rental history.
+
+The same arguments and --seed always produce the same rows. Data is
+generated relative to a fixed "now" (NOW below), not the clock.
+
+- Vehicles come from a small per-type catalog with realistic rates.
+  About 3% are in the workshop (active maintenance, unavailable).
+- Customers have unique emails. About one in ten has no driver's
+  license. A few repeat customers account for many bookings.
+- Bookings on one vehicle never overlap, but bookings across the fleet
+  overlap freely. Lengths are log-normal, from a few hours to a couple
+  of weeks. Bookings that ended before NOW are returned (a few are
+  overdue and still active); later ones are active.
+- Returned bookings have a distance and a paid Payment. About 6% have
+  damage contracts, which are added to the final cost just as
+  finalize_return does. Active bookings have a pending estimate.
+- Vehicles also get a few completed maintenance jobs.
+
+The rollup triggers fill the report tables as rows go in.
+
+    python benchmarks/generate_dataset.py OUTPUT.db --reservations 100000 [--vehicles N] [--customers N] [--seed 1]
+"""
+import argparse
+import heapq
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import db  # noqa: E402
+import migrations  # noqa: E402
+
+NOW = datetime(2025, 6, 1, 9, 0)
+HISTORY_START = datetime(2021, 1, 1, 7, 0)
+FUTURE_DAYS = 90  # bookings keep being generated this far past NOW
+BATCH = 10000
+
+CATALOG = {  # vtype: (weight, (rate low, rate high), [(brand, model), ...])
+    "Sedan": (40, (1200, 2200), [("Toyota", "Vios"), ("Honda", "City"), ("Nissan", "Almera"), ("Mitsubishi", "Mirage G4")]),
+    "Hatchback": (15, (1000, 1800), [("Toyota", "Wigo"), ("Suzuki", "Swift"), ("Honda", "Brio")]),
+    "SUV": (25, (2500, 4500), [("Toyota", "Fortuner"), ("Mitsubishi", "Montero Sport"), ("Ford", "Everest"), ("Nissan", "Terra")]),
+    "Van": (12, (3000, 5500), [("Toyota", "Hiace"), ("Nissan", "Urvan"), ("Hyundai", "Staria")]),
+    "Pickup": (8, (2200, 3800), [("Toyota", "Hilux"), ("Ford", "Ranger"), ("Isuzu", "D-Max")]),
+}
+LOCATIONS = [("Cebu", 30), ("Manila", 28), ("Davao", 12), ("Iloilo", 8), ("Bacolod", 6), ("Cagayan de Oro", 6),
+             ("Baguio", 5), ("Tagbilaran", 5)]
+FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Mark", "Grace", "Paolo", "Kristine", "Miguel", "Angela",
+               "Carlo", "Bea", "Rafael", "Joy", "Luis", "Camille"]
+LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Flores", "Villanueva",
+              "Ramos", "Aquino", "Castillo", "Dela Cruz", "Navarro"]
+DAMAGES = [("Scratch", 500, 3000), ("Dent", 2000, 8000), ("Broken side mirror", 3000, 6000),
+           ("Interior stain", 800, 2500), ("Cracked windshield", 6000, 15000)]
+CHECKLISTS = ["Oil change", "Oil change, Tire rotation", "Brake pads", "Aircon cleaning", "Battery, Fluids",
+              "Tire rotation, Alignment"]
+
+
+def default_counts(reservations):
+    """(vehicles, customers) scaled to a reservation count, about 100 bookings per vehicle over the history."""
+    return max(20, reservations // 100), max(10, reservations // 4)
+
+
+def plate(i):
+    letters = "".join(chr(65 + (i // 26 ** k) % 26) for k in range(3))
+    return f"{letters} {1000 + i // 26 ** 3}"
+
+
+def weighted(rng, options):
+    return rng.choices([value for value, _ in options], [weight for _, weight in options])[0]
+
+
+def make_vehicles(rng, count):
+    types = [(vtype, spec[0]) for vtype, spec in CATALOG.items()]
+    rows = []
+    for i in range(count):
+        vtype = weighted(rng, types)
+        _, (low, high), models = CATALOG[vtype]
+        brand, model = rng.choice(models)
+        rate = round(rng.uniform(low, high) / 50) * 50
+        rows.append((i + 1, brand, model, rng.randint(2015, 2025), plate(i), vtype, float(rate)))
+    return rows
+
+
+def make_customers(rng, count):
+    rows = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        license = None if rng.random() < 0.1 else f"N{i % 100:02d}-{i:08d}"
+        email = f"{first}.{last}.{i}@example.com".lower().replace(" ", "")
+        phone = f"09{rng.randint(100000000, 999999999)}"
+        rows.append((i + 1, f"{first} {last}", email, phone, license, "N/A") + migrations.customer_keys(email, license, phone))
+    return rows
+
+
+def iter_bookings(rng, vehicles, reservations):
+    """Yields (vehicle row, start, end) in start order, exactly `reservations` of them."""
+    span_hours = (NOW + timedelta(days=FUTURE_DAYS) - HISTORY_START).total_seconds() / 3600
+    slot_hours = span_hours * len(vehicles) / reservations  # average hours between starts on one vehicle
+    mean_hours = min(72.0, slot_hours * 0.6)
+    sigma = 0.8
+    mu = math.log(mean_hours) - sigma * sigma / 2
+    mean_gap = slot_hours - mean_hours
+
+    def next_booking(vehicle, free_at):
+        start = free_at + timedelta(hours=int(rng.expovariate(1 / mean_gap)) + 1)
+        hours = min(24 * 21, max(4, int(rng.lognormvariate(mu, sigma))))
+        return start, start + timedelta(hours=hours)
+
+    heap = []
+    for vehicle in vehicles:
+        start, end = next_booking(vehicle, HISTORY_START)
+        heap.append((start, vehicle[0], end, vehicle))
+    heapq.heapify(heap)
+    for _ in range(reservations):
+        start, _, end, vehicle = heap[0]
+        yield vehicle, start, end
+        next_start, next_end = next_booking(vehicle, end)
+        heapq.heapreplace(heap, (next_start, vehicle[0], next_end, vehicle))
+
+
+def generate(db_file, reservations, vehicles=None, customers=None, seed=1):
+    """Creates db_file (which must not exist) and fills it; returns a dict of row counts."""
+    if os.path.exists(db_file):
+        raise FileExistsError(f"{db_file} already exists.")
+    default_vehicles, default_customers = default_counts(reservations)
+    vehicles = vehicles or default_vehicles
+    customers = customers or default_customers
+    rng = random.Random(seed)
+
+    previous = db.DB_FILE, db.DB_PROFILE
+    db.close_connections()
+    db.DB_FILE = db_file
+    db.set_storage_profile("bulk-load")
+    try:
+        db.init_db()
+        counts = _fill(rng, reservations, vehicles, customers)
+        with db.get_manager().connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("ANALYZE")
+    finally:
+        db.close_connections()
+        db.DB_FILE, db.DB_PROFILE = previous
+    return counts
+
+
+def _fill(rng, reservations, vehicle_count, customer_count):
+    vehicles = make_vehicles(rng, vehicle_count)
+    counts = {"vehicles": vehicle_count, "customers": customer_count, "reservations": reservations,
+              "active": 0, "damage_contracts": 0, "maintenance": 0}
+    with db.get_manager().transaction() as conn:
+        conn.executemany("INSERT INTO Vehicle (VehicleID, brand, model, year, plate, vtype, daily_rate) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)", vehicles)
+        conn.executemany("INSERT INTO Customer (CustomerID, name, email, phone, drivers_license, government_id, "
+                         "email_key, license_key, phone_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         make_customers(rng, customer_count))
+
+    locations = LOCATIONS
+    busy = set()  # vehicles with an active booking; they are not sent to the workshop
+    res_rows, payment_rows, damage_rows = [], [], []
+
+    def flush():
+        with db.get_manager().transaction() as conn:
+            conn.executemany("""
+            INSERT INTO Reservation (ReservationID, vehicle_id, customer_id, driver_flag, start_datetime, end_datetime,
+                                     location, driver_fee, total_cost, status, distance_km)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", res_rows)
+            conn.executemany("INSERT INTO Payment (reservation_id, amount, status, method, frequency, created_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", payment_rows)
+            conn.executemany("INSERT INTO DamageContract (reservation_id, condition, damage_cost, notes, created_at) "
+                             "VALUES (?, ?, ?, ?, ?)", damage_rows)
+        res_rows.clear()
+        payment_rows.clear()
+        damage_rows.clear()
+
+    for rid, (vehicle, start, end) in enumerate(iter_bookings(rng, vehicles, reservations), 1):
+        vid, rate = vehicle[0], vehicle[6]
+        customer = 1 + int(customer_count * rng.random() ** 2)  # low ids are the regulars
+        driver = rng.random() < 0.15
+        start_iso, end_iso = start.isoformat(), end.isoformat()
+        days = db.billable_days(start_iso, end_iso)
+        driver_fee = db.DRIVER_FEE_PER_DAY * days if driver else 0.0
+        total = rate * days + driver_fee
+        location = weighted(rng, locations)
+
+        if end <= NOW and rng.random() > 0.002:
+            status = "returned"
+            distance = round(days * rng.uniform(30, 250), 1)
+            if rng.random() < 0.06:
+                condition, low, high = rng.choice(DAMAGES)
+                cost = float(round(rng.uniform(low, high), -1))
+                damage_rows.append((rid, condition, cost, "", end_iso))
+                total += cost
+                counts["damage_contracts"] += 1
+            payment_rows.append((rid, total, "paid", "Finalized", "Daily", end_iso))
+        else:
+            status = "active"
+            distance = 0.0
+            busy.add(vid)
+            counts["active"] += 1
+            payment_rows.append((rid, total, "pending", "Estimate", "Daily", (start - timedelta(days=2)).isoformat()))
+        res_rows.append((rid, vid, customer, int(driver), start_iso, end_iso, location, driver_fee, total, status, distance))
+        if len(res_rows) >= BATCH:
+            flush()
+    flush()
+
+    maintenance_rows = []
+    history_hours = int((NOW - HISTORY_START).total_seconds() // 3600)
+    for vid, *_ in vehicles:
+        for _ in range(rng.randint(0, 3)):
+            started = HISTORY_START + timedelta(hours=rng.randint(0, history_hours))
+            finished = started + timedelta(hours=rng.randint(4, 96))
+            maintenance_rows.append((vid, rng.choice(CHECKLISTS), float(rng.randint(15, 120) * 100),
+                                     started.isoformat(), finished.isoformat(), "", "completed"))
+    in_shop = [vid for vid, *_ in vehicles if vid not in busy and rng.random() < 0.03]
+    for vid in in_shop:
+        maintenance_rows.append((vid, rng.choice(CHECKLISTS), float(rng.randint(15, 120) * 100),
+                                 (NOW - timedelta(hours=rng.randint(2, 72))).isoformat(), None, "", "active"))
+    counts["maintenance"] = len(maintenance_rows)
+    with db.get_manager().transaction() as conn:
+        conn.executemany("INSERT INTO Maintenance (vehicle_id, checklist, cost, start_date, end_date, notes, status) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)", maintenance_rows)
+        conn.executemany("UPDATE Vehicle SET available=0 WHERE VehicleID=?", [(vid,) for vid in in_shop])
+    return counts
+
+
+def parse_count(text):
+    """'1k' -> 1000, '1M' -> 1000000, '2500' -> 2500."""
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1:].lower(), 1)
+    return int(float(text[:-1] if multiplier > 1 else text) * multiplier)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="database file to create")
+    parser.add_argument("--reservations", type=parse_count, default=100000, help="e.g. 1000, 100k, 1M")
+    parser.add_argument("--vehicles", type=parse_count, default=None, help="default: reservations / 100")
+    parser.add_argument("--customers", type=parse_count, default=None, help="default: reservations / 4")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--force", action="store_true", help="replace OUTPUT if it exists")
+    args = parser.parse_args()
+
+    if args.force:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.output + suffix):
+                os.remove(args.output + suffix)
+    started = time.perf_counter()
+    counts = generate(args.output, args.reservations, args.vehicles, args.customers, args.seed)
+    print(f"{args.output}: " + ", ".join(f"{value} {key.replace('_', ' ')}" for key, value in counts.items())
+          + f" in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
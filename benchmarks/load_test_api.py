@@ -0,0 +1,206 @@
+"""Load test for api_server.py: p50/p99 latency and requests/second under a mixed workload.
+
+By default it seeds a temporary database and starts api_server.py on a
+free local port in a child process. Pass --url to test a server that is
+already running. Clients hold keep-alive connections and pipeline up to
+--depth requests on each one. Latency is counted from when a request is
+written until its response has been read.
+
+The mix is mostly availability searches, plus usage reports,
+reservation lookups, the location report and new bookings (POST).
+Bookings that collide with an existing one get a 409, and that is
+expected. Any other status of 400 or above counts as an error, and the
+script then exits 1.
+
+    python benchmarks/load_test_api.py [--duration 10] [--connections 16] [--depth 8] [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+VTYPES = ("Sedan", "SUV", "Van")
+FAR_FUTURE = datetime(2030, 1, 1)
+
+
+def seed(db_file, vehicles, reservations):
+    os.environ["RENTAL_DB_FILE"] = db_file
+    import db
+    db.init_db()
+    rng = random.Random(17)
+    base = datetime(2024, 1, 1)
+    with db.get_manager().transaction() as conn:
+        conn.executemany(
+            "INSERT INTO Vehicle (brand, model, year, plate, vtype, daily_rate) VALUES (?, ?, ?, ?, ?, ?)",
+            [("Brand", f"Model{i % 13}", 2015 + i % 10, f"LOAD-{i}", VTYPES[i % 3], 1500.0) for i in range(vehicles)])
+        conn.execute("INSERT INTO Customer (name, email, drivers_license) VALUES ('Load', 'load@x', 'L')")
+        rows = []
+        for _ in range(reservations):
+            start = base + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 3))
+            end = start + timedelta(minutes=rng.randint(60, 60 * 24 * 10))
+            rows.append((rng.randint(1, vehicles), 1, start.isoformat(), end.isoformat(),
+                         rng.choice(("active", "returned", "returned")), round(rng.uniform(0, 500), 1),
+                         rng.choice(("Cebu", "Manila", "Davao"))))
+        conn.executemany("""
+        INSERT INTO Reservation (vehicle_id, customer_id, start_datetime, end_datetime, status, distance_km, location)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+    db.close_connections()
+
+
+def start_server(db_file, workers):
+    env = dict(os.environ, RENTAL_DB_FILE=db_file)
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "api_server.py"), "--port", "0", "--workers", str(workers)],
+                            cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if "listening on" not in line:
+        proc.kill()
+        raise RuntimeError(f"api_server.py did not start: {line!r}")
+    return proc, line.split("listening on ")[1].split()[0]
+
+
+class Workload:
+    """Picks the next request; returns (label, method, target, body bytes)."""
+
+    def __init__(self, rng, vehicles, reservations):
+        self.rng = rng
+        self.vehicles = vehicles
+        self.reservations = reservations
+
+    def next(self):
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.60:
+            start = datetime(2025, 1, 1) + timedelta(hours=rng.randint(0, 24 * 365))
+            query = {"start": start.isoformat(), "end": (start + timedelta(days=rng.randint(1, 5))).isoformat(),
+                     "vtype": rng.choice(VTYPES), "limit": 50}
+            return "availability", "GET", "/availability?" + urlencode(query), b""
+        if roll < 0.75:
+            start = datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 900))
+            query = {"start": start.date().isoformat(), "end": (start + timedelta(days=90)).date().isoformat()}
+            return "usage report", "GET", "/reports/usage?" + urlencode(query), b""
+        if roll < 0.85:
+            return "reservation", "GET", f"/reservations/{rng.randint(1, self.reservations)}", b""
+        if roll < 0.90:
+            return "location report", "GET", "/reports/locations", b""
+        start = FAR_FUTURE + timedelta(hours=rng.randint(0, 24 * 365))
+        body = {"vehicle_id": rng.randint(1, self.vehicles), "start": start.isoformat(),
+                "end": (start + timedelta(days=rng.randint(1, 4))).isoformat(),
+                "name": "Load Client", "phone": "0917", "email": "client@load.test", "location": "Cebu"}
+        return "booking", "POST", "/reservations", json.dumps(body).encode()
+
+
+def encode_request(method, target, host, body):
+    head = f"{method} {target} HTTP/1.1\r\nHost: {host}\r\n"
+    if method == "POST":
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    return head.encode() + b"\r\n" + body
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, workload, depth, deadline, samples):
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = deque()  # (label, send time) of requests awaiting a response, in order
+    while True:
+        now = time.perf_counter()
+        while now < deadline and len(sent) < depth:
+            label, method, target, body = workload.next()
+            writer.write(encode_request(method, target, host, body))
+            sent.append((label, now))
+        await writer.drain()
+        if not sent:
+            break
+        status = await read_response(reader)
+        label, started = sent.popleft()
+        samples.append((label, status, time.perf_counter() - started))
+    writer.close()
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run_load(url, args):
+    parts = urlsplit(url)
+    rng = random.Random(args.seed)
+    workload = Workload(rng, args.vehicles, args.reservations)
+    samples = []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(client(parts.hostname, parts.port, workload, args.depth, deadline, samples)
+                           for _ in range(args.connections)))
+    return samples, time.perf_counter() - started
+
+
+def report(samples, elapsed):
+    print(f"{len(samples)} requests in {elapsed:.2f} s: {len(samples) / elapsed:,.0f} req/s")
+    print(f"  {'request':16} {'count':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    by_label = {}
+    for label, _, latency in samples:
+        by_label.setdefault(label, []).append(latency)
+    for label, latencies in sorted(by_label.items(), key=lambda item: -len(item[1])) + [("all", [s[2] for s in samples])]:
+        latencies.sort()
+        print(f"  {label:16} {len(latencies):7} {percentile(latencies, 0.50) * 1000:8.2f} {percentile(latencies, 0.99) * 1000:8.2f}")
+    statuses = Counter(status for _, status, _ in samples)
+    print("  statuses: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    return sum(count for status, count in statuses.items() if status >= 400 and status != 409)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="test a running server instead of starting one, e.g. http://127.0.0.1:8080")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--depth", type=int, default=8, help="pipelined requests in flight per connection")
+    parser.add_argument("--workers", type=int, default=4, help="worker threads for the server this script starts")
+    parser.add_argument("--vehicles", type=int, default=500)
+    parser.add_argument("--reservations", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None:
+        db_file = os.path.join(tempfile.mkdtemp(prefix="rental_load_"), "load.db")
+        seed(db_file, args.vehicles, args.reservations)
+        proc, url = start_server(db_file, args.workers)
+    print(f"{url}: {args.connections} connections x {args.depth} pipelined, {args.duration:.0f} s")
+    try:
+        samples, elapsed = asyncio.run(run_load(url, args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    if not samples:
+        print("FAIL: no responses")
+        sys.exit(1)
+    errors = report(samples, elapsed)
+    if errors:
+        print(f"FAIL: {errors} error responses")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Multi-process booking stress test: proves no double-bookings and measures bookings/s.
+
+Several processes (each a "counter" with its own connection pool and
+group-commit writer) hammer a handful of vehicles with random, heavily
+overlapping windows through db.submit_booking. Afterwards every pair of active
+reservations on the same vehicle is checked for overlap. The exit status is
+non-zero if any pair overlaps.
+
+    python benchmarks/stress_bookings.py [--processes 4] [--threads 8] [--attempts 200]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+VEHICLES = 5
+
+
+def _import_db(db_file):
+    sys.path.insert(0, ROOT)
+    os.environ["RENTAL_DB_FILE"] = db_file
+    os.environ["RENTAL_DB_PROFILE"] = "multi-counter"
+    import db
+    return db
+
+
+def counter_process(db_file, worker, threads, attempts, results):
+    db = _import_db(db_file)
+    rng = random.Random(worker)
+    base = datetime(2030, 1, 1)
+
+    def attempt(n):
+        vehicle_id = rng.randint(1, VEHICLES)
+        start = base + timedelta(hours=rng.randint(0, 24 * 30))
+        end = start + timedelta(hours=rng.randint(1, 72))
+        email = f"w{worker}-{n % 20}@example.com"
+        try:
+            db.submit_booking(vehicle_id, f"Customer {n}", "0917", email, f"LIC-{worker}-{n % 20}",
+                              start.isoformat(), end.isoformat(), False, "Stress").result()
+            return True
+        except ValueError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(attempt, range(attempts)))
+    writer = db.get_booking_writer()
+    results.put((sum(outcomes), len(outcomes) - sum(outcomes), writer.batches, writer.jobs))
+    db.close_connections()
+
+
+def count_double_bookings(db):
+    with db.get_manager().connection() as conn:
+        return conn.execute("""
+        SELECT COUNT(*) FROM Reservation a
+        JOIN Reservation b ON a.vehicle_id = b.vehicle_id AND a.ReservationID < b.ReservationID
+        WHERE a.status = 'active' AND b.status = 'active'
+          AND a.end_datetime > b.start_datetime AND a.start_datetime < b.end_datetime
+        """).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=200, help="booking attempts per process")
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(prefix="rental_stress_"), "stress.db")
+    db = _import_db(db_file)
+    db.init_db()
+    for i in range(VEHICLES):
+        db.add_vehicle("Stress", f"Model{i}", 2024, f"STRESS-{i}", "Sedan", 1000.0)
+    db.close_connections()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=counter_process, args=(db_file, w, args.threads, args.attempts, results))
+             for w in range(args.processes)]
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    booked = sum(t[0] for t in totals)
+    rejected = sum(t[1] for t in totals)
+    batches = sum(t[2] for t in totals)
+    jobs = sum(t[3] for t in totals)
+    overlaps = count_double_bookings(db)
+
+    print(f"processes={args.processes} threads={args.threads} attempts={booked + rejected}")
+    print(f"booked={booked} rejected={rejected} elapsed={elapsed:.2f}s")
+    print(f"attempts/s={(booked + rejected) / elapsed:.1f} bookings/s={booked / elapsed:.1f}")
+    print(f"avg jobs per commit={jobs / batches if batches else 0:.2f}")
+    print(f"double-bookings={overlaps}")
+    sys.exit(1 if overlaps else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import threading
+from collections import namedtuple
+
+# Kinds of change published by VehicleRentalService after a successful write.
+RESERVATION_CREATED = "reservation_created"
+RESERVATION_EXTENDED = "reservation_extended"
+RESERVATION_RETURNED = "reservation_returned"
+VEHICLE_ADDED = "vehicle_added"
+MAINTENANCE_STARTED = "maintenance_started"
+MAINTENANCE_FINISHED = "maintenance_finished"
+
+RESERVATION_CHANGES = (RESERVATION_CREATED, RESERVATION_EXTENDED, RESERVATION_RETURNED)
+MAINTENANCE_CHANGES = (MAINTENANCE_STARTED, MAINTENANCE_FINISHED)
+
+# kind is one of the constants above; key identifies what changed
+# (ReservationID, VehicleID or MaintenanceID, or the plate for VEHICLE_ADDED).
+ChangeEvent = namedtuple("ChangeEvent", "kind key")
+
+
+class ChangeBus:
+    """Publish/subscribe hub for data changes.
+
+    Subscribers are called synchronously, on the publishing thread, in
+    subscription order. Debouncing is left to the subscriber, because
+    only the GUI knows which of its views are visible.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # kind -> [callback]
+
+    def subscribe(self, kinds, callback):
+        """Calls callback(event) for every published event whose kind is in kinds."""
+        with self._lock:
+            for kind in kinds:
+                self._subscribers.setdefault(kind, []).append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            for callbacks in self._subscribers.values():
+                while callback in callbacks:
+                    callbacks.remove(callback)
+
+    def publish(self, kind, key=None):
+        event = ChangeEvent(kind, key)
+        with self._lock:
+            callbacks = list(self._subscribers.get(kind, ()))
+        for callback in callbacks:
+            callback(event)
+        return event
@@ -1,567 +1,1054 @@
+import atexit
+import json
+import math
+import os
+import re
 import sqlite3
 from datetime import datetime, timedelta
+import db_stats
+import metrics
+import migrations
+import quote_engine
+from availability_index import AvailabilityIndex
+from vehicle_catalog import VehicleCatalog
+from db_pool import ConnectionManager, GroupCommitWriter, DEFAULT_PROFILE, get_storage_profile
 
-DB_FILE = "rental.db"
-DRIVER_FEE_PER_DAY = 500.0 
+DB_FILE = os.environ.get("RENTAL_DB_FILE", "rental.db")
+DB_PROFILE = os.environ.get("RENTAL_DB_PROFILE", DEFAULT_PROFILE)
+DRIVER_FEE_PER_DAY = 500.0
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+# Sortable columns of each paginated listing -> ORDER BY expressions; see _seek_page.
+# Any column may be NULL, and a NULL never compares past a cursor, so nullable
+# keys sort as '' (text) or 0 (numbers); migrations.null_safe_sort_indexes
+# indexes the same expressions.
+VEHICLE_SORTS = {
+    "VehicleID": ("VehicleID",),
+    "model": ("ifnull(model, '')", "VehicleID"),
+    "year": ("ifnull(year, 0)", "VehicleID"),
+    "plate": ("ifnull(plate, '')", "VehicleID"),
+    "vtype": ("ifnull(vtype, '')", "VehicleID"),
+    "daily_rate": ("ifnull(daily_rate, 0)", "VehicleID"),
+}
+RESERVATION_SORTS = {
+    "ReservationID": ("r.ReservationID",),
+    "plate": ("ifnull(v.plate, '')", "r.ReservationID"),
+    "customer_name": ("ifnull(c.name, '')", "c.CustomerID", "r.ReservationID"),
+    "start_datetime": ("ifnull(r.start_datetime, '')", "r.ReservationID"),
+    "end_datetime": ("ifnull(r.end_datetime, '')", "r.ReservationID"),
+    "location": ("ifnull(r.location, '')", "r.ReservationID"),
+}
+MAINTENANCE_SORTS = {
+    "MaintenanceID": ("m.MaintenanceID",),
+    "plate": ("ifnull(v.plate, '')", "m.MaintenanceID"),
+    "model": ("ifnull(v.model, '')", "ifnull(v.brand, '')", "m.MaintenanceID"),
+    "cost": ("ifnull(m.cost, 0)", "m.MaintenanceID"),
+    "start_date": ("ifnull(m.start_date, '')", "m.MaintenanceID"),
+}
+
+# SearchIndex kind -> the code in the low 3 bits of its rowids (see migrations.search_index).
+SEARCH_KINDS = {"customer": 1, "vehicle": 2, "damage": 3, "maintenance": 4}
+# Broad searches rank only this many of the newest matches of each kind; bm25 costs ~1 µs per row ranked.
+SEARCH_RANKED = 2000
+
+
+class ConflictError(ValueError):
+    """The write clashes with current data (the vehicle is booked or in maintenance); the API answers 409."""
+
+_manager = None
+_availability = None
+_catalog = None
+_booking_writer = None
+
+def get_manager():
+    """Returns the connection manager for DB_FILE, replacing it if DB_FILE or DB_PROFILE changed."""
+    global _manager
+    if _manager is None or _manager.db_file != DB_FILE or _manager.profile.name != DB_PROFILE:
+        if _manager is not None:
+            _manager.close_all()
+        _manager = ConnectionManager(DB_FILE, profile=DB_PROFILE)
+    return _manager
+
+def get_availability_index():
+    """Returns the in-memory availability index for DB_FILE, loading or reloading it if stale."""
+    global _availability
+    if _availability is None or _availability.db_file != DB_FILE:
+        if _availability is not None:
+            _availability.close()
+        _availability = AvailabilityIndex(DB_FILE)
+    with get_manager().connection() as conn:
+        _availability.ensure_fresh(conn)
+    return _availability
+
+def get_vehicle_catalog():
+    """Returns the in-memory vehicle catalog for DB_FILE, reloading it if the fleet changed."""
+    global _catalog
+    if _catalog is None or _catalog.db_file != DB_FILE:
+        _catalog = VehicleCatalog(DB_FILE)
+    with get_manager().connection() as conn:
+        _catalog.ensure_fresh(conn)
+    return _catalog
+
+def _after_commit_sync_index(conn, apply):
+    """Applies a delta to the availability index once the current write on conn commits (if it is loaded)."""
+    index = _availability
+    if index is None or index.db_file != DB_FILE or not index.loaded:
+        return
+    before, after = index.committed_versions(conn)
+    get_manager().after_commit(lambda: index.apply_committed(apply, before, after))
+
+def verify_availability_index():
+    """Diffs the availability index against the SQL source of truth; returns a list of problems."""
+    index = _availability
+    if index is None or index.db_file != DB_FILE or not index.loaded:
+        index = get_availability_index()
+    with get_manager().connection() as conn:
+        return index.diff_against(conn)
+
+def set_storage_profile(name):
+    """Switches the PRAGMA profile ("desktop", "multi-counter", "bulk-load"); applies to new connections."""
+    global DB_PROFILE
+    get_storage_profile(name)
+    DB_PROFILE = name
+
+def get_booking_writer():
+    """Returns the group-commit writer that serializes bookings for DB_FILE."""
+    global _booking_writer
+    manager = get_manager()
+    if _booking_writer is None or _booking_writer.manager is not manager:
+        if _booking_writer is not None:
+            _booking_writer.stop()
+        _booking_writer = GroupCommitWriter(manager)
+    return _booking_writer
+
+def close_connections():
+    global _manager, _availability, _catalog, _booking_writer
+    if _booking_writer is not None:
+        _booking_writer.stop()
+        _booking_writer = None
+    if _availability is not None:
+        _availability.close()
+        _availability = None
+    _catalog = None
+    if _manager is not None:
+        _manager.close_all()
+        _manager = None
+
+atexit.register(close_connections)
 
 def init_db():
-    """Initializes the SQLite database tables, updated to include Vehicle brand and year."""
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS Customer (
-        CustomerID INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        email TEXT UNIQUE,
-        phone TEXT,
-        drivers_license TEXT UNIQUE,
-        government_id TEXT 
-    )
-    """)
-    
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS Vehicle (
-        VehicleID INTEGER PRIMARY KEY AUTOINCREMENT,
-        brand TEXT,  
-        model TEXT,
-        year INTEGER, 
-        plate TEXT UNIQUE,
-        vtype TEXT,
-        daily_rate REAL,
-        available INTEGER DEFAULT 1
-    )
-    """)
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS Reservation (
-        ReservationID INTEGER PRIMARY KEY AUTOINCREMENT,
-        vehicle_id INTEGER,
-        customer_id INTEGER,  
-        driver_flag INTEGER,
-        start_datetime TEXT,
-        end_datetime TEXT,
-        location TEXT,
-        driver_fee REAL,
-        total_cost REAL,
-        status TEXT DEFAULT 'active',
-        distance_km REAL DEFAULT 0.0, -- NEW FIELD ADDED
-        FOREIGN KEY(vehicle_id) REFERENCES Vehicle(VehicleID),
-        FOREIGN KEY(customer_id) REFERENCES Customer(CustomerID)
-    )
-    """)
-    
-    try:
-        cur.execute("ALTER TABLE Reservation ADD COLUMN distance_km REAL DEFAULT 0.0")
-    except sqlite3.OperationalError as e:
-        if "duplicate column name: distance_km" in str(e):
-            pass
-        else:
-            print(f"Migration error: {e}")
-
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS DamageContract (
-        ContractID INTEGER PRIMARY KEY AUTOINCREMENT,
-        reservation_id INTEGER,
-        condition TEXT,
-        damage_cost REAL,
-        notes TEXT,
-        created_at TEXT,
-        FOREIGN KEY(reservation_id) REFERENCES Reservation(ReservationID)
-    )
-    """)
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS Payment (
-        PaymentID INTEGER PRIMARY KEY AUTOINCREMENT,
-        reservation_id INTEGER,
-        amount REAL,
-        status TEXT,
-        method TEXT,
-        frequency TEXT,
-        created_at TEXT,
-        FOREIGN KEY(reservation_id) REFERENCES Reservation(ReservationID)
-    )
-    """)
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS Maintenance (
-        MaintenanceID INTEGER PRIMARY KEY AUTOINCREMENT,
-        vehicle_id INTEGER,
-        checklist TEXT,
-        cost REAL,
-        start_date TEXT,
-        end_date TEXT,
-        notes TEXT,
-        status TEXT DEFAULT 'active',
-        FOREIGN KEY(vehicle_id) REFERENCES Vehicle(VehicleID)
-    )
-    """)
-    conn.commit()
-    conn.close()
+    """Brings the database schema up to date; see migrations.py for the steps.
+
+    Nothing runs at import time: the app calls this once its login window is
+    up, and scripts call it before their first query.
+    """
+    with get_manager().connection() as conn:
+        migrations.migrate(conn)
 
 
+def _select(conn, sql, params=(), row_factory=None):
+    """conn.execute(sql, params) on a cursor whose rows are built by row_factory (e.g. rental_system.Vehicle.from_row).
+
+    Without a row_factory the rows are the usual tuples.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = row_factory
+    return cursor.execute(sql, params)
+
+def _seek_page(conn, columns, source, sorts, sort, descending, cursor, limit, search=None, search_fields=(), where=(),
+               row_factory=None):
+    """One page of a keyset-paginated listing: (rows, next_cursor).
+
+    sorts maps each sort name to its ORDER BY expressions, the last of which
+    is unique, so the values of the last row (the cursor) mark an exact
+    position. The next page seeks past it with a row-value comparison,
+    which the listing_sort_indexes make an index range scan, so page 1000
+    costs the same as page 1. search keeps rows whose search_fields,
+    joined by spaces, contain the text (case-insensitive, like the tabs'
+    old in-memory filter). next_cursor is None after the last page.
+    row_factory(None, row) builds each returned row from its tuple once the
+    sort keys are cut off.
+    """
+    keys = sorts.get(sort)
+    if keys is None:
+        raise ValueError(f"Cannot sort by {sort!r}; choose one of {', '.join(sorts)}.")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}.")
+    conditions, params = list(where), []
+    if cursor is not None:
+        if len(cursor) != len(keys):
+            raise ValueError("Invalid page cursor.")
+        # The bound on the leading key alone lets SQLite seek an expression index too.
+        conditions.append(f"{keys[0]} {'<=' if descending else '>='} ?")
+        conditions.append(f"({', '.join(keys)}) {'<' if descending else '>'} ({', '.join('?' * len(keys))})")
+        params.append(cursor[0])
+        params.extend(cursor)
+    if search and search.strip():
+        text = search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        haystack = " || ' ' || ".join(f"ifnull({field}, '')" for field in search_fields)
+        conditions.append(f"({haystack}) LIKE ? ESCAPE '\\'")
+        params.append(f"%{text}%")
+    direction = " DESC" if descending else ""
+    sql = (f"SELECT {columns}, {', '.join(keys)} FROM {source}"
+           f"{' WHERE ' + ' AND '.join(conditions) if conditions else ''}"
+           f" ORDER BY {', '.join(key + direction for key in keys)} LIMIT ?")
+    params.append(limit + 1)  # one extra row says whether there is a next page
+    rows = conn.execute(sql, params).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    width = len(rows[0]) - len(keys) if rows else 0
+    next_cursor = tuple(rows[-1][width:]) if more else None
+    if row_factory is not None:
+        return [row_factory(None, row[:width]) for row in rows], next_cursor
+    return [row[:width] for row in rows], next_cursor
+
+def _existing_customer(conn, email_key, license_key):
+    """The customer holding license_key, else the one holding email_key; two unique-index seeks."""
+    for column, key in (("license_key", license_key), ("email_key", email_key)):
+        if key is not None:
+            row = conn.execute(f"SELECT CustomerID FROM Customer WHERE {column}=?", (key,)).fetchone()
+            if row:
+                return row[0]
+    return None
+
 def find_or_create_customer(name, phone, email, license, government_id="N/A"):
-    drivers_license_sql = license if (license and license.strip() and license != "N/A") else None
+    """The id of the customer with this driver's license or email (ignoring case and spacing), adding them if new.
 
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    try:
-        cur.execute("""
-        INSERT INTO Customer (name, phone, email, drivers_license, government_id)
-        VALUES (?, ?, ?, ?, ?)
-        """, (name, phone, email, drivers_license_sql, government_id)) 
-        conn.commit()
-        customer_id = cur.lastrowid
-        conn.close()
-        return customer_id
-        
-    except sqlite3.IntegrityError:
-        if drivers_license_sql:
-            sql = "SELECT CustomerID FROM Customer WHERE drivers_license=? OR email=?"
-            params = (drivers_license_sql, email)
-        else:
-            sql = "SELECT CustomerID FROM Customer WHERE email=?"
-            params = (email,)
-            
-        cur.execute(sql, params)
-        row = cur.fetchone()
-        conn.close()
-        
+    Known customers are found before inserting: SQLite assigns an
+    AUTOINCREMENT id before it detects a conflict, so an INSERT that hits
+    one would still use up an id.
+    """
+    email_key, license_key, phone_key = migrations.customer_keys(email, license, phone)
+    drivers_license_sql = license.strip() if license_key else None
+
+    with get_manager().transaction() as conn:
+        customer_id = _existing_customer(conn, email_key, license_key)
+        if customer_id is not None:
+            return customer_id
+        row = conn.execute("""
+        INSERT INTO Customer (name, phone, email, drivers_license, government_id, email_key, license_key, phone_key)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT DO NOTHING RETURNING CustomerID
+        """, (name, phone, email, drivers_license_sql, government_id, email_key, license_key, phone_key)).fetchone()
         if row:
-            return row[0] 
-        else:
+            return row[0]
+        # Only an unkeyed legacy duplicate (see migrations.customer_lookup_keys) gets here.
+        customer_id = conn.execute("SELECT CustomerID FROM Customer WHERE email=? OR drivers_license=?",
+                                   (email, drivers_license_sql)).fetchone()
+        if customer_id is None:
             raise ValueError("A customer with this email or driver's license already exists, but the record could not be retrieved for reuse.")
-    
-    except Exception as e:
-        conn.close()
-        raise e
+        return customer_id[0]
+
+def resolve_customers(customers):
+    """Customer ids for many (name, phone, email, license) tuples at once, in order, adding the new ones.
+
+    Entries are matched like find_or_create_customer: repeats within the
+    batch are merged first, then all the new customers go in with a single
+    INSERT ... SELECT over a JSON array and one query reads every id back.
+    """
+    keyed, first_by_email, first_by_license, batch = [], {}, {}, []
+    for name, phone, email, license in customers:
+        email_key, license_key, phone_key = migrations.customer_keys(email, license, phone)
+        first = first_by_license.get(license_key) if license_key is not None else None
+        if first is None and email_key is not None:
+            first = first_by_email.get(email_key)
+        if first is None:
+            first = len(batch)
+            batch.append((name, phone, email, license.strip() if license_key else None,
+                          email_key, license_key, phone_key))
+        if email_key is not None:
+            first_by_email.setdefault(email_key, first)
+        if license_key is not None:
+            first_by_license.setdefault(license_key, first)
+        keyed.append(first)
+    if not batch:
+        return []
+
+    payload = json.dumps(batch)
+    with get_manager().transaction() as conn:
+        conn.execute("""
+        INSERT INTO Customer (name, phone, email, drivers_license, government_id, email_key, license_key, phone_key)
+        SELECT b.value ->> 0, b.value ->> 1, b.value ->> 2, b.value ->> 3, 'N/A', b.value ->> 4, b.value ->> 5, b.value ->> 6
+        FROM json_each(?) b
+        WHERE NOT EXISTS (SELECT 1 FROM Customer c WHERE c.license_key = b.value ->> 5)
+          AND NOT EXISTS (SELECT 1 FROM Customer c WHERE c.email_key = b.value ->> 4)
+        ORDER BY b.key
+        ON CONFLICT DO NOTHING
+        """, (payload,))
+        ids = conn.execute("""
+        SELECT coalesce((SELECT CustomerID FROM Customer WHERE license_key = b.value ->> 5),
+                        (SELECT CustomerID FROM Customer WHERE email_key = b.value ->> 4),
+                        (SELECT CustomerID FROM Customer WHERE email = b.value ->> 2
+                                                            OR drivers_license = b.value ->> 3))
+        FROM json_each(?) b ORDER BY b.key
+        """, (payload,)).fetchall()
+    return [ids[i][0] for i in keyed]
+
+def find_customers(prefix, limit=10, row_factory=None):
+    """Up to limit customers whose name starts with prefix (any case), or whose phone does when prefix is all digits.
+
+    Returns (CustomerID, name, phone, email, drivers_license) rows, ordered
+    by name or phone. Each is a range seek on idx_customer_name_nocase or
+    idx_customer_phone_key.
+    """
+    prefix = prefix.strip()
+    if not prefix or limit < 1:
+        return []
+    columns = "CustomerID, name, phone, email, drivers_license"
+    with get_manager().connection() as conn:
+        if prefix.isdigit():
+            return _select(conn, f"""
+            SELECT {columns} FROM Customer WHERE phone_key >= ? AND phone_key < ?
+            ORDER BY phone_key, CustomerID LIMIT ?""", (prefix, prefix + ":", limit), row_factory).fetchall()
+        # Every name starting with prefix sorts between prefix and prefix followed by the highest code point.
+        return _select(conn, f"""
+        SELECT {columns} FROM Customer
+        WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE
+        ORDER BY name COLLATE NOCASE, CustomerID LIMIT ?""", (prefix, prefix + "\U0010ffff", limit), row_factory).fetchall()
 
 def add_vehicle(brand, model, year, plate, vtype, rate):
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute("INSERT INTO Vehicle (brand, model, year, plate, vtype, daily_rate) VALUES (?, ?, ?, ?, ?, ?)", (brand, model, year, plate, vtype, rate))
-        conn.commit()
-        conn.close()
+        with get_manager().transaction() as conn:
+            cur = conn.execute("INSERT INTO Vehicle (brand, model, year, plate, vtype, daily_rate) VALUES (?, ?, ?, ?, ?, ?)", (brand, model, year, plate, vtype, rate))
+            vehicle_id = cur.lastrowid
+            _after_commit_sync_index(conn, lambda index: index.add_vehicle(vehicle_id))
         return True, "success"
     except sqlite3.IntegrityError:
         return False, "duplicate"
     except Exception as e:
         return False, str(e)
 
-def get_all_vehicles():
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT VehicleID, brand, model, year, plate, vtype, daily_rate FROM Vehicle ORDER BY VehicleID")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+def get_all_vehicles(row_factory=None):
+    with get_manager().connection() as conn:
+        return _select(conn, "SELECT VehicleID, brand, model, year, plate, vtype, daily_rate FROM Vehicle ORDER BY VehicleID",
+                       row_factory=row_factory).fetchall()
+
+def get_vehicles_page(sort="VehicleID", descending=False, cursor=None, limit=DEFAULT_PAGE_SIZE, search=None,
+                      row_factory=None):
+    """One page of get_all_vehicles in any VEHICLE_SORTS order: (rows, next_cursor)."""
+    with get_manager().connection() as conn:
+        return _seek_page(conn, "VehicleID, brand, model, year, plate, vtype, daily_rate", "Vehicle",
+                          VEHICLE_SORTS, sort, descending, cursor, limit, search,
+                          ("brand", "model", "year", "plate", "vtype"), row_factory=row_factory)
+
+def get_vehicle_by_plate(plate, row_factory=None):
+    with get_manager().connection() as conn:
+        return _select(conn, "SELECT VehicleID, brand, model, year, plate, vtype, daily_rate FROM Vehicle WHERE plate=?", (plate,),
+                       row_factory).fetchone()
 
 def get_vehicle_types():
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT DISTINCT vtype FROM Vehicle ORDER BY vtype")
-    types = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return types
+    return get_vehicle_catalog().children()
 
 def get_brands_by_type(vtype):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT DISTINCT brand FROM Vehicle WHERE vtype=? ORDER BY brand", (vtype,))
-    brands = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return brands
+    return get_vehicle_catalog().children(vtype)
 
 def get_years_by_type_and_brand(vtype, brand):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT DISTINCT year FROM Vehicle WHERE vtype=? AND brand=? ORDER BY year DESC", (vtype, brand))
-    years = [str(row[0]) for row in cur.fetchall()]
-    conn.close()
-    return years
+    return get_vehicle_catalog().children(vtype, brand)
 
 def get_models_by_type_brand_and_year(vtype, brand, year):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT DISTINCT model FROM Vehicle WHERE vtype=? AND brand=? AND year=? ORDER BY model", (vtype, brand, year))
-    models = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return models
+    return get_vehicle_catalog().children(vtype, brand, year)
 
 def get_available_vehicles_by_model(vtype, brand, year, model):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT VehicleID, plate FROM Vehicle WHERE vtype=? AND brand=? AND year=? AND model=? AND available=1 ORDER BY plate", (vtype, brand, year, model))
-    vehicles = [f"{vid} - {plate}" for vid, plate in cur.fetchall()]
-    conn.close()
-    return vehicles
+    return [f"{vid} - {plate}" for vid, plate in get_vehicle_catalog().vehicles(vtype, brand, year, model)]
 
-def is_vehicle_available(vehicle_id, start_dt_iso, end_dt_iso, exclude_res_id=None):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    cur.execute("SELECT available FROM Vehicle WHERE VehicleID=?", (vehicle_id,))
-    available_status = cur.fetchone()
-    if available_status is None or available_status[0] == 0:
-        conn.close()
-        return False
-    
-    sql = """
-    SELECT 1 FROM Reservation
-    WHERE vehicle_id = ? AND status = 'active' AND
-          NOT (end_datetime <= ? OR start_datetime >= ?)
+def get_catalog_counts(vtype=None, brand=None, year=None, model=None):
+    """(in service, total) vehicles under the given catalog path; trailing Nones widen it."""
+    path = [key for key in (vtype, brand, year, model) if key is not None]
+    return get_vehicle_catalog().counts(*path)
+
+def search_available_vehicles(start_dt_iso, end_dt_iso, vtype=None, brand=None, year=None, model=None,
+                              min_rate=None, max_rate=None, driver_flag=False, limit=None):
+    """Returns every vehicle that is free for the whole window, with its quoted price, in one query.
+
+    A vehicle is free when it is not in maintenance and has no active reservation
+    overlapping [start, end). Rows are (VehicleID, brand, model, year, plate, vtype,
+    daily_rate, total_cost, driver_fee), ordered by plate. total_cost uses the same
+    arithmetic as calculate_cost, so a quote here matches what booking will charge.
+    """
+    days = billable_days(start_dt_iso, end_dt_iso)
+    driver_fee = DRIVER_FEE_PER_DAY * days if driver_flag else 0.0
+
+    filters = []
+    params = [days, driver_fee, driver_fee]
+    for column, value in (("vtype", vtype), ("brand", brand), ("year", year), ("model", model)):
+        if value is not None and value != "":
+            filters.append(f"v.{column} = ?")
+            params.append(value)
+    if min_rate is not None:
+        filters.append("v.daily_rate >= ?")
+        params.append(min_rate)
+    if max_rate is not None:
+        filters.append("v.daily_rate <= ?")
+        params.append(max_rate)
+
+    if filters:
+        # Narrow catalog search: probe each candidate's own reservations.
+        busy_filter = """NOT EXISTS (
+            SELECT 1 FROM Reservation r
+            WHERE r.vehicle_id = v.VehicleID AND r.status = 'active'
+              AND r.end_datetime > ? AND r.start_datetime < ?)"""
+        params += [start_dt_iso, end_dt_iso]
+    else:
+        # Whole fleet: collect the busy vehicles once from the active-window index.
+        busy_filter = """v.VehicleID NOT IN (
+            SELECT r.vehicle_id FROM Reservation r
+            WHERE r.status = 'active' AND r.start_datetime < ? AND r.end_datetime > ?)"""
+        params += [end_dt_iso, start_dt_iso]
+
+    sql = f"""
+    SELECT v.VehicleID, v.brand, v.model, v.year, v.plate, v.vtype, v.daily_rate,
+           v.daily_rate * ? + ? AS total_cost, ? AS driver_fee
+    FROM Vehicle v
+    WHERE v.available = 1 {''.join(' AND ' + f for f in filters)}
+      AND {busy_filter}
+    ORDER BY v.plate
     """
-    params = [vehicle_id, start_dt_iso, end_dt_iso]
-    
-    if exclude_res_id is not None:
-        sql += " AND ReservationID != ?"
-        params.append(exclude_res_id)
-    
-    cur.execute(sql, tuple(params))
-    
-    has_overlap = cur.fetchone() is not None
-    conn.close()
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    with get_manager().connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+def is_vehicle_available(vehicle_id, start_dt_iso, end_dt_iso, exclude_res_id=None):
+    """Answered from the in-memory availability index; see availability_index.py."""
+    return get_availability_index().is_available(vehicle_id, start_dt_iso, end_dt_iso, exclude_res_id)
+
+def is_vehicle_available_sql(vehicle_id, start_dt_iso, end_dt_iso, exclude_res_id=None):
+    """The same check run directly against the database."""
+    with get_manager().connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute("SELECT available FROM Vehicle WHERE VehicleID=?", (vehicle_id,))
+        available_status = cur.fetchone()
+        if available_status is None or available_status[0] == 0:
+            return False
+
+        sql = """
+        SELECT 1 FROM Reservation
+        WHERE vehicle_id = ? AND status = 'active' AND
+              end_datetime > ? AND start_datetime < ?
+        """
+        params = [vehicle_id, start_dt_iso, end_dt_iso]
+
+        if exclude_res_id is not None:
+            sql += " AND ReservationID != ?"
+            params.append(exclude_res_id)
+
+        cur.execute(sql, tuple(params))
+
+        has_overlap = cur.fetchone() is not None
     return not has_overlap
 
-def calculate_cost(vehicle_id, start_dt_iso, end_dt_iso, driver_flag):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT daily_rate FROM Vehicle WHERE VehicleID=?", (vehicle_id,))
-    rate_row = cur.fetchone()
-    conn.close()
-    
-    if rate_row is None:
-        raise ValueError("Vehicle not found.")
-        
-    daily_rate = rate_row[0]
-    
+def billable_days(start_dt_iso, end_dt_iso):
+    """Whole days charged for a rental: any part of a day counts, with a one-day minimum."""
     start_dt = datetime.fromisoformat(start_dt_iso)
     end_dt = datetime.fromisoformat(end_dt_iso)
-    
+
     duration = end_dt - start_dt
-    
+
     rental_days = duration.total_seconds() / (24 * 3600)
-    import math
-    days = math.ceil(rental_days) if rental_days > 0 else 1
-    
+    return math.ceil(rental_days) if rental_days > 0 else 1
+
+def calculate_cost(vehicle_id, start_dt_iso, end_dt_iso, driver_flag):
+    with get_manager().connection() as conn:
+        rate_row = conn.execute("SELECT daily_rate FROM Vehicle WHERE VehicleID=?", (vehicle_id,)).fetchone()
+
+    if rate_row is None:
+        raise ValueError("Vehicle not found.")
+
+    daily_rate = rate_row[0]
+
+    days = billable_days(start_dt_iso, end_dt_iso)
+
     base_cost = daily_rate * days
-    
+
     driver_fee = 0.0
     if driver_flag:
         driver_fee = DRIVER_FEE_PER_DAY * days
-        
+
     total_cost = base_cost + driver_fee
     return total_cost, driver_fee
 
+def quote_costs(vehicle_ids, starts, ends, driver_flags=False):
+    """calculate_cost for many quotes at once: (totals, driver_fees), lists in the order of vehicle_ids.
+
+    starts and ends are sequences of ISO timestamps, or one for every quote;
+    driver_flags is a sequence or one flag. All the daily rates are read
+    with one query, then quote_engine does the arithmetic.
+    """
+    ids = [int(vid) for vid in vehicle_ids]
+    with get_manager().connection() as conn:
+        rates = dict(conn.execute("SELECT VehicleID, daily_rate FROM Vehicle WHERE VehicleID IN (SELECT value FROM json_each(?))",
+                                  (json.dumps(sorted(set(ids))),)).fetchall())
+    if len(rates) < len(set(ids)):
+        raise ValueError("Vehicle not found.")
+    return quote_engine.price([rates[vid] for vid in ids], starts, ends, driver_flags, DRIVER_FEE_PER_DAY)
+
 def create_reservation(vehicle_id, customer_id, driver_flag, start_dt_iso, end_dt_iso, location):
-    total_cost, driver_fee = calculate_cost(vehicle_id, start_dt_iso, end_dt_iso, driver_flag)
-    
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("""
-    INSERT INTO Reservation (vehicle_id, customer_id, driver_flag, start_datetime, end_datetime, driver_fee, total_cost, location)
-    VALUES (?,?,?,?,?,?,?,?)
-    """, (vehicle_id, customer_id, int(driver_flag),
-          start_dt_iso, end_dt_iso, driver_fee, total_cost, location))
-    conn.commit()
-    res_id = cur.lastrowid
-    
-    cur.execute("""
-    INSERT INTO Payment (reservation_id, amount, status, method, frequency, created_at)
-    VALUES (?, ?, ?, ?, ?, ?)
-    """, (res_id, total_cost, 'pending', 'Estimate', 'Daily', datetime.now().isoformat()))
-    conn.commit()
-    
-    conn.close()
+    with get_manager().transaction() as conn:
+        total_cost, driver_fee = calculate_cost(vehicle_id, start_dt_iso, end_dt_iso, driver_flag)
+
+        cur = conn.cursor()
+        cur.execute("""
+        INSERT INTO Reservation (vehicle_id, customer_id, driver_flag, start_datetime, end_datetime, driver_fee, total_cost, location)
+        VALUES (?,?,?,?,?,?,?,?)
+        """, (vehicle_id, customer_id, int(driver_flag),
+              start_dt_iso, end_dt_iso, driver_fee, total_cost, location))
+        res_id = cur.lastrowid
+
+        cur.execute("""
+        INSERT INTO Payment (reservation_id, amount, status, method, frequency, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (res_id, total_cost, 'pending', 'Estimate', 'Daily', datetime.now().isoformat()))
+
+        _after_commit_sync_index(conn, lambda index: index.add_reservation(res_id, vehicle_id, start_dt_iso, end_dt_iso))
+
     return res_id, total_cost
 
+def book_reservation(vehicle_id, name, phone, email, license, start_dt_iso, end_dt_iso, driver_flag, location):
+    """Resolves the customer, checks availability, prices and inserts the booking in one write transaction.
+
+    The availability check runs under the write lock (BEGIN IMMEDIATE), so no
+    other counter can slip an overlapping booking in between the check and the
+    insert. Joins the caller's transaction if there is one (e.g. a group commit).
+    """
+    with get_manager().transaction():
+        customer_id = find_or_create_customer(name, phone, email, license)
+
+        if not is_vehicle_available_sql(vehicle_id, start_dt_iso, end_dt_iso):
+            raise ConflictError("Vehicle is unavailable for these dates.")
+
+        return create_reservation(vehicle_id, customer_id, driver_flag, start_dt_iso, end_dt_iso, location)
+
+def submit_booking(vehicle_id, name, phone, email, license, start_dt_iso, end_dt_iso, driver_flag, location):
+    """Queues book_reservation on the group-commit writer; returns a Future of (res_id, total_cost)."""
+    return get_booking_writer().submit(book_reservation, vehicle_id, name, phone, email, license,
+                                       start_dt_iso, end_dt_iso, driver_flag, location)
+
 def update_reservation_end_date(res_id, new_end_dt_iso):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    cur.execute("""
-    SELECT vehicle_id, driver_flag, start_datetime
-    FROM Reservation 
-    WHERE ReservationID=? AND status='active'
-    """, (res_id,))
-    row = cur.fetchone()
-    
-    if row is None:
-        conn.close()
-        raise ValueError("Active reservation not found.")
-        
-    vehicle_id, driver_flag, start_dt_iso = row
-    
-    start_dt = datetime.fromisoformat(start_dt_iso)
-    new_end_dt = datetime.fromisoformat(new_end_dt_iso)
-    
-    if new_end_dt <= start_dt:
-        conn.close()
-        raise ValueError("New return time must be after the original pickup time.")
-    
-    if not is_vehicle_available(vehicle_id, start_dt_iso, new_end_dt_iso, exclude_res_id=res_id):
-        conn.close()
-        raise ValueError("Vehicle is unavailable for the extended period (conflicts with another booking).")
-
-    total_cost, driver_fee = calculate_cost(vehicle_id, start_dt_iso, new_end_dt_iso, driver_flag)
-
-    cur.execute("""
-    UPDATE Reservation 
-    SET end_datetime=?, total_cost=?, driver_fee=?
-    WHERE ReservationID=?
-    """, (new_end_dt_iso, total_cost, driver_fee, res_id))
-
-    cur.execute("""
-    UPDATE Payment 
-    SET amount=?
-    WHERE reservation_id=? AND method='Estimate'
-    """, (total_cost, res_id))
-    
-    conn.commit()
-    conn.close()
+    with get_manager().transaction() as conn:
+        cur = conn.cursor()
+
+        cur.execute("""
+        SELECT vehicle_id, driver_flag, start_datetime
+        FROM Reservation
+        WHERE ReservationID=? AND status='active'
+        """, (res_id,))
+        row = cur.fetchone()
+
+        if row is None:
+            raise ValueError("Active reservation not found.")
+
+        vehicle_id, driver_flag, start_dt_iso = row
+
+        start_dt = datetime.fromisoformat(start_dt_iso)
+        new_end_dt = datetime.fromisoformat(new_end_dt_iso)
+
+        if new_end_dt <= start_dt:
+            raise ValueError("New return time must be after the original pickup time.")
+
+        if not is_vehicle_available_sql(vehicle_id, start_dt_iso, new_end_dt_iso, exclude_res_id=res_id):
+            raise ConflictError("Vehicle is unavailable for the extended period (conflicts with another booking).")
+
+        total_cost, driver_fee = calculate_cost(vehicle_id, start_dt_iso, new_end_dt_iso, driver_flag)
+
+        cur.execute("""
+        UPDATE Reservation
+        SET end_datetime=?, total_cost=?, driver_fee=?
+        WHERE ReservationID=?
+        """, (new_end_dt_iso, total_cost, driver_fee, res_id))
+
+        cur.execute("""
+        UPDATE Payment
+        SET amount=?
+        WHERE reservation_id=? AND method='Estimate'
+        """, (total_cost, res_id))
+
+        _after_commit_sync_index(conn, lambda index: index.update_reservation_end(res_id, new_end_dt_iso))
+
     return total_cost
 
-def list_active_reservations():
+def list_active_reservations(row_factory=None):
     """Returns a list of all active reservations with customer name, location, and vehicle details."""
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("""
-    SELECT r.ReservationID, v.plate, v.model, c.name, r.start_datetime, r.end_datetime, r.status, r.location
-    FROM Reservation r 
-    JOIN Vehicle v ON r.vehicle_id = v.VehicleID
-    JOIN Customer c ON r.customer_id = c.CustomerID
-    WHERE r.status = 'active'
-    ORDER BY r.start_datetime
-    """)
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with get_manager().connection() as conn:
+        return _select(conn, """
+        SELECT r.ReservationID, v.plate, v.model, c.name, r.start_datetime, r.end_datetime, r.status, r.location
+        FROM Reservation r
+        JOIN Vehicle v ON r.vehicle_id = v.VehicleID
+        JOIN Customer c ON r.customer_id = c.CustomerID
+        WHERE r.status = 'active'
+        ORDER BY r.start_datetime
+        """, row_factory=row_factory).fetchall()
+
+# FROM clause per sort. Left to itself the planner reads every active reservation
+# and sorts them for each page; CROSS JOIN makes the table whose column is
+# sorted on the outer loop, so the page is read in index order and stops at LIMIT.
+# For the first page by pickup or return time it would rather sort the
+# idx_reservation_active_window rows, hence INDEXED BY.
+_RESERVATION_PAGE_SOURCES = {
+    None: """Reservation r
+             JOIN Vehicle v ON r.vehicle_id = v.VehicleID
+             JOIN Customer c ON r.customer_id = c.CustomerID""",
+    "start_datetime": """Reservation r INDEXED BY idx_reservation_active_start_datetime_sort
+                         JOIN Vehicle v ON r.vehicle_id = v.VehicleID
+                         JOIN Customer c ON r.customer_id = c.CustomerID""",
+    "end_datetime": """Reservation r INDEXED BY idx_reservation_active_end_datetime_sort
+                       JOIN Vehicle v ON r.vehicle_id = v.VehicleID
+                       JOIN Customer c ON r.customer_id = c.CustomerID""",
+    "plate": """Vehicle v
+                CROSS JOIN Reservation r ON r.vehicle_id = v.VehicleID
+                JOIN Customer c ON r.customer_id = c.CustomerID""",
+    "customer_name": """Customer c
+                        CROSS JOIN Reservation r ON r.customer_id = c.CustomerID
+                        JOIN Vehicle v ON r.vehicle_id = v.VehicleID""",
+}
+
+def list_active_reservations_page(sort="start_datetime", descending=False, cursor=None, limit=DEFAULT_PAGE_SIZE,
+                                  search=None, row_factory=None):
+    """One page of list_active_reservations in any RESERVATION_SORTS order: (rows, next_cursor)."""
+    with get_manager().connection() as conn:
+        return _seek_page(conn, "r.ReservationID, v.plate, v.model, c.name, r.start_datetime, r.end_datetime, r.status, r.location",
+                          _RESERVATION_PAGE_SOURCES.get(sort, _RESERVATION_PAGE_SOURCES[None]),
+                          RESERVATION_SORTS, sort, descending, cursor, limit, search,
+                          ("v.plate", "v.model", "c.name", "r.location"), where=("r.status = 'active'",),
+                          row_factory=row_factory)
 
 def get_active_reservations_dates():
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT start_datetime, end_datetime, ReservationID FROM Reservation WHERE status='active'")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
-def get_bookings_for_date(start_day_iso, end_day_iso):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("""
-    SELECT r.ReservationID, v.plate, v.model, c.name, r.start_datetime, r.end_datetime, r.location
-    FROM Reservation r 
-    JOIN Vehicle v ON r.vehicle_id = v.VehicleID
-    JOIN Customer c ON r.customer_id = c.CustomerID
-    WHERE r.status='active' AND
-         NOT (r.end_datetime <= ? OR r.start_datetime >= ?)
-    ORDER BY r.start_datetime
-    """, (start_day_iso, end_day_iso))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with get_manager().connection() as conn:
+        return conn.execute("SELECT start_datetime, end_datetime, ReservationID FROM Reservation WHERE status='active' ORDER BY start_datetime").fetchall()
+
+def get_bookings_for_date(start_day_iso, end_day_iso, row_factory=None):
+    with get_manager().connection() as conn:
+        return _select(conn, """
+        SELECT r.ReservationID, v.plate, v.model, c.name, r.start_datetime, r.end_datetime, r.location
+        FROM Reservation r
+        JOIN Vehicle v ON r.vehicle_id = v.VehicleID
+        JOIN Customer c ON r.customer_id = c.CustomerID
+        WHERE r.status='active' AND
+             r.end_datetime > ? AND r.start_datetime < ?
+        ORDER BY r.start_datetime
+        """, (start_day_iso, end_day_iso), row_factory).fetchall()
+
+def get_daily_booking_counts(first_day_iso, last_day_iso):
+    """Active reservations per day for the days first_day_iso..last_day_iso ("YYYY-MM-DD", inclusive).
+
+    A reservation covers every calendar day from its start date to its end
+    date. SQL groups the overlapping reservations by their clipped
+    (first, last) day pair, so at most a few hundred rows come back for a
+    month however many bookings there are; a running sum over those spans
+    then gives each day's count. Returns [(day_iso, count)] for days with at
+    least one booking, in date order.
+    """
+    next_day_iso = (datetime.fromisoformat(last_day_iso) + timedelta(days=1)).date().isoformat()
+    with get_manager().connection() as conn:
+        spans = conn.execute("""
+        SELECT max(date(start_datetime), ?) AS first_day, min(date(end_datetime), ?) AS last_day, COUNT(*)
+        FROM Reservation
+        WHERE status='active' AND start_datetime < ? AND end_datetime >= ?
+          AND date(start_datetime) IS NOT NULL AND date(end_datetime) IS NOT NULL
+        GROUP BY first_day, last_day
+        """, (first_day_iso, last_day_iso, next_day_iso, first_day_iso)).fetchall()
+
+    first_day = datetime.fromisoformat(first_day_iso).date()
+    span_days = (datetime.fromisoformat(last_day_iso).date() - first_day).days + 1
+    deltas = [0] * (span_days + 1)
+    for span_first, span_last, count in spans:
+        lo = (datetime.fromisoformat(span_first).date() - first_day).days
+        hi = (datetime.fromisoformat(span_last).date() - first_day).days
+        if lo <= hi:
+            deltas[lo] += count
+            deltas[hi + 1] -= count
+
+    counts = []
+    running = 0
+    for offset in range(span_days):
+        running += deltas[offset]
+        if running:
+            counts.append(((first_day + timedelta(days=offset)).isoformat(), running))
+    return counts
+
+def get_fleet_size():
+    with get_manager().connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM Vehicle").fetchone()[0]
+
+def get_fleet_status():
+    """Vehicles available, out on rental and in maintenance right now, plus active reservations.
+
+    The totals are the trigger-maintained FleetCounts row. A vehicle is out
+    on rental once an active reservation of it has started, which also
+    covers overdue returns; only those reservations are read, as a range of
+    idx_reservation_active_window. The metrics exporter calls it once per scrape.
+    """
+    with get_manager().connection() as conn:
+        total, in_maintenance, active, rented = conn.execute("""
+        SELECT vehicles, in_maintenance, active_reservations,
+               (SELECT COUNT(DISTINCT r.vehicle_id)
+                FROM Reservation r JOIN Vehicle v ON v.VehicleID = r.vehicle_id
+                WHERE r.status = 'active' AND r.start_datetime <= ? AND v.available IS NOT 0)
+        FROM FleetCounts WHERE id = 1
+        """, (datetime.now().isoformat(),)).fetchone()
+    return {"available": total - in_maintenance - rented, "rented": rented, "in_maintenance": in_maintenance,
+            "active_reservations": active}
 
 def get_reservation_details(rid):
     """Returns detailed information for a single reservation."""
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("""
-    SELECT 
-        r.ReservationID, v.plate, v.model, c.name, r.start_datetime, r.end_datetime, 
-        r.driver_flag, c.drivers_license, r.total_cost
-    FROM Reservation r 
-    JOIN Vehicle v ON r.vehicle_id = v.VehicleID
-    JOIN Customer c ON r.customer_id = c.CustomerID
-    WHERE r.ReservationID=?
-    """, (rid,))
-    row = cur.fetchone()
-    conn.close()
-    return row
-
-def get_damage_contracts(reservation_id):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT condition, damage_cost, notes, created_at FROM DamageContract WHERE reservation_id=?", (reservation_id,))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with get_manager().connection() as conn:
+        return conn.execute("""
+        SELECT
+            r.ReservationID, v.plate, v.model, c.name, r.start_datetime, r.end_datetime,
+            r.driver_flag, c.drivers_license, r.total_cost
+        FROM Reservation r
+        JOIN Vehicle v ON r.vehicle_id = v.VehicleID
+        JOIN Customer c ON r.customer_id = c.CustomerID
+        WHERE r.ReservationID=?
+        """, (rid,)).fetchone()
+
+def get_damage_contracts(reservation_id, row_factory=None):
+    with get_manager().connection() as conn:
+        return _select(conn, "SELECT condition, damage_cost, notes, created_at FROM DamageContract WHERE reservation_id=?",
+                       (reservation_id,), row_factory).fetchall()
 
 def add_damage(reservation_id, condition, cost, notes=""):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("""
-    INSERT INTO DamageContract (reservation_id, condition, damage_cost, notes, created_at)
-    VALUES (?,?,?,?,?)
-    """, (reservation_id, condition, cost, notes, datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
+    with get_manager().transaction() as conn:
+        conn.execute("""
+        INSERT INTO DamageContract (reservation_id, condition, damage_cost, notes, created_at)
+        VALUES (?,?,?,?,?)
+        """, (reservation_id, condition, cost, notes, datetime.now().isoformat()))
 
 def get_final_costs(rid):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT SUM(damage_cost) FROM DamageContract WHERE reservation_id=?", (rid,))
-    dmg_total = cur.fetchone()[0] or 0.0
-    cur.execute("SELECT total_cost, vehicle_id FROM Reservation WHERE ReservationID=?", (rid,))
-    row = cur.fetchone()
-    conn.close()
+    with get_manager().connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT SUM(damage_cost) FROM DamageContract WHERE reservation_id=?", (rid,))
+        dmg_total = cur.fetchone()[0] or 0.0
+        cur.execute("SELECT total_cost, vehicle_id FROM Reservation WHERE ReservationID=?", (rid,))
+        row = cur.fetchone()
     if row is None:
         raise ValueError("Reservation not found.")
     base = row[0]
-    return base, dmg_total, row[1] 
+    return base, dmg_total, row[1]
 
 def finalize_reservation(rid, final_cost, distance_km):
-    
-    base, dmg_total, vehicle_id = get_final_costs(rid)
-    
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    cur.execute("UPDATE Reservation SET status='returned', total_cost=?, distance_km=? WHERE ReservationID=?", 
-                (final_cost, distance_km, rid))
-    
-    cur.execute("UPDATE Payment SET amount=?, status='paid', method='Finalized' WHERE reservation_id=?", (final_cost, rid))
-
-    cur.execute("UPDATE Vehicle SET available=1 WHERE VehicleID=?", (vehicle_id,))
-    conn.commit()
-    conn.close()
+    with get_manager().transaction() as conn:
+        base, dmg_total, vehicle_id = get_final_costs(rid)
+
+        cur = conn.cursor()
+
+        cur.execute("UPDATE Reservation SET status='returned', total_cost=?, distance_km=? WHERE ReservationID=?",
+                    (final_cost, distance_km, rid))
+
+        cur.execute("UPDATE Payment SET amount=?, status='paid', method='Finalized' WHERE reservation_id=?", (final_cost, rid))
+
+        cur.execute("UPDATE Vehicle SET available=1 WHERE VehicleID=?", (vehicle_id,))
+
+        def sync(index):
+            index.remove_reservation(rid)
+            index.set_blocked(vehicle_id, False)
+        _after_commit_sync_index(conn, sync)
 
 def get_all_vehicle_list():
     """Returns all vehicle details formatted for maintenance dropdown: ID - Plate (Brand Model)."""
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT VehicleID, plate, model, brand FROM Vehicle ORDER BY plate")
-    vehs = [f"{vid} - {plate} ({brand} {model})" for vid, plate, model, brand in cur.fetchall()]
-    conn.close()
-    return vehs
+    with get_manager().connection() as conn:
+        rows = conn.execute("SELECT VehicleID, plate, model, brand FROM Vehicle ORDER BY plate").fetchall()
+    return [f"{vid} - {plate} ({brand} {model})" for vid, plate, model, brand in rows]
 
 def start_maintenance(vid, checklist_str, cost, notes):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    cur.execute("SELECT 1 FROM Maintenance WHERE vehicle_id=? AND status='active'", (vid,))
-    if cur.fetchone():
-        conn.close()
-        return False, "Vehicle is already in active maintenance."
-
-    cur.execute("SELECT 1 FROM Reservation WHERE vehicle_id=? AND status='active'", (vid,))
-    if cur.fetchone():
-        conn.close()
-        return False, "Vehicle has active reservation and cannot be sent to maintenance yet."
-
-    cur.execute("""
-    INSERT INTO Maintenance (vehicle_id, checklist, cost, start_date, notes)
-    VALUES (?, ?, ?, ?, ?)
-    """, (vid, checklist_str, cost, datetime.now().isoformat(), notes))
-    
-    cur.execute("UPDATE Vehicle SET available=0 WHERE VehicleID=?", (vid,))
-    conn.commit()
-    conn.close()
+    with get_manager().transaction() as conn:
+        cur = conn.cursor()
+
+        cur.execute("SELECT 1 FROM Maintenance WHERE vehicle_id=? AND status='active'", (vid,))
+        if cur.fetchone():
+            return False, "Vehicle is already in active maintenance."
+
+        cur.execute("SELECT 1 FROM Reservation WHERE vehicle_id=? AND status='active'", (vid,))
+        if cur.fetchone():
+            return False, "Vehicle has active reservation and cannot be sent to maintenance yet."
+
+        cur.execute("""
+        INSERT INTO Maintenance (vehicle_id, checklist, cost, start_date, notes)
+        VALUES (?, ?, ?, ?, ?)
+        """, (vid, checklist_str, cost, datetime.now().isoformat(), notes))
+
+        cur.execute("UPDATE Vehicle SET available=0 WHERE VehicleID=?", (vid,))
+        _after_commit_sync_index(conn, lambda index: index.set_blocked(vid, True))
     return True, "Success"
 
-def get_active_maintenance():
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("""
-    SELECT 
-        m.MaintenanceID, v.plate, v.brand, v.model, m.checklist, m.cost, m.start_date, m.notes 
-    FROM Maintenance m 
-    JOIN Vehicle v ON m.vehicle_id = v.VehicleID
-    WHERE m.status='active'
-    """)
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+def get_active_maintenance(row_factory=None):
+    with get_manager().connection() as conn:
+        return _select(conn, """
+        SELECT
+            m.MaintenanceID, v.plate, v.brand, v.model, m.checklist, m.cost, m.start_date, m.notes
+        FROM Maintenance m
+        JOIN Vehicle v ON m.vehicle_id = v.VehicleID
+        WHERE m.status='active'
+        """, row_factory=row_factory).fetchall()
+
+def get_active_maintenance_page(sort="MaintenanceID", descending=False, cursor=None, limit=DEFAULT_PAGE_SIZE,
+                                search=None, row_factory=None):
+    """One page of get_active_maintenance in any MAINTENANCE_SORTS order: (rows, next_cursor).
+
+    At most one active record per vehicle, so sorts on vehicle columns read
+    the small idx_maintenance_active set rather than needing indexes of their own.
+    """
+    with get_manager().connection() as conn:
+        return _seek_page(conn, "m.MaintenanceID, v.plate, v.brand, v.model, m.checklist, m.cost, m.start_date, m.notes",
+                          "Maintenance m JOIN Vehicle v ON m.vehicle_id = v.VehicleID",
+                          MAINTENANCE_SORTS, sort, descending, cursor, limit, search,
+                          ("v.plate", "v.brand", "v.model", "m.checklist", "m.notes"), where=("m.status = 'active'",),
+                          row_factory=row_factory)
 
 def finish_maintenance(mid):
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    cur.execute("UPDATE Maintenance SET status='completed', end_date=? WHERE MaintenanceID=?", (datetime.now().isoformat(), mid))
-    
-    cur.execute("SELECT vehicle_id FROM Maintenance WHERE MaintenanceID=?", (mid,))
-    row = cur.fetchone()
-    if row:
-        vid = row[0]
-        cur.execute("UPDATE Vehicle SET available=1 WHERE VehicleID=?", (vid,))
-    
-    conn.commit()
-    conn.close()
-
-def get_vehicle_usage_report():
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    cur.execute("SELECT VehicleID, brand, model, plate FROM Vehicle")
-    all_vehicles = cur.fetchall()
-
-    usage_data = {}
-    for vid, brand, model, plate in all_vehicles:
-        usage_data[vid] = {
+    with get_manager().transaction() as conn:
+        cur = conn.cursor()
+
+        cur.execute("UPDATE Maintenance SET status='completed', end_date=? WHERE MaintenanceID=?", (datetime.now().isoformat(), mid))
+
+        cur.execute("SELECT vehicle_id FROM Maintenance WHERE MaintenanceID=?", (mid,))
+        row = cur.fetchone()
+        if row:
+            vid = row[0]
+            cur.execute("UPDATE Vehicle SET available=1 WHERE VehicleID=?", (vid,))
+            _after_commit_sync_index(conn, lambda index: index.set_blocked(vid, False))
+
+def _match_query(text):
+    """User text -> FTS5 query: every word must appear, each as a prefix; FTS5 syntax is never passed through."""
+    words = re.findall(r"\w+", text.lower())[:8]
+    return " ".join(f'"{word}"*' for word in words)
+
+def _search_context(conn, kind, ids):
+    """{ref_id: (plate, customer name, reservation id)} for the search hits of one kind."""
+    marks = ", ".join("?" * len(ids))
+    if kind == "vehicle":
+        sql = f"SELECT VehicleID, plate, NULL, NULL FROM Vehicle WHERE VehicleID IN ({marks})"
+    elif kind == "maintenance":
+        sql = f"""SELECT m.MaintenanceID, v.plate, NULL, NULL FROM Maintenance m
+                  JOIN Vehicle v ON m.vehicle_id = v.VehicleID WHERE m.MaintenanceID IN ({marks})"""
+    elif kind == "damage":
+        sql = f"""SELECT d.ContractID, v.plate, c.name, d.reservation_id FROM DamageContract d
+                  JOIN Reservation r ON d.reservation_id = r.ReservationID
+                  JOIN Vehicle v ON r.vehicle_id = v.VehicleID
+                  JOIN Customer c ON r.customer_id = c.CustomerID WHERE d.ContractID IN ({marks})"""
+    else:
+        return {}
+    return {row[0]: row[1:] for row in conn.execute(sql, ids)}
+
+def search(text, kinds=None, limit=20):
+    """Ranked full-text search over customers, vehicles, damage contracts and maintenance records.
+
+    Returns (kind, ref_id, title, snippet, plate, customer_name, reservation_id)
+    rows, best match first; snippet marks the matched words in [brackets].
+    kinds limits the search to some of SEARCH_KINDS. When more than
+    SEARCH_RANKED records of one kind match, only that kind's newest
+    SEARCH_RANKED are ranked. This keeps one-letter searches on millions
+    of rows in milliseconds, and one kind never crowds out another.
+    """
+    match = _match_query(text)
+    if not match:
+        return []
+    unknown = set(kinds or ()) - set(SEARCH_KINDS)
+    if unknown:
+        raise ValueError(f"Cannot search {', '.join(sorted(unknown))}; choose from {', '.join(SEARCH_KINDS)}.")
+    codes = [SEARCH_KINDS[kind] for kind in (kinds or SEARCH_KINDS)]
+    with get_manager().connection() as conn:
+        # Per kind, the rowid of its SEARCH_RANKED-th newest match; older matches of that kind are not ranked.
+        ranked, params = [], [match]
+        for code in codes:
+            floor = conn.execute("""
+            SELECT rowid FROM SearchIndex WHERE SearchIndex MATCH ? AND rowid % 8 = ?
+            ORDER BY rowid DESC LIMIT 1 OFFSET ?
+            """, (match, code, SEARCH_RANKED - 1)).fetchone()
+            ranked.append("(rowid % 8 = ? AND rowid >= ?)")
+            params += [code, floor[0] if floor else 0]
+        hits = conn.execute(f"""
+        SELECT kind, ref_id, title, snippet(SearchIndex, -1, '[', ']', '...', 8)
+        FROM SearchIndex
+        WHERE SearchIndex MATCH ? AND ({' OR '.join(ranked)})
+        ORDER BY bm25(SearchIndex, 0.0, 0.0, 4.0, 1.0)
+        LIMIT ?
+        """, params + [limit]).fetchall()
+        context = {}
+        for kind in {hit[0] for hit in hits}:
+            context[kind] = _search_context(conn, kind, [hit[1] for hit in hits if hit[0] == kind])
+    return [hit + context[hit[0]].get(hit[1], (None, None, None)) for hit in hits]
+
+# Counted rows and per-row amounts for the usage rollups; these mirror the
+# expressions the usage_rollups migration puts in its triggers.
+_USAGE_COUNTED = """r.vehicle_id IS NOT NULL AND r.status IN ('active', 'returned')
+              AND julianday(r.start_datetime) IS NOT NULL AND julianday(r.end_datetime) IS NOT NULL"""
+_USAGE_DURATION_MS = "CAST(round((julianday(r.end_datetime) - julianday(r.start_datetime)) * 86400000.0) AS INTEGER)"
+_USAGE_DISTANCE_M = "CAST(round(COALESCE(r.distance_km, 0.0) * 1000.0) AS INTEGER)"
+_LOCATION_COUNTED = "r.status IN ('active', 'returned') AND r.location IS NOT NULL AND r.location != ''"
+
+def _recompute_vehicle_usage(conn, reservation_filters="", params=()):
+    return conn.execute(f"""
+    SELECT r.vehicle_id, COUNT(*), SUM({_USAGE_DURATION_MS}), SUM({_USAGE_DISTANCE_M})
+    FROM Reservation r
+    WHERE {_USAGE_COUNTED}{reservation_filters}
+    GROUP BY r.vehicle_id
+    """, params).fetchall()
+
+def _recompute_location_usage(conn):
+    return conn.execute(f"""
+    SELECT r.location, COUNT(*)
+    FROM Reservation r
+    WHERE {_LOCATION_COUNTED}
+    GROUP BY r.location
+    """).fetchall()
+
+def _recompute_fleet_counts(conn):
+    return conn.execute("""
+    SELECT (SELECT COUNT(*) FROM Vehicle), (SELECT COUNT(*) FROM Vehicle WHERE available IS 0),
+           (SELECT COUNT(*) FROM Reservation WHERE status IS 'active')
+    """).fetchone()
+
+def get_vehicle_usage_report(start_iso=None, end_iso=None, vtype=None):
+    """Per-vehicle reservation count, hours booked and distance.
+
+    Counts active and returned reservations. Unfiltered, this reads the
+    VehicleUsageRollup table, one row per vehicle, so its cost does not grow
+    with reservation history. start_iso/end_iso keep only reservations that
+    start inside [start_iso, end_iso), which needs a grouped scan of
+    Reservation instead; vtype only limits the vehicles. Rows whose dates
+    cannot be parsed are skipped, as before.
+    """
+    vehicle_filter = ""
+    vehicle_params = []
+    if vtype is not None:
+        vehicle_filter = "WHERE v.vtype = ?"
+        vehicle_params.append(vtype)
+
+    if start_iso is None and end_iso is None:
+        usage_source = "VehicleUsageRollup"
+        params = vehicle_params
+    else:
+        reservation_filters = ""
+        params = []
+        if start_iso is not None:
+            reservation_filters += " AND r.start_datetime >= ?"
+            params.append(start_iso)
+        if end_iso is not None:
+            reservation_filters += " AND r.start_datetime < ?"
+            params.append(end_iso)
+        usage_source = f"""(
+            SELECT r.vehicle_id, COUNT(*) AS reservation_count,
+                   SUM({_USAGE_DURATION_MS}) AS duration_ms, SUM({_USAGE_DISTANCE_M}) AS distance_m
+            FROM Reservation r
+            WHERE {_USAGE_COUNTED}{reservation_filters}
+            GROUP BY r.vehicle_id
+        )"""
+        params += vehicle_params
+
+    with get_manager().connection() as conn:
+        rows = conn.execute(f"""
+        SELECT
+            v.VehicleID, v.plate, v.brand, v.model,
+            COALESCE(u.duration_ms, 0) / 3600000.0 AS usage_hours,
+            COALESCE(u.reservation_count, 0) AS reservation_count,
+            COALESCE(u.distance_m, 0) / 1000.0 AS total_distance_km
+        FROM Vehicle v
+        LEFT JOIN {usage_source} u ON u.vehicle_id = v.VehicleID
+        {vehicle_filter}
+        ORDER BY v.VehicleID
+        """, params).fetchall()
+
+    return [
+        {
             'vehicle_id': vid,
             'plate': plate,
             'brand': brand,
             'model': model,
-            'usage_hours': 0.0,
-            'reservation_count': 0,
-            'total_distance_km': 0.0
+            'usage_hours': usage_hours,
+            'reservation_count': count,
+            'total_distance_km': distance,
         }
-        
-    cur.execute("""
-    SELECT 
-        r.vehicle_id, 
-        r.start_datetime, 
-        r.end_datetime,
-        r.distance_km -- NEW: Fetch the actual distance traveled
-    FROM Reservation r 
-    WHERE r.status IN ('active', 'returned')
-    """)
-    
-    reservation_rows = cur.fetchall()
-    conn.close()
-    
-    for vid, start_dt_iso, end_dt_iso, distance_km in reservation_rows:
-        if vid in usage_data:
-            try:
-                start_dt = datetime.fromisoformat(start_dt_iso)
-                end_dt = datetime.fromisoformat(end_dt_iso)
-                
-                duration = end_dt - start_dt
-                duration_hours = duration.total_seconds() / 3600.0
-                
-                usage_data[vid]['usage_hours'] += duration_hours
-                usage_data[vid]['reservation_count'] += 1
-                usage_data[vid]['total_distance_km'] += distance_km or 0.0
-            except Exception:
-                continue
-                
-    return list(usage_data.values())
+        for vid, plate, brand, model, usage_hours, count, distance in rows
+    ]
 
 def get_location_usage_report():
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    
-    cur.execute("""
-    SELECT location, COUNT(ReservationID) AS reservation_count
-    FROM Reservation
-    WHERE status IN ('active', 'returned') AND location IS NOT NULL AND location != ''
-    GROUP BY location
-    ORDER BY reservation_count DESC
-    """)
-    
-    rows = cur.fetchall()
-    conn.close()
-    
+    with get_manager().connection() as conn:
+        rows = conn.execute("""
+        SELECT location, reservation_count
+        FROM LocationUsageRollup
+        WHERE reservation_count > 0
+        ORDER BY reservation_count DESC, location
+        """).fetchall()
+
     results = []
     for location, count in rows:
         results.append({
             'location': location,
             'reservation_count': count
         })
-        
+
     return results
 
-init_db()
\ No newline at end of file
+def rebuild_usage_rollups():
+    """Recomputes the rollup tables and FleetCounts, e.g. after a manual edit with triggers off."""
+    with get_manager().transaction() as conn:
+        conn.execute("DELETE FROM VehicleUsageRollup")
+        conn.execute("DELETE FROM LocationUsageRollup")
+        conn.executemany(
+            "INSERT INTO VehicleUsageRollup (vehicle_id, reservation_count, duration_ms, distance_m) VALUES (?, ?, ?, ?)",
+            _recompute_vehicle_usage(conn))
+        conn.executemany(
+            "INSERT INTO LocationUsageRollup (location, reservation_count) VALUES (?, ?)",
+            _recompute_location_usage(conn))
+        conn.execute("UPDATE FleetCounts SET vehicles=?, in_maintenance=?, active_reservations=? WHERE id = 1",
+                     _recompute_fleet_counts(conn))
+
+def verify_usage_rollups():
+    """Diffs the rollup tables and FleetCounts against a full recompute; returns a list of problems."""
+    problems = []
+    with get_manager().transaction(immediate=False) as conn:  # one snapshot for both sides
+        expected = {row[0]: row[1:] for row in _recompute_vehicle_usage(conn)}
+        stored = {row[0]: row[1:] for row in conn.execute(
+            "SELECT vehicle_id, reservation_count, duration_ms, distance_m FROM VehicleUsageRollup")}
+        expected_locations = dict(_recompute_location_usage(conn))
+        stored_locations = dict(conn.execute("SELECT location, reservation_count FROM LocationUsageRollup"))
+        expected_fleet = tuple(_recompute_fleet_counts(conn))
+        stored_fleet = tuple(conn.execute(
+            "SELECT vehicles, in_maintenance, active_reservations FROM FleetCounts WHERE id = 1").fetchone())
+
+    empty = (0, 0, 0)
+    for vid in sorted(set(expected) | set(stored)):
+        want, have = expected.get(vid, empty), stored.get(vid, empty)
+        if tuple(want) != tuple(have):
+            problems.append(f"vehicle {vid}: rollup (count, ms, m) {tuple(have)} != recomputed {tuple(want)}")
+    for location in sorted(set(expected_locations) | set(stored_locations)):
+        want, have = expected_locations.get(location, 0), stored_locations.get(location, 0)
+        if want != have:
+            problems.append(f"location {location!r}: rollup count {have} != recomputed {want}")
+    if stored_fleet != expected_fleet:
+        problems.append(f"fleet counts (vehicles, in maintenance, active reservations) {stored_fleet} "
+                        f"!= recomputed {expected_fleet}")
+    return problems
+
+_scraped_fleet_status = metrics.once_per_render(get_fleet_status)
+metrics.callback_gauge(
+    "rental_fleet_vehicles", "Vehicles by state right now (available, rented, in_maintenance).",
+    lambda: {(state,): count for state, count in _scraped_fleet_status().items() if state != "active_reservations"},
+    ("state",))
+metrics.callback_gauge("rental_active_reservations", "Reservations booked and not yet returned.",
+                       lambda: _scraped_fleet_status()["active_reservations"])
+
+# RENTAL_DB_STATS=1 turns on timing from the start (see db_stats.py).
+db_stats.enable_from_env()
+
+if __name__ == "__main__":
+    import sys
+
+    init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "rebuild-rollups":
+        rebuild_usage_rollups()
+        print("Usage rollups rebuilt.")
+    elif command == "verify-rollups":
+        problems = verify_usage_rollups()
+        for problem in problems:
+            print(problem)
+        print(f"{len(problems)} rollup mismatch(es).")
+        sys.exit(1 if problems else 0)
+    else:
+        print("usage: python db.py rebuild-rollups | verify-rollups")
+        sys.exit(2)
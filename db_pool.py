@@ -0,0 +1,363 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import db_stats
+import metrics
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CACHED_STATEMENTS = 256
+DEFAULT_ACQUIRE_TIMEOUT = 30.0
+
+LOCK_WAIT = metrics.histogram("rental_db_lock_wait_seconds",
+                              "Time to start a transaction (BEGIN), including busy retries.", ("mode",))
+BUSY_RETRIES = metrics.counter("rental_db_busy_retries_total", "Transaction starts retried because the database was locked.")
+POOL_WAIT = metrics.histogram("rental_db_pool_wait_seconds", "Time a worker thread waited for a pooled connection when all were in use.")
+CONNECTIONS_OPENED = metrics.counter("rental_db_connections_opened_total", "SQLite connections opened.")
+GROUP_COMMIT_BATCH = metrics.histogram("rental_db_group_commit_batch_size", "Jobs committed per group-commit transaction.",
+                                       buckets=(1, 2, 4, 8, 16, 32, 64))
+
+
+class StorageProfile:
+    """PRAGMA settings applied to every connection when it is opened.
+
+    busy_timeout_ms is how long SQLite itself waits on a locked database;
+    busy_retries/retry_backoff add a few more attempts with an increasing sleep
+    when starting a write transaction still reports "database is locked".
+    """
+
+    def __init__(self, name, journal_mode="WAL", synchronous="NORMAL", mmap_size=0,
+                 cache_size=-2000, temp_store="DEFAULT", busy_timeout_ms=5000,
+                 busy_retries=2, retry_backoff=0.05):
+        self.name = name
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size  # negative values are KiB, as in PRAGMA cache_size
+        self.temp_store = temp_store
+        self.busy_timeout_ms = busy_timeout_ms
+        self.busy_retries = busy_retries
+        self.retry_backoff = retry_backoff
+
+    def apply(self, conn):
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        if self.journal_mode:
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA temp_store={self.temp_store}")
+
+
+STORAGE_PROFILES = {
+    # Single counter: WAL so reports never block a booking commit, modest memory.
+    "desktop": StorageProfile(
+        "desktop", synchronous="NORMAL", mmap_size=64 * 1024 * 1024,
+        cache_size=-16000, temp_store="MEMORY", busy_timeout_ms=5000, busy_retries=2,
+    ),
+    # Several counters sharing one rental.db: longer waits and more retries on lock contention.
+    "multi-counter": StorageProfile(
+        "multi-counter", synchronous="NORMAL", mmap_size=256 * 1024 * 1024,
+        cache_size=-32000, temp_store="MEMORY", busy_timeout_ms=15000, busy_retries=5,
+        retry_backoff=0.1,
+    ),
+    # Imports and dataset generation: no fsync per commit and a large page cache.
+    "bulk-load": StorageProfile(
+        "bulk-load", synchronous="OFF", mmap_size=512 * 1024 * 1024,
+        cache_size=-262144, temp_store="MEMORY", busy_timeout_ms=30000, busy_retries=2,
+    ),
+}
+DEFAULT_PROFILE = "desktop"
+
+
+def get_storage_profile(name):
+    try:
+        return STORAGE_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage profile '{name}'. Choose from: {', '.join(STORAGE_PROFILES)}.")
+
+
+def is_busy_error(exc):
+    message = str(exc)
+    return "database is locked" in message or "database is busy" in message
+
+
+class ConnectionManager:
+    """Hands out reusable SQLite connections for a single database file.
+
+    The main (Tk) thread keeps one thread-local connection open for the life of
+    the process. Any other thread borrows a connection from a bounded pool and
+    gives it back when it is done, blocking if every pooled connection is busy.
+    Nested uses on the same thread share the connection that is already active,
+    so a db function that calls another db function never opens a second one.
+    """
+
+    def __init__(self, db_file, pool_size=DEFAULT_POOL_SIZE,
+                 cached_statements=DEFAULT_CACHED_STATEMENTS,
+                 acquire_timeout=DEFAULT_ACQUIRE_TIMEOUT, profile=DEFAULT_PROFILE):
+        self.db_file = db_file
+        self.profile = get_storage_profile(profile) if isinstance(profile, str) else profile
+        self.pool_size = pool_size
+        self.cached_statements = cached_statements
+        self.acquire_timeout = acquire_timeout
+        self._local = threading.local()
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._pool_created = 0
+        self._lock = threading.Lock()
+        self._all_connections = []
+        self._closed = False
+
+    def _open(self):
+        started = time.perf_counter()
+        conn = sqlite3.connect(
+            self.db_file,
+            isolation_level=None,  # transactions are managed explicitly below
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            timeout=self.profile.busy_timeout_ms / 1000.0,
+        )
+        self.profile.apply(conn)
+        db_stats.record_connect(time.perf_counter() - started)
+        CONNECTIONS_OPENED.inc()
+        with self._lock:
+            self._all_connections.append(conn)
+        return conn
+
+    def _acquire(self):
+        """Returns (connection, borrowed_from_pool)."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection manager is closed.")
+
+        if threading.current_thread() is threading.main_thread():
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._open()
+                self._local.conn = conn
+            return conn, False
+
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._pool_created < self.pool_size
+            if can_create:
+                self._pool_created += 1
+        if can_create:
+            return self._open(), True
+
+        started = time.perf_counter()
+        try:
+            return self._pool.get(timeout=self.acquire_timeout), True
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a pooled database connection.")
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._pool.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """Yields a connection for the current thread (autocommit mode)."""
+        if getattr(self._local, "depth", 0):
+            self._local.depth += 1
+            try:
+                yield self._local.active
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn, borrowed = self._acquire()
+        # While db_stats is recording, statements go through its timing proxy.
+        self._local.active = db_stats.InstrumentedConnection(conn) if db_stats.active else conn
+        self._local.depth = 1
+        try:
+            yield self._local.active
+        finally:
+            self._local.depth = 0
+            self._local.active = None
+            if borrowed:
+                self._release(conn)
+
+    def _begin(self, conn, immediate):
+        statement = "BEGIN IMMEDIATE" if immediate else "BEGIN"
+        retries = self.profile.busy_retries
+        started = time.perf_counter()
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    conn.execute(statement)
+                    return
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e) or attempt == retries:
+                        raise
+                    BUSY_RETRIES.inc()
+                    time.sleep(self.profile.retry_backoff * (2 ** attempt))
+        finally:
+            LOCK_WAIT.labels("immediate" if immediate else "deferred").observe(time.perf_counter() - started)
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """Yields a connection inside BEGIN ... COMMIT, rolling back on error.
+
+        Write transactions take the write lock up front (BEGIN IMMEDIATE) so a
+        busy database is reported, and retried, before any work is done rather
+        than halfway through. When a transaction is already open on this thread
+        the block simply joins it, and the outermost block decides whether it
+        commits.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+
+            self._begin(conn, immediate)
+            self._local.on_commit = []
+            try:
+                yield conn
+            except BaseException:
+                self._local.on_commit = None
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.commit()
+                callbacks, self._local.on_commit = self._local.on_commit, None
+                for callback in callbacks:
+                    callback()
+
+    def after_commit(self, callback):
+        """Runs callback once the current thread's transaction commits.
+
+        Callbacks are dropped if the transaction rolls back, and run straight
+        away when no transaction opened by transaction() is in progress. Use this
+        to keep in-memory caches in step with what is actually on disk.
+        """
+        pending = getattr(self._local, "on_commit", None)
+        if pending is None:
+            callback()
+        else:
+            pending.append(callback)
+
+    def close_all(self):
+        self._closed = True
+        with self._lock:
+            connections, self._all_connections = self._all_connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+
+class GroupCommitWriter:
+    """Single writer thread that runs queued write jobs in shared transactions.
+
+    Jobs submitted while the writer is busy are batched (up to max_batch, or
+    whatever arrives within max_wait seconds) into one BEGIN IMMEDIATE ... COMMIT,
+    so a burst of concurrent bookings pays for one fsync instead of one each.
+    Every job runs inside its own SAVEPOINT: a job that raises is rolled back on
+    its own and its Future gets the exception, while the rest of the batch still
+    commits. Futures resolve only after the COMMIT has succeeded.
+    """
+
+    def __init__(self, manager, max_batch=64, max_wait=0.002):
+        self.manager = manager
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.jobs = 0
+
+    def submit(self, func, *args, **kwargs):
+        """Queues func(*args, **kwargs) and returns a concurrent.futures.Future for its result."""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-group-commit", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # finish this batch, then stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            outcomes = []
+            try:
+                with self.manager.transaction() as conn:
+                    pending_callbacks = self.manager._local.on_commit
+                    for future, func, args, kwargs in batch:
+                        conn.execute("SAVEPOINT group_job")
+                        mark = len(pending_callbacks)
+                        try:
+                            result = func(*args, **kwargs)
+                        except BaseException as e:
+                            conn.execute("ROLLBACK TO group_job")
+                            conn.execute("RELEASE group_job")
+                            del pending_callbacks[mark:]  # the job's writes are gone, so are its cache updates
+                            outcomes.append((future, False, e))
+                        else:
+                            conn.execute("RELEASE group_job")
+                            outcomes.append((future, True, result))
+            except BaseException as e:
+                for future, _, _, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.jobs += len(batch)
+            GROUP_COMMIT_BATCH.observe(len(batch))
+            for future, ok, value in outcomes:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
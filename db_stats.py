@@ -0,0 +1,374 @@
+"""Opt-in timing for db.py: per-call and per-statement latency, rows, connection opens and a slow-query log.
+
+Nothing is recorded until enable() is called, either from the Diagnostics
+tab or by setting RENTAL_DB_STATS=1 (RENTAL_DB_SLOW_MS and
+RENTAL_DB_SLOW_LOG set the threshold and a log file). When off, the only
+cost is a flag check each time db_pool hands out a connection.
+
+When on:
+- every public db.py function is swapped for a timed wrapper;
+- connections are handed out behind a thin proxy that times each SQL
+  statement, from execute() until its rows have been fetched;
+- statements slower than the threshold are kept for the panel. They are
+  also appended to the log file, with the SQL, the shapes of the bound
+  parameters (types and lengths, never values) and the db.py call they
+  ran under.
+
+snapshot() returns everything as plain dicts and lists.
+"""
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended.
+BUCKET_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+DEFAULT_SLOW_MS = 100.0
+SLOW_ENTRIES_KEPT = 200
+# db.py plumbing that is called on every query; wrapping it would only add noise.
+NOT_WRAPPED = {"get_manager", "close_connections", "set_storage_profile", "get_booking_writer"}
+
+active = False  # read by db_pool on every connection hand-out; use enable()/disable() to change it
+
+_lock = threading.Lock()
+_local = threading.local()
+_originals = {}
+_calls = {}
+_statements = {}
+_connects = None
+_slow = deque(maxlen=SLOW_ENTRIES_KEPT)
+_slow_ms = DEFAULT_SLOW_MS
+_slow_log = None
+_since = None
+_sql_keys = {}
+
+
+class Histogram:
+    """Count, sum, min/max, rows and bucketed latencies for one call site."""
+
+    __slots__ = ("count", "errors", "total_ms", "min_ms", "max_ms", "rows", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def observe(self, ms, rows=0, failed=False):
+        self.count += 1
+        self.errors += failed
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        for i, bound in enumerate(BUCKET_BOUNDS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding that fraction of calls, capped at the slowest call."""
+        wanted = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(BUCKET_BOUNDS_MS[i], self.max_ms) if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count, "errors": self.errors, "rows": self.rows,
+            "total_ms": self.total_ms, "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "min_ms": self.min_ms or 0.0, "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.50), "p95_ms": self.percentile(0.95), "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip([str(b) for b in BUCKET_BOUNDS_MS] + ["inf"], self.buckets)),
+        }
+
+
+# --- Switching on and off ---
+
+def enable(slow_ms=None, slow_log=None):
+    """Starts recording (keeps what was recorded before; see reset()). slow_log is a file to append to."""
+    global active, _slow_log, _since, _connects
+    import db
+
+    with _lock:
+        if slow_ms is not None:
+            set_slow_ms(slow_ms)
+        if slow_log is not None:
+            _slow_log = slow_log
+        if active:
+            return
+        if _since is None:
+            _since = datetime.now()
+            _connects = Histogram()
+        for name, func in inspect.getmembers(db, inspect.isfunction):
+            if func.__module__ == db.__name__ and not name.startswith("_") and name not in NOT_WRAPPED:
+                _originals[name] = func
+                setattr(db, name, _timed_call(name, func))
+        active = True
+
+
+def disable():
+    """Stops recording and puts the original db.py functions back; recorded numbers are kept."""
+    global active
+    import db
+
+    with _lock:
+        for name, func in _originals.items():
+            setattr(db, name, func)
+        _originals.clear()
+        active = False
+
+
+def enable_from_env():
+    if os.environ.get("RENTAL_DB_STATS", "").lower() in ("1", "true", "yes", "on"):
+        slow_ms = os.environ.get("RENTAL_DB_SLOW_MS")
+        enable(float(slow_ms) if slow_ms else None, os.environ.get("RENTAL_DB_SLOW_LOG"))
+
+
+def set_slow_ms(ms):
+    global _slow_ms
+    if ms < 0:
+        raise ValueError("The slow query threshold cannot be negative.")
+    _slow_ms = float(ms)
+
+
+def reset():
+    global _since, _connects
+    with _lock:
+        _calls.clear()
+        _statements.clear()
+        _slow.clear()
+        _since = datetime.now() if active else None
+        _connects = Histogram() if active else None
+
+
+# --- Recording ---
+
+def _observe(table, key, ms, rows=0, failed=False):
+    with _lock:
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = Histogram()
+        stats.observe(ms, rows, failed)
+
+
+def _timed_call(name, func):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        stack = _local.__dict__.setdefault("calls", [])
+        stack.append(name)
+        started = time.perf_counter()
+        failed = True
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            stack.pop()
+            _observe(_calls, name, ms, len(result) if isinstance(result, list) else 0, failed)
+    return timed
+
+
+def record_connect(seconds):
+    """Called by db_pool after opening a connection (including its PRAGMA setup)."""
+    if active:
+        with _lock:
+            _connects.observe(seconds * 1000)
+
+
+def _sql_key(sql):
+    key = _sql_keys.get(sql)
+    if key is None:
+        if len(_sql_keys) > 2000:
+            _sql_keys.clear()
+        key = _sql_keys[sql] = " ".join(sql.split())
+    return key
+
+
+def param_shape(params):
+    """'(int, str[19], None)' for a parameter tuple; types and lengths only, never the values."""
+    def shape(value):
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return "None" if value is None else type(value).__name__
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {shape(v)}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(shape(v) for v in params) + ")"
+
+
+def _record_statement(sql, shape, ms, rows, failed=False):
+    key = _sql_key(sql)
+    _observe(_statements, key, ms, rows, failed)
+    if ms < _slow_ms:
+        return
+    calls = getattr(_local, "calls", None)
+    entry = {
+        "at": datetime.now().isoformat(timespec="milliseconds"), "ms": ms, "rows": rows, "sql": key,
+        "params": shape() if callable(shape) else shape, "call": calls[-1] if calls else None,
+        "thread": threading.current_thread().name, "failed": failed,
+    }
+    with _lock:
+        _slow.append(entry)
+        path = _slow_log
+    if path:
+        line = (f"{entry['at']} {ms:9.1f} ms {rows:7} rows  {entry['call'] or '-'}  [{entry['thread']}]"
+                f"{'  FAILED' if failed else ''}\n    {key}\n    params: {entry['params']}\n")
+        with _lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class InstrumentedConnection:
+    """Stands in for a sqlite3.Connection while recording is on; statements go through InstrumentedCursor."""
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return InstrumentedCursor(self._conn.cursor())
+
+    def execute(self, sql, params=()):
+        return InstrumentedCursor(self._conn.cursor()).execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return InstrumentedCursor(self._conn.cursor()).executemany(sql, seq_of_params)
+
+    def commit(self):
+        started = time.perf_counter()
+        self._conn.commit()
+        _record_statement("COMMIT", "()", (time.perf_counter() - started) * 1000, 0)
+
+
+class InstrumentedCursor:
+    """Times one statement at a time, from execute() until its rows are fetched or the cursor is dropped."""
+
+    __slots__ = ("_cursor", "_pending")
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._pending = None  # [sql, params, elapsed seconds, rows] of the statement being read
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    # __getattr__ only forwards reads; db.py also sets row_factory on its cursors.
+    @property
+    def row_factory(self):
+        return self._cursor.row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory):
+        self._cursor.row_factory = factory
+
+    def __del__(self):
+        self._finish()
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            sql, params, elapsed, rows = pending
+            _record_statement(sql, lambda: param_shape(params), elapsed * 1000, rows)
+
+    def _run(self, method, sql, params, shape):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            method(sql, params)
+        except Exception:
+            _record_statement(sql, shape, (time.perf_counter() - started) * 1000, 0, failed=True)
+            raise
+        elapsed = time.perf_counter() - started
+        if self._cursor.description is None:  # nothing to fetch: count the rows it changed
+            _record_statement(sql, shape, elapsed * 1000, max(self._cursor.rowcount, 0))
+        else:
+            self._pending = [sql, params, elapsed, 0]
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(self._cursor.execute, sql, params, lambda: param_shape(params))
+
+    def executemany(self, sql, seq_of_params):
+        if not isinstance(seq_of_params, (list, tuple)):
+            seq_of_params = list(seq_of_params)
+        first = seq_of_params[0] if seq_of_params else ()
+        return self._run(self._cursor.executemany, sql, seq_of_params,
+                         lambda: f"{len(seq_of_params)} x {param_shape(first)}")
+
+    def _fetched(self, started, rows, done):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += time.perf_counter() - started
+            pending[3] += rows
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = next(self._cursor)
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+
+# --- Reading ---
+
+def snapshot():
+    """Everything recorded since enable() or reset(), slowest totals first, as plain data."""
+    with _lock:
+        calls = [dict(stats.summary(), name=name) for name, stats in _calls.items()]
+        statements = [dict(stats.summary(), sql=sql) for sql, stats in _statements.items()]
+        connects = _connects.summary() if _connects is not None else Histogram().summary()
+        slow = list(reversed(_slow))
+        since = _since
+    calls.sort(key=lambda s: -s["total_ms"])
+    statements.sort(key=lambda s: -s["total_ms"])
+    return {
+        "enabled": active, "since": since.isoformat(timespec="seconds") if since else None,
+        "slow_ms": _slow_ms, "slow_log": _slow_log,
+        "calls": calls, "statements": statements, "connections": connects, "slow": slow,
+    }
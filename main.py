@@ -1,23 +1,29 @@
 import customtkinter as ctk
-import db
+import metrics
 from login_ui import LoginWindow
 from main_gui import RentalApp
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
 
-def main():
-    db.init_db()
-    
+def start_app():
+    """Creates the hidden main window and the login window; returns (app, login).
+
+    No database work happens until the login window is on screen. The schema
+    migration then runs in the background while the user types, and each tab
+    is built the first time it is shown.
+    """
+    metrics.start_exporters_from_env()
     app = RentalApp()
     app.withdraw()
-    
-    def start_main_app_ui():
-        app.deiconify()
 
-    login = LoginWindow(master=app, on_success_callback=start_main_app_ui)
-    
+    login = LoginWindow(master=app, on_success_callback=app.open_main_window)
+    app.after_idle(app.prepare_storage)
+    return app, login
+
+def main():
+    app, _ = start_app()
     app.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
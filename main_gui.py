@@ -1,60 +1,148 @@
 import customtkinter as ctk
+from tkinter import messagebox
+import tabs
+from change_bus import ChangeBus
 from rental_system import VehicleRentalService
-from tabs import VehiclesTab, RentTab, CalendarTab, ReservationsTab, ReturnTab, MaintenanceTab, ReportTab
+from tk_executor import TkExecutor
+
+# Quiet period after the last change of a burst before the visible tab refreshes.
+REFRESH_DELAY_MS = 50
+
+# (tab title, class name in the tabs package), in display order.
+TAB_ORDER = [
+    ("Vehicles", "VehiclesTab"),
+    ("Rent Vehicle", "RentTab"),
+    ("Calendar", "CalendarTab"),
+    ("Active Reservations", "ReservationsTab"),
+    ("Return / Damage", "ReturnTab"),
+    ("Maintenance", "MaintenanceTab"),
+    ("Reports", "ReportTab"),
+    ("Diagnostics", "DiagnosticsTab"),
+]
 
 class RentalApp(ctk.CTk):
     def __init__(self):
         super().__init__()
         self.title("Vehicle Rental Service")
         self.geometry("950x750")
-        self.system = VehicleRentalService()
-        self.tabview = ctk.CTkTabview(self, width=980, height=660)
+        self.changes = ChangeBus()
+        self.system = VehicleRentalService(self.changes)
+        # Database calls from the tabs run here, off the Tk thread (see BaseTab.run_in_background).
+        self.executor = TkExecutor(self, on_busy_change=self.show_busy)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.status_label = ctk.CTkLabel(self, text="", anchor="e", text_color="gray")
+        self.status_label.pack(side="bottom", fill="x", padx=14)
+        self.search_bar = tabs.GlobalSearch(self, self)
+        self.search_bar.pack(side="top", fill="x", padx=10, pady=(10, 0))
+        self.tabview = ctk.CTkTabview(self, width=980, height=660, command=self.on_tab_changed)
         self.tabview.pack(padx=10, pady=10, fill="both", expand=True)
         self.tab_instances = {}
+        self._stale = {}  # tab instance -> {refresh callback: None}, an ordered set
+        self._flush_job = None
+        self._storage_ready = False
+        self._window_open = False
         self.build_tabs()
         
     def build_tabs(self):
-        
-        vehicles_tab = self.tabview.add("Vehicles")
-        self.tab_instances["Vehicles"] = VehiclesTab(master=vehicles_tab, app_controller=self)
-        self.tab_instances["Vehicles"].pack(fill="both", expand=True)
+        """Adds an empty page per tab; each tab is built and loaded the first time it is shown."""
+        for title, _ in TAB_ORDER:
+            self.tabview.add(title)
 
-        rent_tab = self.tabview.add("Rent Vehicle")
-        self.tab_instances["Rent Vehicle"] = RentTab(master=rent_tab, app_controller=self)
-        self.tab_instances["Rent Vehicle"].pack(fill="both", expand=True)
-        
-        calendar_tab = self.tabview.add("Calendar")
-        self.tab_instances["Calendar"] = CalendarTab(master=calendar_tab, app_controller=self)
-        self.tab_instances["Calendar"].pack(fill="both", expand=True)
+    def ensure_tab(self, title):
+        if title in self.tab_instances or not (self._storage_ready and self._window_open):
+            return
+        tab_class = getattr(tabs, dict(TAB_ORDER)[title])
+        self.tab_instances[title] = tab_class(master=self.tabview.tab(title), app_controller=self)
+        self.tab_instances[title].pack(fill="both", expand=True)
 
-        reservations_tab = self.tabview.add("Active Reservations")
-        self.tab_instances["Active Reservations"] = ReservationsTab(master=reservations_tab, app_controller=self)
-        self.tab_instances["Active Reservations"].pack(fill="both", expand=True)
+    @property
+    def storage_ready(self):
+        return self._storage_ready
 
-        return_tab = self.tabview.add("Return / Damage")
-        self.tab_instances["Return / Damage"] = ReturnTab(master=return_tab, app_controller=self)
-        self.tab_instances["Return / Damage"].pack(fill="both", expand=True)
-        
-        maintenance_tab = self.tabview.add("Maintenance")
-        self.tab_instances["Maintenance"] = MaintenanceTab(master=maintenance_tab, app_controller=self)
-        self.tab_instances["Maintenance"].pack(fill="both", expand=True)
+    # --- Startup ---
 
-        reports_tab = self.tabview.add("Reports")
-        self.tab_instances["Reports"] = ReportTab(master=reports_tab, app_controller=self)
-        self.tab_instances["Reports"].pack(fill="both", expand=True)
-        
-    
-    def refresh_reservation_list(self):
-        self.tab_instances["Active Reservations"].refresh_list()
-        
-    def refresh_calendar_marks(self):
-        self.tab_instances["Calendar"].refresh_marks()
+    def prepare_storage(self):
+        """Migrates the database in the background; call once the login window is up."""
+        self.executor.submit(self.system.prepare_storage, on_done=self._storage_prepared, on_error=self._storage_failed)
 
-    def update_maint_vehicle_dropdown(self):
-        self.tab_instances["Maintenance"].update_vehicle_dropdown()
-        
-    def refresh_rent_dropdowns(self):
-        self.tab_instances["Rent Vehicle"].update_type_dropdown()
-        
-    def refresh_return_dropdown(self):
-        self.tab_instances["Return / Damage"].update_reservation_dropdown()
\ No newline at end of file
+    def _storage_prepared(self, _):
+        self._storage_ready = True
+        self.ensure_tab(self.tabview.get())
+
+    def _storage_failed(self, error):
+        messagebox.showerror("Database Error", f"Could not open the database: {error}")
+        self.on_close()
+
+    def open_main_window(self):
+        """Shows the main window after login; the visible tab is built as soon as storage is ready."""
+        self._window_open = True
+        self.deiconify()
+        self.ensure_tab(self.tabview.get())
+
+    # --- Change-driven refreshes ---
+
+    def watch(self, tab, kinds, refresh):
+        """Calls refresh() after changes of the given kinds, once per burst, while tab is showing.
+
+        Events only mark the tab stale. The visible tab is refreshed
+        REFRESH_DELAY_MS after the last change of a burst; hidden tabs
+        wait until they are selected.
+        """
+        # Writes run on worker threads too, so events are handed to the Tk thread first.
+        self.changes.subscribe(kinds, lambda event: self.executor.post(self._mark_stale, tab, refresh))
+
+    def _mark_stale(self, tab, refresh):
+        self._stale.setdefault(tab, {})[refresh] = None
+        if self._flush_job is not None:
+            self.after_cancel(self._flush_job)
+        self._flush_job = self.after(REFRESH_DELAY_MS, self._flush_visible)
+
+    def _flush_visible(self):
+        self._flush_job = None
+        self._refresh_if_stale(self.tab_instances.get(self.tabview.get()))
+
+    def _refresh_if_stale(self, tab):
+        for refresh in self._stale.pop(tab, {}):
+            refresh()
+
+    def on_tab_changed(self):
+        self.ensure_tab(self.tabview.get())
+        self._refresh_if_stale(self.tab_instances.get(self.tabview.get()))
+
+    # --- Global search ---
+
+    def show_tab(self, title, search=None):
+        """Switches to a tab, building it if needed, and optionally fills in its search box."""
+        self.tabview.set(title)
+        self.on_tab_changed()
+        tab = self.tab_instances.get(title)
+        if tab is not None and search is not None:
+            tab.show_search(search)
+
+    def open_search_result(self, result):
+        """Opens a global search hit in the tab that lists it; damage contracts are shown in a dialog."""
+        self.search_bar.hide_results()
+        kind = result['kind']
+        if kind == "customer":
+            self.show_tab("Active Reservations", search=result['title'])
+        elif kind == "vehicle":
+            self.show_tab("Vehicles", search=result['plate'])
+        elif kind == "maintenance":
+            self.show_tab("Maintenance", search=result['plate'])
+        else:
+            messagebox.showinfo(f"Damage Contract #{result['id']}",
+                                f"Reservation: #{result['reservation_id']}\n"
+                                f"Vehicle: {result['plate']}\n"
+                                f"Customer: {result['customer_name']}\n"
+                                f"Condition: {result['title']}\n\n"
+                                f"{result['snippet']}")
+
+    # --- Background work ---
+
+    def show_busy(self, busy):
+        self.status_label.configure(text="Loading..." if busy else "")
+        self.configure(cursor="watch" if busy else "")
+
+    def on_close(self):
+        self.executor.shutdown()
+        self.destroy()
\ No newline at end of file
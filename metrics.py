@@ -0,0 +1,366 @@
+"""Counters, gauges and histograms for monitoring a running counter, exported as Prometheus text.
+
+Modules declare their metrics once at import time and update them as they
+work. Updates are always on and cost one lock and a few additions.
+Nothing leaves the process until an exporter is started:
+
+    RENTAL_METRICS_PORT=9310      serve http://127.0.0.1:9310/metrics
+    RENTAL_METRICS_FILE=path.prom rewrite this file every RENTAL_METRICS_INTERVAL seconds (default 15),
+                                  e.g. for node_exporter's textfile collector
+
+main.py and api_server.py call start_exporters_from_env(). Callback gauges
+are computed each time the metrics are rendered. Keep them to cached
+in-memory state or a few indexed lookups, and wrap a reading that several
+gauges share in once_per_render.
+"""
+import math
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_FILE_INTERVAL = 15.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_rendering = threading.local()  # .results: once_per_render results for the render running on this thread
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        """The series for these label values, in labelnames order; created on first use."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}.")
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _series(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._series():
+            lines.extend(child.render(self, values))
+        return lines
+
+
+class _Value:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def render(self, metric, values):
+        return [f"{metric.name}{_label_text(metric.labelnames, values)} {_format_value(self.value)}"]
+
+
+class _CounterValue(_Value):
+    __slots__ = ()
+
+    def inc(self, amount=1.0):
+        if amount < 0:
+            raise ValueError("Counters can only go up.")
+        _Value.inc(self, amount)
+
+
+class _GaugeValue(_Value):
+    __slots__ = ()
+
+    def set(self, value):
+        with self._lock:
+            self.value = float(value)
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1.0):
+        self._children[()].inc(amount)
+
+    def value(self, *labels):
+        return self.labels(*labels).value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value):
+        self._children[()].set(value)
+
+    def inc(self, amount=1.0):
+        self._children[()].inc(amount)
+
+    def dec(self, amount=1.0):
+        self._children[()].dec(amount)
+
+
+class CallbackGauge(_Metric):
+    """A gauge read when the metrics are rendered: func() returns a number, or {label values tuple: number}.
+
+    If func raises, the gauge is left out of that render rather than
+    breaking the whole export.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help_text, func, labelnames=()):
+        self.func = func
+        super().__init__(name, help_text, labelnames)
+        self._children.clear()
+
+    def _new_child(self):
+        return None
+
+    def render(self):
+        try:
+            result = self.func()
+        except Exception:
+            return []
+        if not isinstance(result, dict):
+            result = {(): result}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in result.items():
+            values = values if isinstance(values, tuple) else (values,)
+            lines.append(f"{self.name}{_label_text(self.labelnames, values)} {_format_value(float(value))}")
+        return lines
+
+
+class _HistogramValue:
+    __slots__ = ("_lock", "bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self._lock = threading.Lock()
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.bounds):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def render(self, metric, values):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.bounds, counts):
+            cumulative += n
+            le = _label_text(metric.labelnames, values, [("le", _format_value(float(bound)))])
+            lines.append(f"{metric.name}_bucket{le} {cumulative}")
+        lines.append(f"{metric.name}_bucket{_label_text(metric.labelnames, values, [('le', '+Inf')])} {count}")
+        lines.append(f"{metric.name}_sum{_label_text(metric.labelnames, values)} {_format_value(total)}")
+        lines.append(f"{metric.name}_count{_label_text(metric.labelnames, values)} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        """Adds metric, or returns the one already registered under its name (e.g. after a module reload)."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"A different metric is already registered as {metric.name}.")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """The registry in Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        _rendering.results = {}
+        try:
+            for metric in metrics:
+                lines.extend(metric.render())
+        finally:
+            del _rendering.results
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text, labelnames=(), registry=REGISTRY):
+    return registry.register(Counter(name, help_text, labelnames))
+
+
+def once_per_render(func):
+    """Wraps func() so that callback gauges sharing it call it once per render, not once each."""
+    def shared():
+        results = getattr(_rendering, "results", None)
+        if results is None:
+            return func()
+        if shared not in results:
+            results[shared] = func()
+        return results[shared]
+    return shared
+
+
+def gauge(name, help_text, labelnames=(), registry=REGISTRY):
+    return registry.register(Gauge(name, help_text, labelnames))
+
+
+def callback_gauge(name, help_text, func, labelnames=(), registry=REGISTRY):
+    return registry.register(CallbackGauge(name, help_text, func, labelnames))
+
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+    return registry.register(Histogram(name, help_text, labelnames, buckets))
+
+
+# --- Exporters ---
+
+def serve_http(port, host="127.0.0.1", registry=REGISTRY):
+    """Serves GET /metrics on a daemon thread; returns the server (call shutdown() to stop it)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_file(path, registry=REGISTRY):
+    """Writes the metrics to path atomically (a scraper never sees a half-written file)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+class FileExporter:
+    """Rewrites a metrics file every `interval` seconds on a daemon thread until stop()."""
+
+    def __init__(self, path, interval=DEFAULT_FILE_INTERVAL, registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                write_file(self.path, self.registry)
+            except OSError as e:
+                print(f"metrics: could not write {self.path}: {e}", file=sys.stderr)
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        write_file(self.path, self.registry)  # leave the final numbers behind
+
+
+_exporters = []
+
+
+def start_exporters_from_env():
+    """Starts the exporters named by RENTAL_METRICS_PORT / RENTAL_METRICS_FILE, once per process."""
+    if _exporters:
+        return _exporters
+    port = os.environ.get("RENTAL_METRICS_PORT")
+    path = os.environ.get("RENTAL_METRICS_FILE")
+    if port:
+        try:
+            _exporters.append(serve_http(int(port), os.environ.get("RENTAL_METRICS_HOST", "127.0.0.1")))
+        except (OSError, ValueError) as e:  # e.g. another counter on this machine already has the port
+            print(f"metrics: not serving on port {port}: {e}", file=sys.stderr)
+    if path:
+        interval = float(os.environ.get("RENTAL_METRICS_INTERVAL", DEFAULT_FILE_INTERVAL))
+        _exporters.append(FileExporter(path, interval))
+    return _exporters
@@ -0,0 +1,524 @@
+"""Versioned schema migrations for rental.db.
+
+The schema version lives in PRAGMA user_version. Each step in MIGRATIONS moves
+the database from version N-1 to N inside its own BEGIN IMMEDIATE transaction,
+and bumps user_version in that same transaction, so a crash or a second counter
+starting at the same time never leaves a half-applied step behind.
+
+To change the schema, append a new step; never edit one that has shipped.
+"""
+
+MIGRATIONS = []
+
+
+def migration(func):
+    """Registers func as the next migration step, in definition order."""
+    MIGRATIONS.append(func)
+    return func
+
+
+def latest_version():
+    return len(MIGRATIONS)
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def column_names(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def migrate(conn, progress=None):
+    """Applies every pending step on an autocommit connection.
+
+    Returns the number of steps applied. When the schema is already current
+    this is a single PRAGMA read and no DDL runs at all.
+    """
+    target = latest_version()
+    if current_version(conn) >= target:
+        return 0
+
+    applied = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another process may have migrated meanwhile.
+            version = current_version(conn)
+            if version >= target:
+                conn.rollback()
+                return applied
+            step = MIGRATIONS[version]
+            if progress:
+                progress(f"Applying migration {version + 1}/{target}: {step.__name__}")
+            step(conn)
+            conn.execute(f"PRAGMA user_version={version + 1}")
+            conn.commit()
+            applied += 1
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+
+# --- Steps -------------------------------------------------------------------
+
+@migration
+def base_schema(conn):
+    """Core tables. Uses IF NOT EXISTS so pre-migration databases adopt it unchanged."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS Customer (
+        CustomerID INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        email TEXT UNIQUE,
+        phone TEXT,
+        drivers_license TEXT UNIQUE,
+        government_id TEXT
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS Vehicle (
+        VehicleID INTEGER PRIMARY KEY AUTOINCREMENT,
+        brand TEXT,
+        model TEXT,
+        year INTEGER,
+        plate TEXT UNIQUE,
+        vtype TEXT,
+        daily_rate REAL,
+        available INTEGER DEFAULT 1
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS Reservation (
+        ReservationID INTEGER PRIMARY KEY AUTOINCREMENT,
+        vehicle_id INTEGER,
+        customer_id INTEGER,
+        driver_flag INTEGER,
+        start_datetime TEXT,
+        end_datetime TEXT,
+        location TEXT,
+        driver_fee REAL,
+        total_cost REAL,
+        status TEXT DEFAULT 'active',
+        distance_km REAL DEFAULT 0.0,
+        FOREIGN KEY(vehicle_id) REFERENCES Vehicle(VehicleID),
+        FOREIGN KEY(customer_id) REFERENCES Customer(CustomerID)
+    )
+    """)
+
+    # Databases created before distance tracking have Reservation without this column.
+    if "distance_km" not in column_names(conn, "Reservation"):
+        conn.execute("ALTER TABLE Reservation ADD COLUMN distance_km REAL DEFAULT 0.0")
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS DamageContract (
+        ContractID INTEGER PRIMARY KEY AUTOINCREMENT,
+        reservation_id INTEGER,
+        condition TEXT,
+        damage_cost REAL,
+        notes TEXT,
+        created_at TEXT,
+        FOREIGN KEY(reservation_id) REFERENCES Reservation(ReservationID)
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS Payment (
+        PaymentID INTEGER PRIMARY KEY AUTOINCREMENT,
+        reservation_id INTEGER,
+        amount REAL,
+        status TEXT,
+        method TEXT,
+        frequency TEXT,
+        created_at TEXT,
+        FOREIGN KEY(reservation_id) REFERENCES Reservation(ReservationID)
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS Maintenance (
+        MaintenanceID INTEGER PRIMARY KEY AUTOINCREMENT,
+        vehicle_id INTEGER,
+        checklist TEXT,
+        cost REAL,
+        start_date TEXT,
+        end_date TEXT,
+        notes TEXT,
+        status TEXT DEFAULT 'active',
+        FOREIGN KEY(vehicle_id) REFERENCES Vehicle(VehicleID)
+    )
+    """)
+
+
+@migration
+def hot_path_indexes(conn):
+    """Indexes for availability, booking lists, returns and maintenance.
+
+    The partial indexes hold active rows only, so they stay small however much
+    returned/completed history builds up.
+    """
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_reservation_vehicle_window
+                    ON Reservation(vehicle_id, status, start_datetime, end_datetime)""")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_reservation_active_window
+                    ON Reservation(start_datetime, end_datetime) WHERE status='active'""")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_payment_reservation
+                    ON Payment(reservation_id, method)""")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_damage_reservation
+                    ON DamageContract(reservation_id, damage_cost)""")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_maintenance_active
+                    ON Maintenance(vehicle_id) WHERE status='active'""")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_vehicle_catalog
+                    ON Vehicle(vtype, brand, year, model, available, plate)""")
+
+
+@migration
+def usage_rollups(conn):
+    """Per-vehicle and per-location report totals, kept current by triggers on Reservation.
+
+    A reservation counts towards the vehicle rollup while it is active or
+    returned and both its dates parse, and towards the location rollup while
+    it is active or returned and has a location. Every INSERT, DELETE or
+    relevant UPDATE on Reservation takes its old contribution out and puts
+    its new one in, so bookings, extensions and returns from any code path or
+    process keep the totals exact. Durations are whole milliseconds and
+    distances whole metres, so adding and subtracting never drifts.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS VehicleUsageRollup (
+        vehicle_id INTEGER PRIMARY KEY,
+        reservation_count INTEGER NOT NULL DEFAULT 0,
+        duration_ms INTEGER NOT NULL DEFAULT 0,
+        distance_m INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS LocationUsageRollup (
+        location TEXT PRIMARY KEY NOT NULL,
+        reservation_count INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+
+    def vehicle_counted(row):
+        return (f"{row}.vehicle_id IS NOT NULL AND {row}.status IN ('active', 'returned') "
+                f"AND julianday({row}.start_datetime) IS NOT NULL AND julianday({row}.end_datetime) IS NOT NULL")
+
+    def location_counted(row):
+        return f"{row}.status IN ('active', 'returned') AND {row}.location IS NOT NULL AND {row}.location != ''"
+
+    def duration_ms(row):
+        return (f"CAST(round((julianday({row}.end_datetime) - julianday({row}.start_datetime)) * 86400000.0) "
+                f"AS INTEGER)")
+
+    def distance_m(row):
+        return f"CAST(round(COALESCE({row}.distance_km, 0.0) * 1000.0) AS INTEGER)"
+
+    def add(row):
+        return f"""
+        INSERT INTO VehicleUsageRollup (vehicle_id, reservation_count, duration_ms, distance_m)
+        SELECT {row}.vehicle_id, 1, {duration_ms(row)}, {distance_m(row)}
+        WHERE {vehicle_counted(row)}
+        ON CONFLICT(vehicle_id) DO UPDATE SET
+            reservation_count = reservation_count + 1,
+            duration_ms = duration_ms + excluded.duration_ms,
+            distance_m = distance_m + excluded.distance_m;
+        INSERT INTO LocationUsageRollup (location, reservation_count)
+        SELECT {row}.location, 1
+        WHERE {location_counted(row)}
+        ON CONFLICT(location) DO UPDATE SET reservation_count = reservation_count + 1;
+        """
+
+    def subtract(row):
+        return f"""
+        UPDATE VehicleUsageRollup SET
+            reservation_count = reservation_count - 1,
+            duration_ms = duration_ms - {duration_ms(row)},
+            distance_m = distance_m - {distance_m(row)}
+        WHERE vehicle_id = {row}.vehicle_id AND {vehicle_counted(row)};
+        UPDATE LocationUsageRollup SET reservation_count = reservation_count - 1
+        WHERE location = {row}.location AND {location_counted(row)};
+        """
+
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_reservation_rollup_insert AFTER INSERT ON Reservation
+    BEGIN {add("NEW")} END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_reservation_rollup_delete AFTER DELETE ON Reservation
+    BEGIN {subtract("OLD")} END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_reservation_rollup_update
+    AFTER UPDATE OF vehicle_id, status, start_datetime, end_datetime, distance_km, location ON Reservation
+    BEGIN {subtract("OLD")} {add("NEW")} END
+    """)
+
+    conn.execute("DELETE FROM VehicleUsageRollup")
+    conn.execute("DELETE FROM LocationUsageRollup")
+    conn.execute(f"""
+    INSERT INTO VehicleUsageRollup (vehicle_id, reservation_count, duration_ms, distance_m)
+    SELECT r.vehicle_id, COUNT(*), SUM({duration_ms("r")}), SUM({distance_m("r")})
+    FROM Reservation r WHERE {vehicle_counted("r")}
+    GROUP BY r.vehicle_id
+    """)
+    conn.execute(f"""
+    INSERT INTO LocationUsageRollup (location, reservation_count)
+    SELECT r.location, COUNT(*)
+    FROM Reservation r WHERE {location_counted("r")}
+    GROUP BY r.location
+    """)
+
+
+@migration
+def fleet_version(conn):
+    """One-row counter bumped whenever the fleet's catalog data changes.
+
+    The in-memory vehicle catalog compares it to the value it loaded with, so
+    a vehicle added or sent to maintenance by any connection or process
+    invalidates it, while bookings, which never touch Vehicle, do not.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS FleetVersion (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO FleetVersion (id, version) VALUES (1, 0)")
+    bump = "UPDATE FleetVersion SET version = version + 1 WHERE id = 1;"
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_vehicle_fleet_insert AFTER INSERT ON Vehicle BEGIN {bump} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_vehicle_fleet_delete AFTER DELETE ON Vehicle BEGIN {bump} END")
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_vehicle_fleet_update
+    AFTER UPDATE OF vtype, brand, year, model, plate, available ON Vehicle
+    WHEN OLD.vtype IS NOT NEW.vtype OR OLD.brand IS NOT NEW.brand OR OLD.year IS NOT NEW.year
+      OR OLD.model IS NOT NEW.model OR OLD.plate IS NOT NEW.plate OR OLD.available IS NOT NEW.available
+    BEGIN {bump} END
+    """)
+
+
+@migration
+def listing_sort_indexes(conn):
+    """One index per sortable listing column, so each page is an index seek.
+
+    Every index implicitly ends in the rowid, which is the tiebreaker the
+    keyset pages in db.py sort by. Reservation listings only show active
+    rows, so those indexes are partial like the hot-path ones.
+    """
+    for column in ("model", "year", "vtype", "daily_rate"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_vehicle_{column} ON Vehicle({column})")
+    for column in ("ReservationID", "start_datetime", "end_datetime", "customer_id"):
+        conn.execute(f"""CREATE INDEX IF NOT EXISTS idx_reservation_active_{column.lower()}
+                         ON Reservation({column}) WHERE status='active'""")
+    # location may be NULL, and a NULL never compares past a cursor, so it is sorted as ''.
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_reservation_active_location
+                    ON Reservation(ifnull(location, '')) WHERE status='active'""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_name ON Customer(name)")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_maintenance_active_id
+                    ON Maintenance(MaintenanceID) WHERE status='active'""")
+
+
+@migration
+def search_index(conn):
+    """FTS5 index over customers, vehicles, damage contracts and maintenance records.
+
+    One document per record, rowid = key * 8 + kind code, so the triggers
+    below replace or drop a record's document by rowid and a search can
+    fetch the newest matches first.
+    """
+    # What each kind of record contributes to SearchIndex: (kind, code, table,
+    # key column, columns whose change re-indexes the row, title SQL, body SQL).
+    # {row} is NEW or OLD inside the triggers and the table itself for the backfill.
+    sources = (
+        ("customer", 1, "Customer", "CustomerID", "name, email, phone, drivers_license",
+         "{row}.name",
+         "ifnull({row}.email, '') || ' ' || ifnull({row}.phone, '') || ' ' || ifnull({row}.drivers_license, '')"),
+        ("vehicle", 2, "Vehicle", "VehicleID", "brand, model, year, plate, vtype",
+         "ifnull({row}.brand, '') || ' ' || ifnull({row}.model, '')",
+         "ifnull({row}.plate, '') || ' ' || ifnull({row}.vtype, '') || ' ' || ifnull({row}.year, '')"),
+        ("damage", 3, "DamageContract", "ContractID", "condition, notes",
+         "{row}.condition", "{row}.notes"),
+        ("maintenance", 4, "Maintenance", "MaintenanceID", "checklist, notes",
+         "{row}.checklist", "{row}.notes"),
+    )
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS SearchIndex USING fts5(
+        kind UNINDEXED, ref_id UNINDEXED, title, body,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3'
+    )
+    """)
+    for kind, code, table, key, columns, title, body in sources:
+        def document(row):
+            return (f"INSERT INTO SearchIndex (rowid, kind, ref_id, title, body) VALUES "
+                    f"({row}.{key} * 8 + {code}, '{kind}', {row}.{key}, "
+                    f"{title.format(row=row)}, {body.format(row=row)});")
+        drop = f"DELETE FROM SearchIndex WHERE rowid = OLD.{key} * 8 + {code};"
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_search_insert "
+                     f"AFTER INSERT ON {table} BEGIN {document('NEW')} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_search_update "
+                     f"AFTER UPDATE OF {columns} ON {table} BEGIN {drop} {document('NEW')} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_search_delete "
+                     f"AFTER DELETE ON {table} BEGIN {drop} END")
+        conn.execute(f"INSERT INTO SearchIndex (rowid, kind, ref_id, title, body) "
+                     f"SELECT {key} * 8 + {code}, '{kind}', {key}, {title.format(row=table)}, {body.format(row=table)} "
+                     f"FROM {table}")
+
+
+def customer_keys(email, license, phone):
+    """(email_key, license_key, phone_key): the normalized forms customers are matched on.
+
+    Email and license are trimmed and case-folded, the phone keeps only its
+    digits. Blank values, and a license of "N/A", have no key. db.py keys
+    new customers with this same function.
+    """
+    email = (email or "").strip().casefold()
+    license = (license or "").strip()
+    phone = "".join(ch for ch in (phone or "") if ch.isdigit())
+    return (email or None,
+            license.casefold() if license and license.upper() != "N/A" else None,
+            phone or None)
+
+
+@migration
+def customer_lookup_keys(conn):
+    """Normalized email/license/phone keys on Customer, for upserts and lookups.
+
+    email_key and license_key are UNIQUE, so a booking can resolve its
+    customer with INSERT ... ON CONFLICT instead of catching IntegrityError.
+    Where existing customers differ only in case or spacing, the oldest keeps
+    the key and later copies get none: their reservations stay theirs, and new
+    bookings resolve to the oldest record. name also gets a NOCASE index for
+    prefix (autocomplete) lookups.
+    """
+    existing = column_names(conn, "Customer")
+    for column in ("email_key", "license_key", "phone_key"):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE Customer ADD COLUMN {column} TEXT")
+
+    seen_emails, seen_licenses, keys = set(), set(), []
+    for customer_id, email, license, phone in conn.execute(
+            "SELECT CustomerID, email, drivers_license, phone FROM Customer ORDER BY CustomerID"):
+        email_key, license_key, phone_key = customer_keys(email, license, phone)
+        if email_key in seen_emails:
+            email_key = None
+        if license_key in seen_licenses:
+            license_key = None
+        seen_emails.add(email_key)
+        seen_licenses.add(license_key)
+        keys.append((email_key, license_key, phone_key, customer_id))
+    conn.executemany("UPDATE Customer SET email_key=?, license_key=?, phone_key=? WHERE CustomerID=?", keys)
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_customer_email_key ON Customer(email_key)")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_customer_license_key ON Customer(license_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_phone_key ON Customer(phone_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_name_nocase ON Customer(name COLLATE NOCASE)")
+
+
+@migration
+def null_safe_sort_indexes(conn):
+    """Rebuilds the listing_sort_indexes on the ifnull() sort keys db.py pages by.
+
+    A NULL in a cursor made every later row compare as NULL, so paging by a
+    column with NULLs stopped early. db.py now sorts NULL as '' or 0, and an
+    index has to hold that same expression for the page seek to use it.
+    """
+    for column in ("model", "year", "vtype", "daily_rate"):
+        conn.execute(f"DROP INDEX IF EXISTS idx_vehicle_{column}")
+    for column, empty in (("model", "''"), ("year", "0"), ("plate", "''"), ("vtype", "''"), ("daily_rate", "0")):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_vehicle_{column}_sort ON Vehicle(ifnull({column}, {empty}))")
+    for column in ("start_datetime", "end_datetime"):
+        conn.execute(f"DROP INDEX IF EXISTS idx_reservation_active_{column}")
+        conn.execute(f"""CREATE INDEX IF NOT EXISTS idx_reservation_active_{column}_sort
+                         ON Reservation(ifnull({column}, '')) WHERE status='active'""")
+    conn.execute("DROP INDEX IF EXISTS idx_customer_name")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_name_sort ON Customer(ifnull(name, ''))")
+
+
+@migration
+def fleet_counts(conn):
+    """One-row vehicle, in-maintenance and active-reservation totals, kept current by triggers.
+
+    The fleet metrics read this row on every scrape instead of reloading
+    the availability index, which any commit by another process makes stale.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS FleetCounts (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        vehicles INTEGER NOT NULL,
+        in_maintenance INTEGER NOT NULL,
+        active_reservations INTEGER NOT NULL
+    )
+    """)
+    conn.execute("""
+    INSERT OR REPLACE INTO FleetCounts (id, vehicles, in_maintenance, active_reservations)
+    SELECT 1, (SELECT COUNT(*) FROM Vehicle), (SELECT COUNT(*) FROM Vehicle WHERE available IS 0),
+           (SELECT COUNT(*) FROM Reservation WHERE status IS 'active')
+    """)
+
+    def change(column, delta):
+        return f"UPDATE FleetCounts SET {column} = {column} + ({delta}) WHERE id = 1;"
+
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_vehicle_counts_insert AFTER INSERT ON Vehicle
+    BEGIN {change("vehicles", "1")} {change("in_maintenance", "NEW.available IS 0")} END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_vehicle_counts_delete AFTER DELETE ON Vehicle
+    BEGIN {change("vehicles", "-1")} {change("in_maintenance", "-(OLD.available IS 0)")} END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_vehicle_counts_update AFTER UPDATE OF available ON Vehicle
+    WHEN (OLD.available IS 0) != (NEW.available IS 0)
+    BEGIN {change("in_maintenance", "(NEW.available IS 0) - (OLD.available IS 0)")} END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_reservation_counts_insert AFTER INSERT ON Reservation
+    WHEN NEW.status IS 'active'
+    BEGIN {change("active_reservations", "1")} END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_reservation_counts_delete AFTER DELETE ON Reservation
+    WHEN OLD.status IS 'active'
+    BEGIN {change("active_reservations", "-1")} END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_reservation_counts_update AFTER UPDATE OF status ON Reservation
+    WHEN (OLD.status IS 'active') != (NEW.status IS 'active')
+    BEGIN {change("active_reservations", "(NEW.status IS 'active') - (OLD.status IS 'active')")} END
+    """)
+
+
+@migration
+def schedule_version(conn):
+    """One-row counter bumped by every change the availability index depends on.
+
+    PRAGMA data_version only says that some other connection committed, and
+    goes up once however many commits it missed, so it cannot tell a writer's
+    own commit apart from its commit plus someone else's. This counter goes
+    up with every row change: a writer that reads it before and after its own
+    changes knows exactly which values are its own.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ScheduleVersion (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO ScheduleVersion (id, version) VALUES (1, 0)")
+    bump = "UPDATE ScheduleVersion SET version = version + 1 WHERE id = 1;"
+    for table in ("Vehicle", "Reservation"):
+        for event in ("INSERT", "DELETE"):
+            conn.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_schedule_{event.lower()}
+                             AFTER {event} ON {table} BEGIN {bump} END""")
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_vehicle_schedule_update AFTER UPDATE OF available ON Vehicle
+    WHEN OLD.available IS NOT NEW.available
+    BEGIN {bump} END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_reservation_schedule_update
+    AFTER UPDATE OF vehicle_id, status, start_datetime, end_datetime ON Reservation
+    WHEN OLD.vehicle_id IS NOT NEW.vehicle_id OR OLD.status IS NOT NEW.status
+      OR OLD.start_datetime IS NOT NEW.start_datetime OR OLD.end_datetime IS NOT NEW.end_datetime
+    BEGIN {bump} END
+    """)
@@ -0,0 +1,128 @@
+"""Prices many rental quotes at once, with the arithmetic of db.calculate_cost.
+
+A quote is a daily rate, a pickup and a return time, and whether a company
+driver is added. Days are billed like db.billable_days: any part of a day
+counts, with a one-day minimum. The base cost is rate * days, the driver fee
+is fee_per_day * days, and the total is their sum.
+
+With NumPy installed, timestamps without a UTC offset are parsed by NumPy,
+and the day counts and costs are computed over whole arrays. Without it,
+every distinct timestamp is parsed once with datetime.fromisoformat and the
+same float operations run in a loop. Either way each result is the float
+calculate_cost returns for that quote.
+"""
+import math
+import warnings
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # optional; price() falls back to a plain loop
+    np = None
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+SECONDS_PER_DAY = 24 * 3600
+
+
+def _instant(value):
+    """(microseconds since EPOCH, is timezone-aware) for an ISO string or datetime.
+
+    Aware times are counted in UTC, which is how Python subtracts two of them.
+    """
+    dt = datetime.fromisoformat(value) if isinstance(value, str) else value
+    offset = dt.utcoffset()
+    if offset is None:
+        return (dt - EPOCH) // MICROSECOND, False
+    return (dt.replace(tzinfo=None) - offset - EPOCH) // MICROSECOND, True
+
+
+def per_quote(values, count):
+    """values as a list of count items; a single value (a string, datetime or flag) is repeated."""
+    if isinstance(values, (str, datetime)) or not isinstance(values, Iterable):
+        return [values] * count
+    values = list(values)
+    if len(values) != count:
+        raise ValueError(f"Expected {count} values, got {len(values)}.")
+    return values
+
+
+def _durations(starts, ends):
+    """Microseconds from each start to its end, as a list of ints."""
+    parsed = {}
+    durations = []
+    for start, end in zip(starts, ends):
+        begin = parsed.get(start)
+        if begin is None:
+            begin = parsed[start] = _instant(start)
+        finish = parsed.get(end)
+        if finish is None:
+            finish = parsed[end] = _instant(end)
+        if begin[1] != finish[1]:
+            raise TypeError("can't subtract offset-naive and offset-aware datetimes")
+        durations.append(finish[0] - begin[0])
+    return durations
+
+
+def _instants_numpy(values, count):
+    """Microseconds since EPOCH as an int64 array (length 1 for a single value), or None.
+
+    None means some value is not a plain ISO timestamp NumPy reads the way
+    datetime.fromisoformat does, e.g. one with a UTC offset.
+    """
+    single = isinstance(values, (str, datetime))
+    values = [values] if single else list(values)
+    # NumPy also reads "2030", "2030-01" and "now", which fromisoformat rejects.
+    if any(isinstance(value, str) and len(value) < len("YYYY-MM-DD") for value in values):
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # NumPy only warns when it drops a UTC offset
+        try:
+            parsed = np.array(values, dtype="datetime64[us]")
+        except (ValueError, TypeError, UserWarning):
+            return None
+    if not single and len(parsed) != count:
+        raise ValueError(f"Expected {count} values, got {len(parsed)}.")
+    if np.isnat(parsed).any():
+        return None
+    return parsed.astype(np.int64)
+
+
+def _durations_numpy(starts, ends, count):
+    begin = _instants_numpy(starts, count)
+    finish = _instants_numpy(ends, count) if begin is not None else None
+    if finish is None:
+        return np.array(_durations(per_quote(starts, count), per_quote(ends, count)), dtype=np.int64)
+    return finish - begin
+
+
+def price(rates, starts, ends, driver_flags, fee_per_day):
+    """(totals, driver_fees) as lists of floats, one per quote, in input order.
+
+    rates is a sequence of daily rates. starts and ends are sequences of ISO
+    strings or datetimes, or a single one for every quote. driver_flags is
+    a sequence of bools, or one bool for all.
+    """
+    rates = list(rates)
+    count = len(rates)
+    flags = per_quote(driver_flags, count)
+
+    if np is None:
+        durations = _durations(per_quote(starts, count), per_quote(ends, count))
+        totals, fees = [], []
+        for rate, duration, flag in zip(rates, durations, flags):
+            rental_days = duration / 10**6 / SECONDS_PER_DAY
+            days = math.ceil(rental_days) if rental_days > 0 else 1
+            fee = fee_per_day * days if flag else 0.0
+            totals.append(rate * days + fee)
+            fees.append(fee)
+        return totals, fees
+
+    # The same operations as billable_days and calculate_cost, elementwise:
+    # int microseconds / 1e6 is timedelta.total_seconds(), correctly rounded.
+    rental_days = _durations_numpy(starts, ends, count) / 1e6 / SECONDS_PER_DAY
+    days = np.where(rental_days > 0, np.ceil(rental_days), 1.0)
+    fees = np.where(np.fromiter(map(bool, flags), dtype=bool, count=count), fee_per_day * days, 0.0)
+    totals = np.array(rates, dtype=np.float64) * days + fees
+    return totals.tolist(), fees.tolist()
@@ -1,14 +1,113 @@
+import base64
+import json
+import time
 import db
-from datetime import datetime
+import change_bus
+import metrics
+import quote_engine
+from change_bus import ChangeBus
+from datetime import date, datetime
 
-class Customer:
-    def __init__(self, name, phone, email, drivers_license=None):
+BOOKINGS = metrics.counter("rental_bookings_total", "Reservation attempts by outcome (booked, unavailable, failed).",
+                           ("outcome",))
+BOOKING_SECONDS = metrics.histogram("rental_booking_seconds", "Time to make a reservation, including its group commit.")
+OPERATIONS = metrics.counter("rental_operations_total", "Completed writes other than bookings, by operation.",
+                             ("operation",))
+REPORT_SECONDS = metrics.histogram("rental_report_seconds", "Time to build a report.", ("report",))
+# A dropdown longer than this is unusable anyway; the Reservations tab pages through the rest.
+DROPDOWN_LIMIT = 500
+
+def _encode_cursor(values):
+    """Turns a db.py page cursor (a tuple of sort values) into an opaque URL-safe token."""
+    if values is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(token):
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except ValueError:
+        raise ValueError("Invalid page cursor.")
+    if not isinstance(values, list):
+        raise ValueError("Invalid page cursor.")
+    return tuple(values)
+
+def _parse_time(value, name):
+    """datetime for an ISO 8601 pickup/return time; ValueError (an API 400) for anything else."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name} time {value!r}; use ISO 8601, e.g. 2030-01-01T09:00.")
+
+def _check_window(start_iso, end_iso):
+    """Raises ValueError unless both times are ISO 8601 and the return comes after the pickup."""
+    start, end = _parse_time(start_iso, "pickup"), _parse_time(end_iso, "return")
+    try:
+        inverted = end <= start
+    except TypeError:
+        raise ValueError("Pickup and return times must both have a UTC offset or both have none.")
+    if inverted:
+        raise ValueError("Return must be after pickup.")
+
+class DictRow:
+    """Dict-style reads (row["plate"], get, keys, as_dict) for the slotted row classes below.
+
+    Listings used to be lists of dicts; these rows answer the same keys
+    without a per-row dict. FIELDS maps each old key, in column order, to
+    the attribute that holds it. from_row(cursor, row) is a sqlite3 row
+    factory, so db.py builds the objects straight from the cursor.
+    """
+    __slots__ = ()
+    FIELDS = {}
+
+    def __getitem__(self, key):
+        attr = self.FIELDS.get(key)
+        if attr is None:
+            raise KeyError(key)
+        return getattr(self, attr)
+
+    def get(self, key, default=None):
+        attr = self.FIELDS.get(key)
+        return default if attr is None else getattr(self, attr)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def keys(self):
+        return self.FIELDS.keys()
+
+    def as_dict(self):
+        return {key: getattr(self, attr) for key, attr in self.FIELDS.items()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+class Customer(DictRow):
+    __slots__ = ("customerID", "name", "phoneNumber", "email", "driversLicense")
+    FIELDS = {"id": "customerID", "name": "name", "phone": "phoneNumber", "email": "email",
+              "drivers_license": "driversLicense"}
+
+    def __init__(self, name, phone, email, drivers_license=None, customer_id=None):
+        self.customerID = customer_id
         self.name = name
         self.phoneNumber = phone
         self.email = email
         self.driversLicense = drivers_license if drivers_license else None
 
-class Vehicle:
+    @classmethod
+    def from_row(cls, cursor, row):
+        customer_id, name, phone, email, license = row
+        return cls(name, phone, email, license, customer_id)
+
+class Vehicle(DictRow):
+    __slots__ = ("vehicleID", "brand", "year", "model", "licensePlate", "type", "basePrice", "available")
+    FIELDS = {"VehicleID": "vehicleID", "brand": "brand", "model": "model", "year": "year",
+              "plate": "licensePlate", "vtype": "type", "daily_rate": "basePrice"}
+
     def __init__(self, brand, model, year, plate, vtype, base_price, vehicle_id=None, available=True):
         self.vehicleID = vehicle_id
         self.brand = brand
@@ -19,6 +118,48 @@ class Vehicle:
         self.basePrice = base_price
         self.available = available
 
+    @classmethod
+    def from_row(cls, cursor, row):
+        vehicle_id, brand, model, year, plate, vtype, rate = row
+        return cls(brand, model, year, plate, vtype, rate, vehicle_id)
+
+class Reservation(DictRow):
+    """An active reservation as listed: vehicle plate and model, customer name, dates and location."""
+    __slots__ = ("reservationID", "plate", "model", "customerName", "startDatetime", "endDatetime", "status", "location")
+    FIELDS = {"ReservationID": "reservationID", "plate": "plate", "model": "model", "customer_name": "customerName",
+              "start_datetime": "startDatetime", "end_datetime": "endDatetime", "status": "status",
+              "location": "location"}
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        self = cls.__new__(cls)
+        (self.reservationID, self.plate, self.model, self.customerName,
+         self.startDatetime, self.endDatetime, self.status, self.location) = row
+        return self
+
+class Booking(Reservation):
+    """A reservation on the calendar (get_bookings_for_date); like Reservation, without the status."""
+    __slots__ = ()
+    FIELDS = {key: attr for key, attr in Reservation.FIELDS.items() if key != "status"}
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        self = cls.__new__(cls)
+        (self.reservationID, self.plate, self.model, self.customerName,
+         self.startDatetime, self.endDatetime, self.location) = row
+        self.status = "active"
+        return self
+
+class DamageRecord(DictRow):
+    __slots__ = ("condition", "cost", "notes", "createdAt")
+    FIELDS = {"condition": "condition", "damage_cost": "cost", "notes": "notes", "created_at": "createdAt"}
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        self = cls.__new__(cls)
+        self.condition, self.cost, self.notes, self.createdAt = row
+        return self
+
 class Documentation:
     def __init__(self, reservation_id, doc_type="DamageContract"):
         self.reservationID = reservation_id
@@ -28,35 +169,60 @@ class Documentation:
         """Creates a damage record in the database using db.py."""
         db.add_damage(self.reservationID, condition, cost, notes)
 
-class MaintenanceRecord:
+class MaintenanceRecord(DictRow):
+    __slots__ = ("maintenanceID", "vehicleID", "plate", "brand", "model", "checklist", "cost", "startDate", "notes")
+    FIELDS = {"MaintenanceID": "maintenanceID", "plate": "plate", "brand": "brand", "model": "model",
+              "checklist": "checklist", "cost": "cost", "start_date": "startDate", "notes": "notes"}
+
     def __init__(self, vehicle_id, checklist, cost, notes):
+        self.maintenanceID = None
         self.vehicleID = vehicle_id
+        self.plate = self.brand = self.model = self.startDate = None
         self.checklist = checklist
         self.cost = cost
         self.notes = notes
 
+    @classmethod
+    def from_row(cls, cursor, row):
+        """An active record as listed; vehicleID is not part of the listing and stays None."""
+        self = cls.__new__(cls)
+        self.vehicleID = None
+        (self.maintenanceID, self.plate, self.brand, self.model,
+         self.checklist, self.cost, self.startDate, self.notes) = row
+        return self
+
 class VehicleRentalService:
-    def __init__(self):
-        pass
+    def __init__(self, changes=None):
+        # Every successful write below is announced on this bus (see change_bus.py).
+        self.changes = changes if changes is not None else ChangeBus()
+
+    def prepare_storage(self):
+        """Creates or migrates the database schema; must run before any other call."""
+        db.init_db()
 
     def add_new_vehicle(self, vehicle: Vehicle):
-        return db.add_vehicle(vehicle.brand, vehicle.model, vehicle.year, vehicle.licensePlate, vehicle.type, vehicle.basePrice)
+        ok, msg = db.add_vehicle(vehicle.brand, vehicle.model, vehicle.year, vehicle.licensePlate, vehicle.type, vehicle.basePrice)
+        if ok:
+            OPERATIONS.labels("vehicle_added").inc()
+            self.changes.publish(change_bus.VEHICLE_ADDED, vehicle.licensePlate)
+        return ok, msg
 
     def get_all_vehicles(self):
-        """Fetches vehicles and converts tuples to dicts for the GUI."""
-        rows = db.get_all_vehicles()
-        result = []
-        for r in rows:
-            result.append({
-                "VehicleID": r[0],
-                "brand": r[1],
-                "model": r[2],
-                "year": r[3],
-                "plate": r[4],
-                "vtype": r[5],
-                "daily_rate": r[6]
-            })
-        return result
+        """All vehicles as Vehicle rows (which also read like the old dicts: row["plate"])."""
+        return db.get_all_vehicles(Vehicle.from_row)
+
+    def get_vehicles_page(self, sort="VehicleID", descending=False, cursor=None, limit=db.DEFAULT_PAGE_SIZE,
+                          search=None):
+        """One page of vehicles: {"rows": [get_all_vehicles dicts], "next_cursor": token or None}.
+
+        Pass next_cursor back, with the same sort, direction and search, for the page after.
+        """
+        rows, next_cursor = db.get_vehicles_page(sort, descending, _decode_cursor(cursor), limit, search, Vehicle.from_row)
+        return {"rows": rows, "next_cursor": _encode_cursor(next_cursor)}
+
+    def get_vehicle_by_plate(self, plate):
+        """One vehicle in the get_all_vehicles format, or None."""
+        return db.get_vehicle_by_plate(plate, Vehicle.from_row)
 
     def get_vehicle_types(self):
         return db.get_vehicle_types()
@@ -72,70 +238,131 @@ class VehicleRentalService:
         """UPDATED: Filters models by type, brand, and year."""
         return db.get_models_by_type_brand_and_year(vtype, brand, year)
 
-    def get_available_vehicles_list(self, vtype, brand, year, model):
-        """UPDATED: Filters available vehicles by type, brand, year, and model."""
+    def get_catalog_counts(self, vtype=None, brand=None, year=None, model=None):
+        """(in service, total) vehicles for a dropdown selection; omit trailing levels to widen it."""
+        return db.get_catalog_counts(vtype, brand, year, model)
+
+    def get_available_vehicles_list(self, vtype, brand, year, model, start_iso=None, end_iso=None, driver_flag=False):
+        """Filters available vehicles by type, brand, year, and model.
+
+        With a pickup/return window, only vehicles free for that window are listed,
+        each with its quoted total: 'ID - Plate (₱total)'.
+        """
+        if start_iso and end_iso:
+            _check_window(start_iso, end_iso)
+            rows = db.search_available_vehicles(start_iso, end_iso, vtype, brand, year, model, driver_flag=driver_flag)
+            return [f"{r[0]} - {r[4]} (₱{r[7]:.2f})" for r in rows]
         return db.get_available_vehicles_by_model(vtype, brand, year, model)
+
+    def search_available_vehicles(self, start_iso, end_iso, vtype=None, brand=None, year=None, model=None,
+                                  min_rate=None, max_rate=None, driver_flag=False, limit=None):
+        """Vehicles free for the whole window, with quoted prices, as dicts for the GUI."""
+        _check_window(start_iso, end_iso)
+        rows = db.search_available_vehicles(start_iso, end_iso, vtype, brand, year, model,
+                                            min_rate, max_rate, driver_flag, limit)
+        result = []
+        for r in rows:
+            result.append({
+                "VehicleID": r[0],
+                "brand": r[1],
+                "model": r[2],
+                "year": r[3],
+                "plate": r[4],
+                "vtype": r[5],
+                "daily_rate": r[6],
+                "total_cost": r[7],
+                "driver_fee": r[8]
+            })
+        return result
     
+    def quote_vehicles(self, vehicle_ids, starts, ends, driver_flags=False):
+        """Prices for many (vehicle, pickup, return) quotes at once, each equal to what booking would charge.
+
+        starts, ends and driver_flags are per-quote sequences, or one value for
+        every quote. Returns [{"VehicleID", "total_cost", "driver_fee"}] in order.
+        Every window is checked like a booking's before anything is priced.
+        """
+        vehicle_ids = list(vehicle_ids)
+        count = len(vehicle_ids)
+        checked = None
+        for window in zip(quote_engine.per_quote(starts, count), quote_engine.per_quote(ends, count)):
+            if window != checked:  # one window for every quote is checked once
+                _check_window(*window)
+                checked = window
+        totals, fees = db.quote_costs(vehicle_ids, starts, ends, driver_flags)
+        return [{"VehicleID": vid, "total_cost": total, "driver_fee": fee}
+                for vid, total, fee in zip(vehicle_ids, totals, fees)]
+
     def get_all_vehicle_list_fmt(self):
         return db.get_all_vehicle_list()
 
+    def find_customers(self, prefix, limit=10):
+        """Customers whose name (or, for digits, phone) starts with prefix, for autocomplete."""
+        return db.find_customers(prefix, limit, Customer.from_row)
+
+    def resolve_customers(self, customers):
+        """Customer ids for a list of Customer objects, in order, adding any that are new (e.g. for an import)."""
+        return db.resolve_customers(
+            [(c.name, c.phoneNumber, c.email, c.driversLicense) for c in customers])
+
     def make_reservation(self, vehicle_id, customer: Customer, start_iso, end_iso, driver_flag, location):
-        customer_id = db.find_or_create_customer(
-            customer.name, 
-            customer.phoneNumber, 
-            customer.email, 
-            customer.driversLicense
-        )
-        
-        if not db.is_vehicle_available(vehicle_id, start_iso, end_iso):
-             raise ValueError("Vehicle is unavailable for these dates.")
+        started = time.perf_counter()
+        try:
+            _check_window(start_iso, end_iso)
+            # Cheap in-memory pre-check; the booking transaction re-checks under the write lock.
+            if not db.is_vehicle_available(vehicle_id, start_iso, end_iso):
+                 raise db.ConflictError("Vehicle is unavailable for these dates.")
 
-        res_id, total_cost = db.create_reservation(
-            vehicle_id, customer_id, driver_flag, start_iso, end_iso, location
-        )
+            res_id, total_cost = db.submit_booking(
+                vehicle_id,
+                customer.name,
+                customer.phoneNumber,
+                customer.email,
+                customer.driversLicense,
+                start_iso, end_iso, driver_flag, location
+            ).result()
+        except Exception as e:
+            BOOKINGS.labels("unavailable" if isinstance(e, db.ConflictError) else "failed").inc()
+            raise
+        BOOKINGS.labels("booked").inc()
+        BOOKING_SECONDS.observe(time.perf_counter() - started)
+        self.changes.publish(change_bus.RESERVATION_CREATED, res_id)
         return res_id, total_cost
 
     def get_active_reservations(self):
-        rows = db.list_active_reservations()
-        result = []
-        for r in rows:
-            result.append({
-                "ReservationID": r[0],
-                "plate": r[1],
-                "model": r[2],
-                "customer_name": r[3],
-                "start_datetime": r[4],
-                "end_datetime": r[5],
-                "status": r[6],
-                "location": r[7]
-            })
-        return result
+        return db.list_active_reservations(Reservation.from_row)
+
+    def get_active_reservations_page(self, sort="start_datetime", descending=False, cursor=None,
+                                     limit=db.DEFAULT_PAGE_SIZE, search=None):
+        """One page of get_active_reservations, in the get_vehicles_page format."""
+        rows, next_cursor = db.list_active_reservations_page(sort, descending, _decode_cursor(cursor), limit, search,
+                                                             Reservation.from_row)
+        return {"rows": rows, "next_cursor": _encode_cursor(next_cursor)}
     
     def get_active_reservations_dates(self):
         return db.get_active_reservations_dates()
-    
-    def get_active_reservations_dropdown_fmt(self):
-        """Fetches active reservations formatted for a GUI dropdown: 'ID - Plate (Customer)'"""
-        rows = db.list_active_reservations()
+
+    def get_daily_booking_counts(self, first_day, last_day):
+        """Maps each datetime.date in first_day..last_day that has active bookings to how many."""
+        rows = db.get_daily_booking_counts(first_day.isoformat(), last_day.isoformat())
+        return {date.fromisoformat(day): count for day, count in rows}
+
+    def get_fleet_size(self):
+        return db.get_fleet_size()
+
+    def get_active_reservations_dropdown_fmt(self, limit=DROPDOWN_LIMIT):
+        """Fetches active reservations formatted for a GUI dropdown: 'ID - Plate (Customer)'
+
+        Only the first `limit`, by pickup time.
+        """
+        rows, _ = db.list_active_reservations_page("start_datetime", limit=limit)
         result = []
         for r in rows:
             result.append(f"{r[0]} - {r[1]} ({r[3]})")
         return result
 
     def get_bookings_for_date(self, start_day, end_day):
-        rows = db.get_bookings_for_date(start_day, end_day)
-        result = []
-        for r in rows:
-            result.append({
-                "ReservationID": r[0],
-                "plate": r[1],
-                "model": r[2],
-                "customer_name": r[3],
-                "start_datetime": r[4],
-                "end_datetime": r[5],
-                "location": r[6]
-            })
-        return result
+        return db.get_bookings_for_date(start_day, end_day, Booking.from_row)
 
     def get_reservation_details(self, rid):
         row = db.get_reservation_details(rid)
@@ -153,66 +380,84 @@ class VehicleRentalService:
         }
 
     def get_damage_contracts(self, rid):
-        rows = db.get_damage_contracts(rid)
-        result = []
-        for r in rows:
-            result.append({
-                "condition": r[0],
-                "damage_cost": r[1],
-                "notes": r[2],
-                "created_at": r[3]
-            })
-        return result
+        return db.get_damage_contracts(rid, DamageRecord.from_row)
 
     def finalize_return(self, rid, distance_km):
         base, dmg_total, vid = db.get_final_costs(rid)
         final_total = base + dmg_total
         
         db.finalize_reservation(rid, final_total, distance_km)
+        OPERATIONS.labels("return").inc()
+        self.changes.publish(change_bus.RESERVATION_RETURNED, rid)
         
         return base, dmg_total, final_total
     
     def update_reservation_return(self, res_id, new_end_iso):
-        return db.update_reservation_end_date(res_id, new_end_iso)
+        # The pickup time is read under the write lock, where db.py checks the new return is after it.
+        _parse_time(new_end_iso, "return")
+        new_total_cost = db.update_reservation_end_date(res_id, new_end_iso)
+        OPERATIONS.labels("extend").inc()
+        self.changes.publish(change_bus.RESERVATION_EXTENDED, res_id)
+        return new_total_cost
 
     def start_maintenance(self, record: MaintenanceRecord):
-        return db.start_maintenance(record.vehicleID, record.checklist, record.cost, record.notes)
+        success, msg = db.start_maintenance(record.vehicleID, record.checklist, record.cost, record.notes)
+        if success:
+            OPERATIONS.labels("maintenance_start").inc()
+            self.changes.publish(change_bus.MAINTENANCE_STARTED, record.vehicleID)
+        return success, msg
 
     def get_active_maintenance(self):
         """Fetches active maintenance records, including vehicle brand and model."""
-        rows = db.get_active_maintenance()
+        return db.get_active_maintenance(MaintenanceRecord.from_row)
+
+    def get_active_maintenance_page(self, sort="MaintenanceID", descending=False, cursor=None,
+                                    limit=db.DEFAULT_PAGE_SIZE, search=None):
+        """One page of get_active_maintenance, in the get_vehicles_page format."""
+        rows, next_cursor = db.get_active_maintenance_page(sort, descending, _decode_cursor(cursor), limit, search,
+                                                           MaintenanceRecord.from_row)
+        return {"rows": rows, "next_cursor": _encode_cursor(next_cursor)}
+
+    def finish_maintenance(self, mid):
+        db.finish_maintenance(mid)
+        OPERATIONS.labels("maintenance_finish").inc()
+        self.changes.publish(change_bus.MAINTENANCE_FINISHED, mid)
+        
+    def search(self, text, kinds=None, limit=20):
+        """Customers, vehicles, damage contracts and maintenance records matching text, best first."""
         result = []
-        for r in rows:
+        for kind, ref_id, title, snippet, plate, customer_name, reservation_id in db.search(text, kinds, limit):
             result.append({
-                "MaintenanceID": r[0],
-                "plate": r[1],
-                "brand": r[2],
-                "model": r[3],
-                "checklist": r[4],
-                "cost": r[5],
-                "start_date": r[6],
-                "notes": r[7]
+                "kind": kind,
+                "id": ref_id,
+                "title": title,
+                "snippet": snippet,
+                "plate": plate,
+                "customer_name": customer_name,
+                "reservation_id": reservation_id
             })
         return result
 
-    def finish_maintenance(self, mid):
-        db.finish_maintenance(mid)
-        
-    def get_usage_report(self):
+    def get_usage_report(self, start_iso=None, end_iso=None, vtype=None):
         """
-        Retrieves vehicle usage, formats total distance traveled, 
-        and formats the usage time for the report.
+        Retrieves vehicle usage (optionally for reservations starting in a date
+        range, or one vehicle type) and formats the usage time for the report.
         """
-        report_data = db.get_vehicle_usage_report()
+        started = time.perf_counter()
+        report_data = db.get_vehicle_usage_report(start_iso, end_iso, vtype)
         
         for item in report_data:
-            item['total_distance_km'] = item['total_distance_km']
             hours = item['usage_hours']
             days = int(hours // 24)
             remaining_hours = int(hours % 24)
             item['usage_display'] = f"{days} days, {remaining_hours} hours"
-            
+
+        REPORT_SECONDS.labels("usage" if start_iso is None and end_iso is None else "usage_by_date").observe(
+            time.perf_counter() - started)
         return report_data
     
     def get_location_report(self):
-        return db.get_location_usage_report()
+        started = time.perf_counter()
+        report = db.get_location_usage_report()
+        REPORT_SECONDS.labels("location").observe(time.perf_counter() - started)
+        return report
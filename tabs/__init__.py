@@ -1,8 +1,25 @@
-from .base_tab import BaseTab
-from .vehicles_tab import VehiclesTab
-from .rent_tab import RentTab
-from .calendar_tab import CalendarTab
-from .reservations_tab import ReservationsTab
-from .return_tab import ReturnTab
-from .maintenance_tab import MaintenanceTab
-from .report_tab import ReportTab
\ No newline at end of file
+import importlib
+
+# Tab classes are imported on first access (e.g. `from tabs import RentTab`), so
+# heavy dependencies such as tkcalendar load only when a tab that uses them is built.
+_TAB_MODULES = {
+    "BaseTab": "base_tab",
+    "VehiclesTab": "vehicles_tab",
+    "RentTab": "rent_tab",
+    "CalendarTab": "calendar_tab",
+    "ReservationsTab": "reservations_tab",
+    "ReturnTab": "return_tab",
+    "MaintenanceTab": "maintenance_tab",
+    "ReportTab": "report_tab",
+    "DiagnosticsTab": "diagnostics_tab",
+    "GlobalSearch": "global_search",
+}
+
+__all__ = list(_TAB_MODULES)
+
+
+def __getattr__(name):
+    module = _TAB_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
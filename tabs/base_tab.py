@@ -1,4 +1,5 @@
 import customtkinter as ctk
+from tkinter import messagebox
 
 class BaseTab(ctk.CTkFrame):
     def __init__(self, master, app_controller, **kwargs):
@@ -6,3 +7,30 @@ class BaseTab(ctk.CTkFrame):
         self.app_controller = app_controller 
         self.system = app_controller.system
         self.grid_columnconfigure(0, weight=1)
+
+    def refresh_on(self, kinds, refresh):
+        """Re-runs refresh() after the given change kinds (see change_bus), debounced, while this tab is showing."""
+        self.app_controller.watch(self, kinds, refresh)
+
+    def show_search(self, text):
+        """Puts text in this tab's search box and applies it; tabs without one ignore it."""
+        entry = getattr(self, "search_entry", None)
+        if entry is None:
+            return
+        entry.delete(0, "end")
+        entry.insert(0, text)
+        self.apply_search()
+
+    def run_in_background(self, func, *args, on_done=None, on_error=None, channel=None):
+        """Runs func(*args) (typically a self.system call) off the Tk thread.
+
+        on_done(result) then runs back on the Tk thread. A newer call with the
+        same channel name on this tab supersedes an unfinished one. Errors go to
+        on_error, or to an error dialog by default.
+        """
+        return self.app_controller.executor.submit(
+            func, *args, on_done=on_done, on_error=on_error or self.show_background_error,
+            channel=(id(self), channel) if channel else None)
+
+    def show_background_error(self, error):
+        messagebox.showerror("Error", str(error))
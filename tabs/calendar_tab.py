@@ -1,13 +1,28 @@
 import customtkinter as ctk
 from tkcalendar import Calendar
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from change_bus import RESERVATION_CHANGES, VEHICLE_ADDED
 from .base_tab import BaseTab # Import BaseTab
 
+# (share of the fleet booked, tag) pairs, checked in order.
+OCCUPANCY_LEVELS = [
+    (1 / 3, "occupancy_low"),
+    (2 / 3, "occupancy_medium"),
+    (1.0, "occupancy_high"),
+]
+OCCUPANCY_COLORS = {
+    "occupancy_low": "light sky blue",
+    "occupancy_medium": "royal blue",
+    "occupancy_high": "firebrick",
+}
+
 class CalendarTab(BaseTab):
     def __init__(self, master, app_controller):
         super().__init__(master, app_controller)
+        self._day_marks = {}  # date -> calevent id, one per marked day
         self.build_ui()
         self.refresh_marks()
+        self.refresh_on(RESERVATION_CHANGES + (VEHICLE_ADDED,), self.refresh_marks)
 
     def build_ui(self):
         tab = self
@@ -20,6 +35,9 @@ class CalendarTab(BaseTab):
         left.pack(side="left", padx=6, pady=6, fill="y")
         self.calendar = Calendar(left, selectmode="day", date_pattern="yyyy-mm-dd")
         self.calendar.pack(padx=6, pady=6)
+        for tag, color in OCCUPANCY_COLORS.items():
+            self.calendar.tag_config(tag, background=color, foreground="black" if tag == "occupancy_low" else "white")
+        self.calendar.bind("<<CalendarMonthChanged>>", lambda event: self.refresh_marks())
         ctk.CTkButton(left, text="Show Bookings for Date", command=self.show_bookings_for_date).pack(pady=6)
         ctk.CTkButton(left, text="Refresh Calendar", command=self.refresh_marks).pack(pady=6)
 
@@ -29,42 +47,46 @@ class CalendarTab(BaseTab):
         self.bookings_text = ctk.CTkTextbox(right, font=("Courier New", 12))
         self.bookings_text.pack(padx=6, pady=4, fill="both", expand=True)
 
+    def visible_range(self):
+        """First and last date of the six-week grid for the month the calendar shows."""
+        month, year = self.calendar.get_displayed_month()
+        first_of_month = date(year, month, 1)
+        week_start = 6 if self.calendar.cget("firstweekday") == "sunday" else 0
+        grid_start = first_of_month - timedelta(days=(first_of_month.weekday() - week_start) % 7)
+        return grid_start, grid_start + timedelta(days=41)
+
+    def occupancy_tag(self, count, fleet_size):
+        share = count / fleet_size
+        for limit, tag in OCCUPANCY_LEVELS:
+            if share <= limit:
+                return tag
+        return OCCUPANCY_LEVELS[-1][1]
+
     def refresh_marks(self):
-        try:
-            self.calendar.calevent_remove('all')
-        except:
-            pass
-            
-        rows = self.system.get_active_reservations_dates()
+        """Marks each visible day once, coloured by how much of the fleet is booked.
+
+        Only the displayed month's grid is queried. Existing marks are updated in
+        place; days that drop out of view or lose their last booking are unmarked.
+        """
+        first_day, last_day = self.visible_range()
+        fetch = lambda: (self.system.get_daily_booking_counts(first_day, last_day), self.system.get_fleet_size())
+        self.run_in_background(fetch, on_done=self._apply_marks, channel="marks")
 
-        for row in rows:
-            try:
-                s, e, rid = row
-            except Exception:
-                try:
-                    s = row['start_datetime']
-                    e = row['end_datetime']
-                    rid = row['ReservationID']
-                except Exception:
-                    try:
-                        vals = tuple(row)
-                        s, e, rid = vals[0], vals[1], vals[2]
-                    except Exception:
-                        continue
+    def _apply_marks(self, result):
+        counts, fleet_size = result
+        fleet_size = max(fleet_size, 1)
 
-            try:
-                sdt = datetime.fromisoformat(s)
-                edt = datetime.fromisoformat(e)
-            except Exception:
-                continue
+        for day in [day for day in self._day_marks if day not in counts]:
+            self.calendar.calevent_remove(self._day_marks.pop(day))
 
-            day = sdt.date()
-            while day <= edt.date():
-                try:
-                    self.calendar.calevent_create(day, f"Booked #{rid}", 'reserved')
-                except Exception:
-                    pass
-                day = day + timedelta(days=1)
+        for day, count in counts.items():
+            text = f"{count} active booking{'s' if count != 1 else ''}"
+            tag = self.occupancy_tag(count, fleet_size)
+            ev_id = self._day_marks.get(day)
+            if ev_id is None:
+                self._day_marks[day] = self.calendar.calevent_create(day, text, tag)
+            elif self.calendar.calevent_cget(ev_id, "text") != text or self.calendar.calevent_cget(ev_id, "tags") != [tag]:
+                self.calendar.calevent_configure(ev_id, text=text, tags=[tag])
 
     def show_bookings_for_date(self):
         sel = self.calendar.get_date()
@@ -72,8 +94,10 @@ class CalendarTab(BaseTab):
         start_day = datetime(dt_obj.year, dt_obj.month, dt_obj.day)
         end_day = start_day + timedelta(days=1)
         
-        rows = self.system.get_bookings_for_date(start_day.isoformat(), end_day.isoformat())
+        self.run_in_background(self.system.get_bookings_for_date, start_day.isoformat(), end_day.isoformat(),
+                               on_done=self._show_bookings, channel="bookings")
 
+    def _show_bookings(self, rows):
         self.bookings_text.configure(state="normal")
         self.bookings_text.delete("1.0", "end")
         if not rows:
@@ -0,0 +1,202 @@
+import customtkinter as ctk
+from tkinter import messagebox
+import db_stats
+from .base_tab import BaseTab
+from .virtual_table import VirtualTable
+from .table_model import TableModel
+
+AUTO_REFRESH_MS = 2000
+NUMERIC_COLUMNS = ('count', 'mean_ms', 'p95_ms', 'max_ms', 'rows', 'total_ms', 'errors')
+
+
+def short_sql(row):
+    sql = row['sql']
+    return sql if len(sql) <= 90 else sql[:87] + "..."
+
+
+class DiagnosticsTab(BaseTab):
+    """Live view of db_stats: timings per db.py call and per SQL statement, plus the slow-query log."""
+
+    def __init__(self, master, app_controller):
+        super().__init__(master, app_controller)
+        self.call_data = TableModel('name', self.sort_key, search_fields=('name',))
+        self.statement_data = TableModel('sql', self.sort_key, search_fields=('sql',))
+        self.call_sort_column = 'total_ms'
+        self.call_sort_reverse = True
+        self.statement_sort_column = 'total_ms'
+        self.statement_sort_reverse = True
+        self._refresh_job = None
+        self.build_ui()
+        self.refresh_stats()
+
+    def build_ui(self):
+        header = ctk.CTkLabel(self, text="Database Diagnostics", font=ctk.CTkFont(size=18, weight="bold"))
+        header.pack(pady=(10, 6))
+
+        controls = ctk.CTkFrame(self, fg_color="transparent")
+        controls.pack(fill="x", padx=10, pady=(0, 5))
+        self.record_var = ctk.BooleanVar(value=db_stats.active)
+        ctk.CTkSwitch(controls, text="Record timings", variable=self.record_var,
+                      command=self.toggle_recording).pack(side="left")
+        ctk.CTkLabel(controls, text="Slow query threshold (ms):").pack(side="left", padx=(20, 5))
+        self.slow_entry = ctk.CTkEntry(controls, width=70)
+        self.slow_entry.insert(0, f"{db_stats.snapshot()['slow_ms']:g}")
+        self.slow_entry.pack(side="left")
+        self.slow_entry.bind("<Return>", self.apply_threshold)
+        ctk.CTkButton(controls, text="Reset", width=80, command=self.reset_stats).pack(side="right")
+        ctk.CTkButton(controls, text="Refresh", width=80, command=self.refresh_stats).pack(side="right", padx=5)
+        self.search_entry = ctk.CTkEntry(controls, width=200, placeholder_text="Filter calls and SQL...")
+        self.search_entry.pack(side="right", padx=5)
+        self.search_entry.bind("<KeyRelease>", self.apply_search)
+
+        self.summary_label = ctk.CTkLabel(self, text="", text_color="gray", anchor="w")
+        self.summary_label.pack(fill="x", padx=14)
+
+        tables = ctk.CTkFrame(self)
+        tables.pack(fill="both", expand=True, padx=10, pady=5)
+        tables.grid_columnconfigure(0, weight=1)
+        tables.grid_rowconfigure(1, weight=1)
+        tables.grid_rowconfigure(3, weight=1)
+
+        ctk.CTkLabel(tables, text="db.py Calls", font=ctk.CTkFont(weight="bold")).grid(row=0, column=0, sticky="w", padx=5)
+        call_columns = [
+            ("Function", 'name', 4, "w", lambda row: row['name']),
+            ("Calls", 'count', 1, "e", lambda row: f"{row['count']}"),
+            ("Mean ms", 'mean_ms', 1, "e", lambda row: f"{row['mean_ms']:.2f}"),
+            ("p95 ms", 'p95_ms', 1, "e", lambda row: f"{row['p95_ms']:.2f}"),
+            ("Max ms", 'max_ms', 1, "e", lambda row: f"{row['max_ms']:.1f}"),
+            ("Rows", 'rows', 1, "e", lambda row: f"{row['rows']}"),
+            ("Errors", 'errors', 1, "e", lambda row: f"{row['errors']}"),
+            ("Total ms", 'total_ms', 1, "e", lambda row: f"{row['total_ms']:.0f}"),
+        ]
+        self.call_table = VirtualTable(tables, call_columns, on_sort=self.sort_calls,
+                                       empty_text="Nothing recorded. Switch on 'Record timings'.")
+        self.call_table.grid(row=1, column=0, sticky="nsew")
+
+        ctk.CTkLabel(tables, text="SQL Statements", font=ctk.CTkFont(weight="bold")).grid(row=2, column=0, sticky="w", padx=5)
+        statement_columns = [
+            ("Statement", 'sql', 8, "w", short_sql),
+            ("Runs", 'count', 1, "e", lambda row: f"{row['count']}"),
+            ("Mean ms", 'mean_ms', 1, "e", lambda row: f"{row['mean_ms']:.2f}"),
+            ("p95 ms", 'p95_ms', 1, "e", lambda row: f"{row['p95_ms']:.2f}"),
+            ("Rows", 'rows', 1, "e", lambda row: f"{row['rows']}"),
+            ("Total ms", 'total_ms', 1, "e", lambda row: f"{row['total_ms']:.0f}"),
+        ]
+        self.statement_table = VirtualTable(tables, statement_columns, on_sort=self.sort_statements,
+                                            empty_text="No statements recorded.")
+        self.statement_table.grid(row=3, column=0, sticky="nsew")
+
+        ctk.CTkLabel(self, text="Slow Queries (newest first)", font=ctk.CTkFont(weight="bold")).pack(anchor="w", padx=14)
+        self.slow_box = ctk.CTkTextbox(self, height=130, font=ctk.CTkFont(family="Courier", size=12))
+        self.slow_box.pack(fill="x", padx=10, pady=(0, 10))
+        self.slow_box.configure(state="disabled")
+
+    # --- Recording controls ---
+
+    def toggle_recording(self):
+        if self.record_var.get():
+            if not self.apply_threshold():
+                self.record_var.set(False)
+                return
+            db_stats.enable()
+        else:
+            db_stats.disable()
+        self.refresh_stats()
+
+    def apply_threshold(self, event=None):
+        try:
+            db_stats.set_slow_ms(float(self.slow_entry.get()))
+        except ValueError:
+            messagebox.showerror("Input Error", "The slow query threshold must be a number of milliseconds, 0 or more.")
+            return False
+        return True
+
+    def reset_stats(self):
+        db_stats.reset()
+        self.refresh_stats()
+
+    # --- Sorting ---
+
+    def sort_key(self, column_key):
+        if column_key in NUMERIC_COLUMNS:
+            return lambda x: x.get(column_key, 0)
+        return lambda x: x.get(column_key, '')
+
+    def sort_calls(self, column_key):
+        if self.call_sort_column == column_key:
+            self.call_sort_reverse = not self.call_sort_reverse
+        else:
+            self.call_sort_column = column_key
+            self.call_sort_reverse = column_key in NUMERIC_COLUMNS
+        self.call_data.sort(column_key, self.call_sort_reverse)
+        self.call_table.set_rows(self.call_data.rows)
+
+    def sort_statements(self, column_key):
+        if self.statement_sort_column == column_key:
+            self.statement_sort_reverse = not self.statement_sort_reverse
+        else:
+            self.statement_sort_column = column_key
+            self.statement_sort_reverse = column_key in NUMERIC_COLUMNS
+        self.statement_data.sort(column_key, self.statement_sort_reverse)
+        self.statement_table.set_rows(self.statement_data.rows)
+
+    def apply_search(self, event=None):
+        text = self.search_entry.get()
+        self.call_data.set_filter(text)
+        self.statement_data.set_filter(text)
+        self.call_table.set_rows(self.call_data.rows, keep_position=False)
+        self.statement_table.set_rows(self.statement_data.rows, keep_position=False)
+
+    # --- Refresh ---
+
+    def refresh_stats(self):
+        # snapshot() only copies in-memory counters, so it is cheap enough for the Tk thread.
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        snap = db_stats.snapshot()
+        self.record_var.set(snap['enabled'])
+
+        self.call_data.load(snap['calls'])
+        self.statement_data.load(snap['statements'])
+        self.call_data.set_filter(self.search_entry.get())
+        self.statement_data.set_filter(self.search_entry.get())
+        self.call_data.sort(self.call_sort_column, self.call_sort_reverse)
+        self.statement_data.sort(self.statement_sort_column, self.statement_sort_reverse)
+        self.call_table.set_rows(self.call_data.rows)
+        self.statement_table.set_rows(self.statement_data.rows)
+
+        connections = snap['connections']
+        if snap['since']:
+            summary = (f"Recording since {snap['since'].replace('T', ' ')}: {sum(c['count'] for c in snap['calls'])} calls, "
+                       f"{sum(s['count'] for s in snap['statements'])} statements, {connections['count']} connections "
+                       f"opened (mean {connections['mean_ms']:.1f} ms).")
+            if snap['slow_log']:
+                summary += f" Slow queries are also written to {snap['slow_log']}."
+        else:
+            summary = "Timings are off. Recording adds a little overhead to every database call."
+        self.summary_label.configure(text=summary)
+        self._show_slow(snap['slow'])
+
+        if snap['enabled']:
+            self._refresh_job = self.after(AUTO_REFRESH_MS, self._auto_refresh)
+
+    def _auto_refresh(self):
+        self._refresh_job = None
+        if self.winfo_ismapped():
+            self.refresh_stats()
+        else:  # hidden tab: check again later without redrawing
+            self._refresh_job = self.after(AUTO_REFRESH_MS, self._auto_refresh)
+
+    def _show_slow(self, entries):
+        lines = []
+        for entry in entries:
+            where = entry['call'] or "-"
+            lines.append(f"{entry['at'][11:]}  {entry['ms']:8.1f} ms  {entry['rows']:6} rows  {where}"
+                         f"{'  FAILED' if entry['failed'] else ''}")
+            lines.append(f"    {entry['sql']}")
+            lines.append(f"    params: {entry['params']}")
+        self.slow_box.configure(state="normal")
+        self.slow_box.delete("1.0", "end")
+        self.slow_box.insert("1.0", "\n".join(lines) if lines else "No statements over the threshold.")
+        self.slow_box.configure(state="disabled")
@@ -0,0 +1,84 @@
+import customtkinter as ctk
+from tkinter import messagebox
+import db
+from .virtual_table import VirtualTable
+
+# Pause after the last keystroke before searching.
+SEARCH_DELAY_MS = 150
+RESULT_LIMIT = 30
+KIND_LABELS = {"customer": "Customer", "vehicle": "Vehicle", "damage": "Damage", "maintenance": "Maintenance"}
+
+
+def describe(row):
+    if row['kind'] == "vehicle":
+        return row['plate'] or ""
+    if row['kind'] == "maintenance":
+        return f"{row['plate']}: {row['snippet']}"
+    if row['kind'] == "damage":
+        return f"Res #{row['reservation_id']} {row['plate']} ({row['customer_name']}): {row['snippet']}"
+    return row['snippet'] or ""
+
+
+class GlobalSearch(ctk.CTkFrame):
+    """Search box for the main window; results drop down over the tabs.
+
+    Searches customers, vehicles, damage contracts and maintenance records
+    (VehicleRentalService.search) once typing pauses. "Open" on a result
+    calls app.open_search_result(row).
+    """
+
+    def __init__(self, master, app, **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.app = app
+        self._search_job = None
+
+        self.entry = ctk.CTkEntry(self, width=380, placeholder_text="Search customers, vehicles, plates, damage and maintenance notes...")
+        self.entry.pack(side="right")
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Return>", lambda event: self.run_search())
+        self.entry.bind("<Escape>", lambda event: self.hide_results())
+
+        self.results = ctk.CTkFrame(master, border_width=1)
+        columns = [
+            ("Type", 'kind', 1, "w", lambda row: KIND_LABELS.get(row['kind'], row['kind'])),
+            ("Match", 'title', 3, "w", lambda row: row['title'] or ""),
+            ("Details", 'snippet', 6, "w", describe),
+        ]
+        self.table = VirtualTable(self.results, columns, empty_text="No matches.",
+                                  action_text="Open", action_command=self.app.open_search_result)
+        self.table.pack(fill="both", expand=True, padx=4, pady=(4, 0))
+        footer = ctk.CTkFrame(self.results, fg_color="transparent")
+        footer.pack(fill="x", padx=4, pady=4)
+        ctk.CTkButton(footer, text="Close", width=70, command=self.hide_results).pack(side="right")
+        # db.search ranks only each kind's newest SEARCH_RANKED matches; say so under the results.
+        ctk.CTkLabel(footer, text=f"Best matches first. For very common words, only the {db.SEARCH_RANKED:,} newest "
+                                  "matches of each type are ranked; add another word to reach older records.",
+                     text_color="gray", anchor="w").pack(side="left", fill="x", expand=True)
+
+    def _on_key(self, event):
+        if event.keysym in ("Return", "Escape"):
+            return
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
+        text = self.entry.get().strip()
+        if not text or not self.app.storage_ready:
+            self.hide_results()
+            return
+        self.app.executor.submit(self.app.system.search, text, None, RESULT_LIMIT, on_done=self._show_results,
+                                 on_error=lambda error: messagebox.showerror("Search Error", str(error)),
+                                 channel="global-search")
+
+    def _show_results(self, rows):
+        self.table.set_rows(rows, keep_position=False)
+        self.results.place(in_=self.app.tabview, relx=1.0, x=-8, y=8, anchor="ne", relwidth=0.8, relheight=0.6)
+        self.results.lift()
+
+    def hide_results(self):
+        self.results.place_forget()
@@ -1,19 +1,23 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from rental_system import MaintenanceRecord
+from change_bus import VEHICLE_ADDED, MAINTENANCE_STARTED
 from .base_tab import BaseTab
-from datetime import datetime
+from .virtual_table import VirtualTable
+from .paged_rows import PagedRows
 
 class MaintenanceTab(BaseTab):
     def __init__(self, master, app_controller):
         super().__init__(master, app_controller)
         self.check_vars = {}
-        self.maintenance_data = []
         self.sort_column = 'MaintenanceID'
         self.sort_reverse = False
         self.build_ui()
+        self.maintenance_rows = PagedRows(self, self.table, self.system.get_active_maintenance_page, self.sort_column)
         self.update_vehicle_dropdown()
-        self.refresh_maintenance_list()
+        self.maintenance_rows.reset()
+        self.refresh_on((VEHICLE_ADDED,), self.update_vehicle_dropdown)
+        self.refresh_on((MAINTENANCE_STARTED,), self.refresh_maintenance_list)
 
     def build_ui(self):
         tab = self
@@ -52,55 +56,50 @@ class MaintenanceTab(BaseTab):
         self.maint_notes_entry = ctk.CTkTextbox(left, height=60)
         self.maint_notes_entry.pack(fill="x", padx=10, pady=5)
 
-        ctk.CTkButton(left, text="Send to Maintenance\n(Makes Vehicle Unavailable)", command=self.handle_start_maintenance).pack(pady=20, padx=10, fill="x")
+        self.start_button = ctk.CTkButton(left, text="Send to Maintenance\n(Makes Vehicle Unavailable)", command=self.handle_start_maintenance)
+        self.start_button.pack(pady=20, padx=10, fill="x")
 
 
         right = ctk.CTkFrame(container)
         right.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
         
         ctk.CTkLabel(right, text="Vehicles Currently in Maintenance", font=ctk.CTkFont(weight="bold")).pack(pady=(10, 5))
+
+        self.search_entry = ctk.CTkEntry(right, placeholder_text="Search plate, vehicle, checklist, notes...")
+        self.search_entry.pack(fill="x", padx=10)
+        self.search_entry.bind("<KeyRelease>", self.apply_search)
         
         self.table_container = ctk.CTkFrame(right)
         self.table_container.pack(fill="both", expand=True, padx=10, pady=5)
         self.table_container.grid_columnconfigure(0, weight=1)
 
-        header_frame = ctk.CTkFrame(self.table_container, fg_color="transparent")
-        header_frame.grid(row=0, column=0, sticky="ew")
-        
-        headers = [
-            ("ID", 'MaintenanceID'), 
-            ("Plate", 'plate'), 
-            ("Vehicle", 'model'),
-            ("Cost", 'cost'), 
-            ("Started", 'start_date')
+        columns = [
+            ("ID", 'MaintenanceID', 1, "w", lambda row: f"{row['MaintenanceID']}"),
+            ("Plate", 'plate', 2, "w", lambda row: f"{row['plate']}"),
+            ("Vehicle", 'model', 4, "w", lambda row: f"{row['brand']} {row['model']}"),
+            ("Cost", 'cost', 1, "e", lambda row: f"₱{row['cost']:.2f}"),
+            ("Started", 'start_date', 3, "w", lambda row: row['start_date'][:16].replace("T", " ")),
         ]
-        
-        weights = [1, 2, 4, 1, 3] 
-
-        for i, (text, key) in enumerate(headers):
-            btn = ctk.CTkButton(header_frame, text=text, fg_color="gray", hover_color="#555555",
-                                command=lambda k=key: self.sort_and_display(k))
-            btn.grid(row=0, column=i, sticky="ew", padx=(2 if i > 0 else 0, 2), pady=2)
-            header_frame.grid_columnconfigure(i, weight=weights[i])
-
-        self.scrollable_data_frame = ctk.CTkScrollableFrame(self.table_container, label_text="Active Maintenance List")
-        self.scrollable_data_frame.grid(row=1, column=0, sticky="nsew", padx=2, pady=2)
-        self.table_container.grid_rowconfigure(1, weight=1)
-
-        for i, w in enumerate(weights):
-            self.scrollable_data_frame.grid_columnconfigure(i, weight=w)
-        self.scrollable_data_frame.grid_columnconfigure(len(weights), weight=0) 
+        self.table = VirtualTable(self.table_container, columns, on_sort=self.sort_and_display,
+                                  empty_text="No vehicles currently in maintenance.",
+                                  action_text="Details", action_command=self.show_maintenance_details)
+        self.table.grid(row=0, column=0, sticky="nsew")
+        self.table_container.grid_rowconfigure(0, weight=1)
         
         ctrl = ctk.CTkFrame(right)
         ctrl.pack(fill="x", padx=10, pady=10)
         ctk.CTkLabel(ctrl, text="Maintenance ID to Finish:").pack(side="left", padx=5)
         self.finish_maint_id = ctk.CTkEntry(ctrl, width=60)
         self.finish_maint_id.pack(side="left", padx=5)
-        ctk.CTkButton(ctrl, text="Finish Maintenance\n(Make Available)", command=self.handle_finish_maintenance).pack(side="left", padx=5)
+        self.finish_button = ctk.CTkButton(ctrl, text="Finish Maintenance\n(Make Available)", command=self.handle_finish_maintenance)
+        self.finish_button.pack(side="left", padx=5)
         ctk.CTkButton(ctrl, text="Refresh List", command=self.refresh_maintenance_list).pack(side="right", padx=5)
 
     def update_vehicle_dropdown(self):
-        vehs = self.system.get_all_vehicle_list_fmt()
+        self.run_in_background(self.system.get_all_vehicle_list_fmt, on_done=self._show_vehicle_dropdown,
+                               channel="vehicle-dropdown")
+
+    def _show_vehicle_dropdown(self, vehs):
         self.maint_vehicle_dropdown.configure(values=vehs)
         if vehs:
             self.maint_vehicle_var.set(vehs[0])
@@ -115,55 +114,11 @@ class MaintenanceTab(BaseTab):
             self.sort_column = column_key
             self.sort_reverse = False
 
-        if self.maintenance_data:
-            if column_key == 'cost':
-                key_func = lambda x: float(x.get(column_key, 0))
-            elif column_key in ('MaintenanceID', 'year'):
-                 key_func = lambda x: int(x.get(column_key, 0))
-            elif column_key == 'start_date':
-                try:
-                    key_func = lambda x: datetime.fromisoformat(x.get(column_key, '1970-01-01T00:00:00'))
-                except:
-                    key_func = lambda x: x.get(column_key, '')
-            else:
-                key_func = lambda x: (x.get('model', ''), x.get('brand', ''))
-                
-            self.maintenance_data.sort(key=key_func, reverse=self.sort_reverse)
-
-        self._display_maintenance_list()
-
-    def _display_maintenance_list(self):
-        for widget in self.scrollable_data_frame.winfo_children():
-            widget.destroy()
-
-        if not self.maintenance_data:
-            ctk.CTkLabel(self.scrollable_data_frame, text="No vehicles currently in maintenance.").grid(row=0, column=0, columnspan=6, pady=10)
-            return
-
-        for i, row in enumerate(self.maintenance_data):
-            bg_color = ("#333333" if i % 2 == 0 else "#444444") if ctk.get_appearance_mode() == "Dark" else ("#DDDDDD" if i % 2 == 0 else "#EEEEEE")
-            
-            full_vehicle_name = f"{row['brand']} {row['model']}"
-            
-            ctk.CTkLabel(self.scrollable_data_frame, text=f"{row['MaintenanceID']}", 
-                         anchor="w", fg_color=bg_color).grid(row=i, column=0, sticky="ew", padx=(2, 0), pady=1)
-
-            ctk.CTkLabel(self.scrollable_data_frame, text=f"{row['plate']}", 
-                         anchor="w", fg_color=bg_color).grid(row=i, column=1, sticky="ew", padx=2, pady=1)
-
-            ctk.CTkLabel(self.scrollable_data_frame, text=full_vehicle_name, 
-                         anchor="w", fg_color=bg_color).grid(row=i, column=2, sticky="ew", padx=2, pady=1)
-
-            ctk.CTkLabel(self.scrollable_data_frame, text=f"₱{row['cost']:.2f}", 
-                         anchor="e", fg_color=bg_color).grid(row=i, column=3, sticky="ew", padx=2, pady=1)
+        self.maintenance_rows.reset(self.sort_column, self.sort_reverse)
 
-            start_date_fmt = row['start_date'][:16].replace("T", " ")
-            ctk.CTkLabel(self.scrollable_data_frame, text=start_date_fmt, 
-                         anchor="w", fg_color=bg_color).grid(row=i, column=4, sticky="ew", padx=2, pady=1)
-
-            btn = ctk.CTkButton(self.scrollable_data_frame, text="Details", width=60, height=20,
-                                command=lambda r=row: self.show_maintenance_details(r))
-            btn.grid(row=i, column=5, sticky="e", padx=(2, 4), pady=1)
+    def apply_search(self, event=None):
+        if self.search_entry.get().strip() != self.maintenance_rows.search:
+            self.maintenance_rows.reset(search=self.search_entry.get())
             
     def show_maintenance_details(self, row):
         """Displays a detailed view of the maintenance record."""
@@ -202,11 +157,20 @@ class MaintenanceTab(BaseTab):
         
         record = MaintenanceRecord(vid, checklist_str, cost, notes)
 
-        success, msg = self.system.start_maintenance(record)
+        # Writes can wait on the database lock, so they run off the Tk thread like the reads.
+        self.start_button.configure(state="disabled")
+        self.run_in_background(self.system.start_maintenance, record,
+                               on_done=lambda result: self._maintenance_started(*result),
+                               on_error=lambda error: self._write_failed(self.start_button, error))
+
+    def _write_failed(self, button, error):
+        button.configure(state="normal")
+        self.show_background_error(error)
+
+    def _maintenance_started(self, success, msg):
+        self.start_button.configure(state="normal")
         if success:
             messagebox.showinfo("Started", "Vehicle sent to maintenance.")
-            self.refresh_maintenance_list()
-            self.app_controller.refresh_rent_dropdowns() 
             self.maint_cost_entry.delete(0, "end")
             self.maint_notes_entry.delete("1.0", "end")
             for var in self.check_vars.values(): var.set(False)
@@ -214,8 +178,7 @@ class MaintenanceTab(BaseTab):
             messagebox.showerror("Error", msg)
 
     def refresh_maintenance_list(self):
-        self.maintenance_data = self.system.get_active_maintenance()
-        self.sort_and_display(self.sort_column)
+        self.maintenance_rows.reload()
 
     def handle_finish_maintenance(self):
         mid_txt = self.finish_maint_id.get().strip()
@@ -228,8 +191,12 @@ class MaintenanceTab(BaseTab):
             messagebox.showerror("Invalid", "ID must be a number.")
             return
         
-        self.system.finish_maintenance(mid)
+        self.finish_button.configure(state="disabled")
+        self.run_in_background(self.system.finish_maintenance, mid, on_done=self._maintenance_finished,
+                               on_error=lambda error: self._write_failed(self.finish_button, error))
+
+    def _maintenance_finished(self, result):
+        self.finish_button.configure(state="normal")
         messagebox.showinfo("Success", "Maintenance finished. Vehicle is available for rent.")
         self.finish_maint_id.delete(0, "end")
-        self.refresh_maintenance_list()
-        self.app_controller.refresh_rent_dropdowns()
\ No newline at end of file
+        self.refresh_maintenance_list()
\ No newline at end of file
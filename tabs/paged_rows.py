@@ -0,0 +1,123 @@
+PAGE_SIZE = 200
+CACHED_PAGES = 6
+
+
+class PagedRows:
+    """The rows of a keyset-paginated listing, fetched a page at a time as a VirtualTable scrolls to them.
+
+    fetch(sort, descending, cursor, limit, search) is a service call such as
+    get_vehicles_page. Only the cursor at the start of each page seen so far
+    is kept for good, plus the CACHED_PAGES most recently shown pages and
+    the last page found, so memory stays flat however far the user scrolls.
+    Rows not loaded yet are None, which the table draws as blank until their
+    page arrives. The length grows as the user nears the end of what has
+    been read, and does not shrink when pages are dropped from the cache.
+    """
+
+    def __init__(self, tab, table, fetch, sort, descending=False, page_size=PAGE_SIZE):
+        self.tab = tab
+        self.table = table
+        self.fetch = fetch
+        self.page_size = page_size
+        self.sort = sort
+        self.descending = descending
+        self.search = ""
+        self._generation = 0
+        self._starts = []   # cursor at the start of each page found so far (None for the first)
+        self._pages = {}    # page number -> rows, most recently used last
+        self._pending = {}  # page number -> background task
+        self._last_len = 0  # rows on the last page found, once it has been read
+        self._top = True
+
+    def reset(self, sort=None, descending=None, search=None):
+        """Starts over from the first page, e.g. for a new sort order or search text."""
+        if sort is not None:
+            self.sort = sort
+        if descending is not None:
+            self.descending = descending
+        if search is not None:
+            self.search = search.strip()
+        self._discard()
+        self._starts = [None]
+        self._last_len = 0
+        self._top = True
+        self._load(0)
+
+    def reload(self):
+        """Re-reads the page on screen after a change, keeping the scroll position."""
+        if not self._starts:
+            self.reset()
+            return
+        page = min(self.table.first_visible // self.page_size, len(self._starts) - 1)
+        self._discard()
+        self._load(page)
+
+    def __len__(self):
+        if not self._starts:
+            return 0
+        return (len(self._starts) - 1) * self.page_size + self._last_len
+
+    def __getitem__(self, i):
+        page, offset = divmod(i, self.page_size)
+        rows = self._pages.get(page)
+        if rows is None:
+            self._load(page)
+        else:
+            self._pages[page] = self._pages.pop(page)  # mark as recently used
+        if page + 1 < len(self._starts) and page + 1 not in self._pages:
+            self._load(page + 1)  # read ahead of the scroll
+        return rows[offset] if rows is not None and offset < len(rows) else None
+
+    # --- Internals ---
+
+    def _discard(self):
+        self._generation += 1
+        for task in self._pending.values():
+            task.cancel()
+        self._pending.clear()
+        self._pages.clear()
+
+    def _load(self, page):
+        if page in self._pending or page >= len(self._starts):
+            return
+        generation = self._generation
+        self._pending[page] = self.tab.run_in_background(
+            self.fetch, self.sort, self.descending, self._starts[page], self.page_size, self.search,
+            on_done=lambda result: self._loaded(generation, page, result),
+            on_error=lambda error: self._failed(generation, page, error))
+
+    def _loaded(self, generation, page, result):
+        if generation != self._generation:
+            return
+        self._pending.pop(page, None)
+        self._pages[page] = result["rows"]
+        next_cursor = result["next_cursor"]
+        if next_cursor is None:
+            self._forget_after(page)
+        elif page + 1 == len(self._starts):
+            self._starts.append(next_cursor)
+            self._last_len = 0  # the new last page has not been read yet
+        elif self._starts[page + 1] != next_cursor:
+            # Rows were added or removed since the later pages were read; re-find them from here.
+            self._forget_after(page)
+            self._starts.append(next_cursor)
+            self._last_len = 0
+        last = len(self._starts) - 1
+        if page == last:
+            self._last_len = len(result["rows"])
+        while len(self._pages) > CACHED_PAGES:
+            del self._pages[next(p for p in self._pages if p != last)]
+        self.table.set_rows(self, keep_position=not self._top)
+        self._top = False
+
+    def _failed(self, generation, page, error):
+        if generation == self._generation:
+            self._pending.pop(page, None)
+            self.tab.show_background_error(error)
+
+    def _forget_after(self, page):
+        del self._starts[page + 1:]
+        for later in [p for p in self._pages if p > page]:
+            del self._pages[later]
+        for later in [p for p in self._pending if p > page]:
+            self._pending.pop(later).cancel()
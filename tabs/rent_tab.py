@@ -3,15 +3,25 @@ from tkinter import messagebox
 from tkcalendar import DateEntry
 from datetime import datetime, timedelta
 from rental_system import Customer
+from change_bus import RESERVATION_CHANGES, RESERVATION_CREATED, RESERVATION_EXTENDED, RESERVATION_RETURNED, \
+    VEHICLE_ADDED, MAINTENANCE_CHANGES
 from .base_tab import BaseTab
 
+# Customer autocomplete: wait this long after the last keystroke, then offer this many matches.
+SUGGEST_DELAY_MS = 200
+SUGGESTION_LIMIT = 6
+
 class RentTab(BaseTab):
     def __init__(self, master, app_controller):
         super().__init__(master, app_controller)
         self._reservation_update_map = {}
+        self._suggest_job = None
         self.build_ui()
         self.update_type_dropdown()
         self.update_reservation_dropdown()
+        self.refresh_on(RESERVATION_CHANGES, self.update_reservation_dropdown)
+        self.refresh_on((RESERVATION_CREATED, RESERVATION_EXTENDED), self.refresh_vehicle_availability)
+        self.refresh_on((VEHICLE_ADDED, RESERVATION_RETURNED) + MAINTENANCE_CHANGES, self.update_type_dropdown)
 
     def validate_number(self, P):
         if P == "": 
@@ -68,6 +78,10 @@ class RentTab(BaseTab):
         self.vehicle_dropdown = ctk.CTkOptionMenu(col0, values=[], variable=self.vehicle_id_var)
         self.vehicle_dropdown.grid(row=row_index, column=1, padx=5, pady=7, sticky="ew")
         row_index += 1
+
+        self.vehicle_count_label = ctk.CTkLabel(col0, text="", anchor="w")
+        self.vehicle_count_label.grid(row=row_index, column=0, columnspan=2, padx=5, pady=(0, 7), sticky="w")
+        row_index += 1
         
         col1 = ctk.CTkFrame(form)
         col1.grid(row=0, column=1, padx=3, pady=3, sticky="nsew") 
@@ -84,21 +98,25 @@ class RentTab(BaseTab):
         ctk.CTkLabel(col1, text="Pickup Date:").grid(row=row_index, column=0, padx=5, pady=7, sticky="w")
         self.rent_pickup_date = DateEntry(col1, date_pattern="yyyy-mm-dd")
         self.rent_pickup_date.grid(row=row_index, column=1, padx=5, pady=7, sticky="ew")
+        self.rent_pickup_date.bind("<<DateEntrySelected>>", self.refresh_vehicle_availability)
         row_index += 1
 
         ctk.CTkLabel(col1, text="Pickup Time:").grid(row=row_index, column=0, padx=5, pady=7, sticky="w")
         self.rent_pickup_time = ctk.CTkEntry(col1, placeholder_text="HH:MM (24h)")
         self.rent_pickup_time.grid(row=row_index, column=1, padx=5, pady=7, sticky="ew")
+        self.rent_pickup_time.bind("<FocusOut>", self.refresh_vehicle_availability)
         row_index += 1
 
         ctk.CTkLabel(col1, text="Return Date:").grid(row=row_index, column=0, padx=5, pady=7, sticky="w")
         self.rent_return_date = DateEntry(col1, date_pattern="yyyy-mm-dd")
         self.rent_return_date.grid(row=row_index, column=1, padx=5, pady=7, sticky="ew")
+        self.rent_return_date.bind("<<DateEntrySelected>>", self.refresh_vehicle_availability)
         row_index += 1
 
         ctk.CTkLabel(col1, text="Return Time:").grid(row=row_index, column=0, padx=5, pady=7, sticky="w")
         self.rent_return_time = ctk.CTkEntry(col1, placeholder_text="HH:MM (24h)")
         self.rent_return_time.grid(row=row_index, column=1, padx=5, pady=7, sticky="ew")
+        self.rent_return_time.bind("<FocusOut>", self.refresh_vehicle_availability)
         row_index += 1
         
         col2 = ctk.CTkFrame(form)
@@ -123,8 +141,15 @@ class RentTab(BaseTab):
         self.cust_email.grid(row=row_index, column=1, padx=5, pady=7, sticky="ew")
         row_index += 1
 
+        # Typing a name, or the start of a phone number, offers known customers to fill the form from.
+        self.customer_suggestions = ctk.CTkFrame(self, border_width=1)
+        for entry in (self.cust_name, self.cust_phone):
+            entry.bind("<KeyRelease>", lambda event, entry=entry: self.on_customer_typed(event, entry))
+            entry.bind("<Escape>", lambda event: self.hide_customer_suggestions())
+            entry.bind("<FocusOut>", lambda event: self.after(SUGGEST_DELAY_MS, self.hide_customer_suggestions))
+
         self.driver_var = ctk.BooleanVar(value=False)
-        self.driver_checkbox = ctk.CTkCheckBox(col2, text="Require Company Driver (adds extra 500/day)", variable=self.driver_var, command=self.toggle_driver_fields)
+        self.driver_checkbox = ctk.CTkCheckBox(col2, text="Require Company Driver (adds extra 500/day)", variable=self.driver_var, command=self.handle_driver_toggle)
         ctk.CTkLabel(col2, text="Driver:").grid(row=row_index, column=0, padx=5, pady=7, sticky="w")
         self.driver_checkbox.grid(row=row_index, column=1, pady=7, padx=5, sticky="w") 
         row_index += 1
@@ -135,7 +160,8 @@ class RentTab(BaseTab):
         col2.grid_rowconfigure(row_index, weight=0) 
         row_index += 1 
 
-        ctk.CTkButton(col2, text="Check Availability & Reserve", command=self.handle_reserve).grid(row=row_index, column=0, columnspan=2, pady=(10, 5), padx=5, sticky="s")
+        self.reserve_button = ctk.CTkButton(col2, text="Check Availability & Reserve", command=self.handle_reserve)
+        self.reserve_button.grid(row=row_index, column=0, columnspan=2, pady=(10, 5), padx=5, sticky="s")
         col2.grid_rowconfigure(row_index, weight=1)
         
         self.toggle_driver_fields()
@@ -172,7 +198,8 @@ class RentTab(BaseTab):
         self.update_return_time = ctk.CTkEntry(update_right, placeholder_text="HH:MM (24h)")
         self.update_return_time.grid(row=1, column=1, padx=5, pady=7, sticky="ew")
 
-        ctk.CTkButton(update_frame, text="Update Return Date", command=self.handle_update_reservation).grid(row=2, column=0, columnspan=2, pady=10)
+        self.update_button = ctk.CTkButton(update_frame, text="Update Return Date", command=self.handle_update_reservation)
+        self.update_button.grid(row=2, column=0, columnspan=2, pady=10)
         
         self.toggle_driver_fields()
         
@@ -189,8 +216,10 @@ class RentTab(BaseTab):
             raise ValueError("Invalid time format. Use HH:MM (24h).")
 
     def update_reservation_dropdown(self):
-        reservations_full = self.system.get_active_reservations_dropdown_fmt()
-        
+        self.run_in_background(self.system.get_active_reservations_dropdown_fmt,
+                               on_done=self._show_reservation_dropdown, channel="reservation-dropdown")
+
+    def _show_reservation_dropdown(self, reservations_full):
         reservations_display = []
         self._reservation_update_map = {}
         
@@ -233,66 +262,137 @@ class RentTab(BaseTab):
             return None
 
 
+    def _cascade(self, fetch, args, dropdown, var, next_level):
+        """Fills one level of the type > brand > year > model > vehicle picker in the background.
+
+        A level keeps its current choice while that is still on offer, so a
+        fleet change elsewhere refreshes the lists without undoing the picks.
+
+        Every level shares one channel, so picking something new while an
+        earlier chain is still loading supersedes it. The vehicle list at the
+        end has a channel of its own: re-listing it for new dates must not
+        cancel a chain that will list it again when it gets there.
+        """
+        def show(values):
+            dropdown.configure(values=values)
+            choice = _keep_choice(var.get(), values)
+            var.set(choice)
+            next_level(choice)
+        self.run_in_background(fetch, *args, on_done=show, channel="vehicle-cascade")
+
     def update_type_dropdown(self, *args):
-        types = self.system.get_vehicle_types()
-        self.vehicle_type_dropdown.configure(values=types)
-        if types:
-            self.vehicle_type_var.set(types[0])
-            self.update_brand_dropdown(types[0])
-        else:
-            self.vehicle_type_var.set("")
-            self.update_brand_dropdown("")
+        self._cascade(self.system.get_vehicle_types, (),
+                      self.vehicle_type_dropdown, self.vehicle_type_var, self.update_brand_dropdown)
 
     def update_brand_dropdown(self, selected_type):
-        brands = self.system.get_brands_by_type(selected_type)
-        self.vehicle_brand_dropdown.configure(values=brands)
-        if brands:
-            self.vehicle_brand_var.set(brands[0])
-            self.update_year_dropdown(brands[0])
-        else:
-            self.vehicle_brand_var.set("")
-            self.update_year_dropdown("")
+        self._cascade(self.system.get_brands_by_type, (selected_type,),
+                      self.vehicle_brand_dropdown, self.vehicle_brand_var, self.update_year_dropdown)
 
     def update_year_dropdown(self, selected_brand):
         selected_type = self.vehicle_type_var.get()
-        years = self.system.get_years_by_type_and_brand(selected_type, selected_brand)
-        self.vehicle_year_dropdown.configure(values=years)
-        if years:
-            self.vehicle_year_var.set(years[0])
-            self.update_model_dropdown(years[0])
-        else:
-            self.vehicle_year_var.set("")
-            self.update_model_dropdown("")
+        self._cascade(self.system.get_years_by_type_and_brand, (selected_type, selected_brand),
+                      self.vehicle_year_dropdown, self.vehicle_year_var, self.update_model_dropdown)
 
     def update_model_dropdown(self, selected_year):
         selected_type = self.vehicle_type_var.get()
         selected_brand = self.vehicle_brand_var.get()
-        models = self.system.get_models_by_type_brand_and_year(selected_type, selected_brand, selected_year)
-        self.vehicle_model_dropdown.configure(values=models)
-        if models:
-            self.vehicle_model_var.set(models[0])
-            self.update_vehicle_dropdown(models[0])
-        else:
-            self.vehicle_model_var.set("")
-            self.update_vehicle_dropdown("")
+        self._cascade(self.system.get_models_by_type_brand_and_year, (selected_type, selected_brand, selected_year),
+                      self.vehicle_model_dropdown, self.vehicle_model_var, self.update_vehicle_dropdown)
+
+    def get_rental_window(self):
+        """Returns the (pickup, return) ISO strings entered so far, or (None, None) if incomplete/invalid."""
+        try:
+            start_dt = self.parse_datetime_inputs(self.rent_pickup_date, self.rent_pickup_time)
+            end_dt = self.parse_datetime_inputs(self.rent_return_date, self.rent_return_time)
+        except Exception:
+            return None, None
+        if end_dt <= start_dt:
+            return None, None
+        return start_dt.isoformat(), end_dt.isoformat()
 
     def update_vehicle_dropdown(self, selected_model):
         selected_type = self.vehicle_type_var.get()
         selected_brand = self.vehicle_brand_var.get()
         selected_year = self.vehicle_year_var.get()
-        vehicles = self.system.get_available_vehicles_list(selected_type, selected_brand, selected_year, selected_model)
-        self.vehicle_dropdown.configure(values=vehicles)
-        if vehicles:
-            self.vehicle_id_var.set(vehicles[0])
-        else:
-            self.vehicle_id_var.set("")
-            
+        start_iso, end_iso = self.get_rental_window()
+        driver_flag = self.driver_var.get()
+
+        def fetch():
+            vehicles = self.system.get_available_vehicles_list(selected_type, selected_brand, selected_year, selected_model,
+                                                               start_iso, end_iso, driver_flag)
+            return vehicles, self.system.get_catalog_counts(selected_type, selected_brand, selected_year, selected_model)
+
+        def show(result):
+            vehicles, (in_service, total) = result
+            self.vehicle_dropdown.configure(values=vehicles)
+            self.vehicle_id_var.set(_keep_choice(self.vehicle_id_var.get(), vehicles))
+
+            summary = f"{in_service} of {total} in service"
+            if start_iso and end_iso:
+                summary += f", {len(vehicles)} free for these dates"
+            self.vehicle_count_label.configure(text=summary)
+
+        self.run_in_background(fetch, on_done=show, channel="vehicle-list")
+
+    def refresh_vehicle_availability(self, *args):
+        """Re-lists the vehicles free for the pickup/return window currently entered."""
+        self.update_vehicle_dropdown(self.vehicle_model_var.get())
+
+    def handle_driver_toggle(self):
+        self.toggle_driver_fields()
+        self.refresh_vehicle_availability()
+
     def toggle_driver_fields(self):
         if self.driver_var.get():
             self.driver_license_entry.grid_forget()
         else:
             self.driver_license_entry.grid(row=6, column=0, columnspan=2, padx=5, pady=7, sticky="ew")
             
+    def on_customer_typed(self, event, entry):
+        if event.keysym in ("Escape", "Tab", "Return"):
+            return
+        if self._suggest_job is not None:
+            self.after_cancel(self._suggest_job)
+        self._suggest_job = self.after(SUGGEST_DELAY_MS, lambda: self.suggest_customers(entry))
+
+    def suggest_customers(self, entry):
+        self._suggest_job = None
+        text = entry.get().strip()
+        if len(text) < 2:
+            self.hide_customer_suggestions()
+            return
+        self.run_in_background(self.system.find_customers, text, SUGGESTION_LIMIT,
+                               on_done=lambda customers: self.show_customer_suggestions(entry, customers),
+                               channel="customer-suggest")
+
+    def show_customer_suggestions(self, entry, customers):
+        for child in self.customer_suggestions.winfo_children():
+            child.destroy()
+        if not customers:
+            self.hide_customer_suggestions()
+            return
+        for customer in customers:
+            text = f"{customer['name']}  ·  {customer['phone'] or '-'}  ·  {customer['email'] or '-'}"
+            ctk.CTkButton(self.customer_suggestions, text=text, anchor="w", fg_color="transparent",
+                          text_color=("gray10", "gray90"), hover_color=("gray75", "gray30"),
+                          command=lambda customer=customer: self.fill_customer(customer)).pack(fill="x", padx=2, pady=1)
+        self.customer_suggestions.place(in_=entry, relx=0, rely=1.0, y=2, relwidth=1.6)
+        self.customer_suggestions.lift()
+
+    def hide_customer_suggestions(self):
+        self.customer_suggestions.place_forget()
+
+    def fill_customer(self, customer):
+        self.hide_customer_suggestions()
+        for entry, value in ((self.cust_name, customer['name']),
+                             # The phone box only accepts digits.
+                             (self.cust_phone, "".join(ch for ch in customer['phone'] or "" if ch.isdigit())),
+                             (self.cust_email, customer['email']),
+                             (self.driver_license_entry, customer['drivers_license'])):
+            entry.delete(0, "end")
+            if value:
+                entry.insert(0, value)
+
     def handle_reserve(self):
         vehicle_text = self.vehicle_id_var.get().strip()
         if not vehicle_text:
@@ -341,29 +441,27 @@ class RentTab(BaseTab):
         
         customer = Customer(name, phone, email, driver_license)
 
-        try:
-            res_id, total_cost = self.system.make_reservation(
-                vehicle_id, customer, start_dt.isoformat(), end_dt.isoformat(), driver_flag, location
-            )
-        except ValueError as ve:
-            messagebox.showerror("Error", str(ve))
-            return
+        # The booking waits for its group commit, so it runs off the Tk thread; the
+        # button stays disabled until it lands so a double click cannot book twice.
+        self.reserve_button.configure(state="disabled")
+        self.run_in_background(self.system.make_reservation,
+                               vehicle_id, customer, start_dt.isoformat(), end_dt.isoformat(), driver_flag, location,
+                               on_done=self._reservation_done, on_error=self._reservation_failed)
 
+    def _reservation_done(self, result):
+        res_id, total_cost = result
+        self.reserve_button.configure(state="normal")
         messagebox.showinfo("Reserved", f"Reservation created (ID {res_id}). Total estimated cost: {total_cost:.2f}")
-
-        self.app_controller.refresh_reservation_list()
-        self.app_controller.refresh_calendar_marks()
-        self.app_controller.refresh_return_dropdown()
-        self.update_reservation_dropdown()
-        
-        if "Reports" in self.app_controller.tab_instances:
-            self.app_controller.tab_instances["Reports"].refresh_report()
         
         self.cust_name.delete(0, "end")
         self.cust_phone.delete(0, "end")
         self.cust_email.delete(0, "end")
         self.location_entry.delete(0, "end")
         self.driver_license_entry.delete(0, "end")
+
+    def _reservation_failed(self, error):
+        self.reserve_button.configure(state="normal")
+        self.show_background_error(error)
         
     def handle_update_reservation(self):
         res_id = self.get_selected_update_rid()
@@ -376,19 +474,27 @@ class RentTab(BaseTab):
             messagebox.showerror("Invalid datetime", f"New return datetime: {str(e)}")
             return
             
-        try:
-            new_total_cost = self.system.update_reservation_return(res_id, new_end_dt.isoformat())
-            messagebox.showinfo("Updated", 
-                                f"Reservation {res_id} updated. New return datetime: {new_end_dt.strftime('%Y-%m-%d %H:%M')}. "
-                                f"New estimated total cost: {new_total_cost:.2f}")
-            
-            self.app_controller.refresh_reservation_list()
-            self.app_controller.refresh_calendar_marks()
-            self.update_reservation_dropdown()
-            if "Reports" in self.app_controller.tab_instances:
-                self.app_controller.tab_instances["Reports"].refresh_report()
-            
-        except ValueError as ve:
-            messagebox.showerror("Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
\ No newline at end of file
+        self.update_button.configure(state="disabled")
+        self.run_in_background(self.system.update_reservation_return, res_id, new_end_dt.isoformat(),
+                               on_done=lambda new_total_cost: self._update_done(res_id, new_end_dt, new_total_cost),
+                               on_error=self._update_failed)
+
+    def _update_done(self, res_id, new_end_dt, new_total_cost):
+        self.update_button.configure(state="normal")
+        messagebox.showinfo("Updated", 
+                            f"Reservation {res_id} updated. New return datetime: {new_end_dt.strftime('%Y-%m-%d %H:%M')}. "
+                            f"New estimated total cost: {new_total_cost:.2f}")
+
+    def _update_failed(self, error):
+        self.update_button.configure(state="normal")
+        if isinstance(error, ValueError):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Error", f"An unexpected error occurred: {str(error)}")
+
+
+def _keep_choice(current, values):
+    """The current dropdown choice if it is still offered, otherwise the first value (or "")."""
+    if current in values:
+        return current
+    return values[0] if values else ""
@@ -1,6 +1,7 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from rental_system import Documentation
+from change_bus import RESERVATION_CHANGES
 from .base_tab import BaseTab # Import BaseTab
 
 class ReturnTab(BaseTab):
@@ -9,6 +10,7 @@ class ReturnTab(BaseTab):
         self._reservation_map = {}
         self.build_ui()
         self.update_reservation_dropdown()
+        self.refresh_on(RESERVATION_CHANGES, self.update_reservation_dropdown)
         self.return_info.configure(state="normal")
         self.return_info.insert("end", "Select a reservation from the dropdown and click 'Load'.")
         self.return_info.configure(state="disabled")
@@ -67,15 +69,19 @@ class ReturnTab(BaseTab):
 
         btns = ctk.CTkFrame(frame)
         btns.pack(pady=6)
-        ctk.CTkButton(btns, text="Add Damage Entry", command=self.handle_add_damage).pack(side="left", padx=6)
-        ctk.CTkButton(btns, text="Finalize Return (Mark returned)", command=self.handle_finalize_return).pack(side="left", padx=6)
+        self.damage_button = ctk.CTkButton(btns, text="Add Damage Entry", command=self.handle_add_damage)
+        self.damage_button.pack(side="left", padx=6)
+        self.finalize_button = ctk.CTkButton(btns, text="Finalize Return (Mark returned)", command=self.handle_finalize_return)
+        self.finalize_button.pack(side="left", padx=6)
 
         self.damage_list_box = ctk.CTkTextbox(frame, height=10, font=("Courier New", 12))
         self.damage_list_box.pack(fill="both", pady=6, expand=True)
         
     def update_reservation_dropdown(self):
-        reservations_full = self.system.get_active_reservations_dropdown_fmt()
-        
+        self.run_in_background(self.system.get_active_reservations_dropdown_fmt,
+                               on_done=self._show_reservation_dropdown, channel="reservation-dropdown")
+
+    def _show_reservation_dropdown(self, reservations_full):
         reservations_display = []
         self._reservation_map = {}
         
@@ -123,8 +129,10 @@ class ReturnTab(BaseTab):
         if rid is None:
             return
             
-        row = self.system.get_reservation_details(rid)
+        self.run_in_background(self.system.get_reservation_details, rid,
+                               on_done=lambda row: self._show_reservation(rid, row), channel="details")
 
+    def _show_reservation(self, rid, row):
         if not row:
             messagebox.showerror("Not found", "Reservation not found.")
             return
@@ -140,8 +148,10 @@ class ReturnTab(BaseTab):
 
 
     def refresh_damage_list(self, reservation_id):
-        rows = self.system.get_damage_contracts(reservation_id)
-        
+        self.run_in_background(self.system.get_damage_contracts, reservation_id,
+                               on_done=self._show_damage_list, channel="damages")
+
+    def _show_damage_list(self, rows):
         self.damage_list_box.configure(state="normal")
         self.damage_list_box.delete("1.0", "end")
         if not rows:
@@ -172,8 +182,18 @@ class ReturnTab(BaseTab):
             return
         
         doc = Documentation(rid)
-        doc.generateDocument(condition, cost, notes)
-        
+        # Writes can wait on the database lock, so they run off the Tk thread like the reads.
+        self.damage_button.configure(state="disabled")
+        self.run_in_background(doc.generateDocument, condition, cost, notes,
+                               on_done=lambda result: self._damage_added(rid),
+                               on_error=lambda error: self._write_failed(self.damage_button, error))
+
+    def _write_failed(self, button, error):
+        button.configure(state="normal")
+        self.show_background_error(error)
+
+    def _damage_added(self, rid):
+        self.damage_button.configure(state="normal")
         messagebox.showinfo("Added", "Damage entry added.")
         self.condition.delete(0, "end")
         self.dmg_cost.delete(0, "end")
@@ -197,20 +217,19 @@ class ReturnTab(BaseTab):
             messagebox.showerror("Invalid", "Distance must be a valid non-negative number.")
             return
             
-        try:
-            base, dmg_total, final = self.system.finalize_return(rid, distance_km)
-        except Exception:
-            messagebox.showerror("Error", "Reservation not found or invalid.")
-            return
-        
+        self.finalize_button.configure(state="disabled")
+        self.run_in_background(self.system.finalize_return, rid, distance_km,
+                               on_done=lambda result: self._return_finalized(distance_km, *result),
+                               on_error=self._finalize_failed)
+
+    def _finalize_failed(self, error):
+        self.finalize_button.configure(state="normal")
+        messagebox.showerror("Error", "Reservation not found or invalid.")
+
+    def _return_finalized(self, distance_km, base, dmg_total, final):
+        self.finalize_button.configure(state="normal")
         if messagebox.askyesno("Finalize Return", f"Base total: {base:.2f}\nDamage total: {dmg_total:.2f}\nFinal amount due from customer: {final:.2f}\nDistance reported: {distance_km:.2f} km\n\nMark reservation as returned?"):
             messagebox.showinfo("Returned", "Reservation marked returned.")
-            self.app_controller.refresh_reservation_list()
-            self.app_controller.refresh_calendar_marks()
-            self.app_controller.refresh_rent_dropdowns()
-            self.app_controller.refresh_return_dropdown()
-            if "Reports" in self.app_controller.tab_instances:
-                self.app_controller.tab_instances["Reports"].refresh_report()
 
             self.return_info.configure(state="normal")
             self.return_info.delete("1.0", "end")
@@ -0,0 +1,207 @@
+from bisect import bisect_left, insort
+
+
+class TableRow:
+    """Read-only view of one row of a TableModel; behaves like the old row dicts."""
+    __slots__ = ("_data", "_index")
+
+    def __init__(self, data, index):
+        self._data = data
+        self._index = index
+
+    def __getitem__(self, field):
+        return self._data[field][self._index]
+
+    def get(self, field, default=None):
+        column = self._data.get(field)
+        return default if column is None else column[self._index]
+
+    def keys(self):
+        return self._data.keys()
+
+    def as_dict(self):
+        return {field: column[self._index] for field, column in self._data.items()}
+
+
+class TableRows:
+    """The current sorted and filtered rows of a TableModel, as a sequence."""
+
+    def __init__(self, model):
+        self._model = model
+
+    def __len__(self):
+        return len(self._model._current())
+
+    def __getitem__(self, i):
+        indices = self._model._current()
+        if i < 0:
+            i += len(indices)
+        if self._model.sort_reverse:
+            i = len(indices) - 1 - i
+        return TableRow(self._model._data, indices[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class TableModel:
+    """Column-stored table data with cached sort orders and a search filter.
+
+    key_for(column) returns the sort key function (of a row) for a column
+    key, like the key_func each tab used to build on every click. The
+    ascending order for a column is computed once and reused. A reversed
+    sort reads the same order backwards, and upsert()/remove() patch every
+    cached order by bisection. set_filter() keeps rows whose search_fields
+    contain the text, case-insensitively. When the new text extends the
+    previous one, only the previous matches are scanned.
+    """
+
+    def __init__(self, key_field, key_for, search_fields=()):
+        self.key_field = key_field
+        self.key_for = key_for
+        self.search_fields = search_fields
+        self.sort_column = None
+        self.sort_reverse = False
+        self.rows = TableRows(self)
+        self.load([])
+
+    # --- Loading and row updates ---
+
+    def load(self, rows):
+        """Replaces all data, e.g. with the list of dicts from VehicleRentalService."""
+        fields = list(rows[0].keys()) if rows else []
+        self._data = {field: [row.get(field) for row in rows] for field in fields}
+        self._positions = {key: i for i, key in enumerate(self._data.get(self.key_field, []))}
+        self._alive = [True] * len(rows)
+        self._haystack = None   # lowercased search text per stored row, built on first filter
+        self._sort_values = {}  # column key -> sort value per stored row
+        self._orders = {}       # column key -> live row indices, ascending
+        self._query = ""
+        self._matches = None    # row indices passing the filter, in the current order; None when unfiltered
+
+    def upsert(self, row):
+        """Inserts a new row or replaces the one with the same key, keeping sort and filter."""
+        key = row[self.key_field]
+        index = self._positions.get(key)
+        if index is not None:
+            self._unplace(index)
+        else:
+            index = len(self._alive)
+            self._positions[key] = index
+            self._alive.append(True)
+            if self._haystack is not None:
+                self._haystack.append("")
+            for column in self._data.values():
+                column.append(None)
+        for field, value in row.items():
+            if field not in self._data:
+                self._data[field] = [None] * len(self._alive)
+            self._data[field][index] = value
+        if self._haystack is not None:
+            self._haystack[index] = self._search_text(index)
+        self._place(index)
+
+    def remove(self, key):
+        """Drops the row with this key, if present."""
+        index = self._positions.pop(key, None)
+        if index is None:
+            return
+        self._unplace(index)
+        self._alive[index] = False
+
+    def __len__(self):
+        return len(self._positions)
+
+    # --- Sorting and filtering ---
+
+    def sort(self, column, reverse=False):
+        self.sort_column = column
+        self.sort_reverse = reverse
+        order = self._order(column)
+        if self._matches is not None:
+            matched = set(self._matches)
+            self._matches = [i for i in order if i in matched]
+
+    def set_filter(self, text):
+        query = text.strip().lower()
+        if query == self._query:
+            return
+        if not query:
+            self._matches = None
+        else:
+            narrowing = self._matches is not None and self._query in query
+            candidates = self._matches if narrowing else self._order(self.sort_column)
+            haystack = self._search_texts()
+            self._matches = [i for i in candidates if query in haystack[i]]
+        self._query = query
+
+    @property
+    def filter_text(self):
+        return self._query
+
+    # --- Internals ---
+
+    def _search_texts(self):
+        if self._haystack is None:
+            searched = [self._data[field] for field in self.search_fields if field in self._data]
+            if searched:
+                self._haystack = [" ".join(map(str, values)).lower() for values in zip(*searched)]
+            else:
+                self._haystack = [""] * len(self._alive)
+        return self._haystack
+
+    def _search_text(self, index):
+        return " ".join(str(self._data[field][index]) for field in self.search_fields
+                        if field in self._data).lower()
+
+    def _order(self, column):
+        order = self._orders.get(column)
+        if order is None:
+            values = self._values(column)
+            order = sorted((i for i, alive in enumerate(self._alive) if alive), key=values.__getitem__)
+            self._orders[column] = order
+        return order
+
+    def _values(self, column):
+        values = self._sort_values.get(column)
+        if values is None:
+            key_func = self._key_func(column)
+            values = [key_func(TableRow(self._data, i)) if alive else None
+                      for i, alive in enumerate(self._alive)]
+            self._sort_values[column] = values
+        return values
+
+    def _key_func(self, column):
+        if column is None:  # not sorted yet: keep rows in key order
+            return lambda row: row[self.key_field]
+        return self.key_for(column)
+
+    def _current(self):
+        if self._matches is not None:
+            return self._matches
+        return self._order(self.sort_column)
+
+    def _unplace(self, index):
+        if self._matches is not None and self._query in self._haystack[index]:
+            _delete_sorted(self._matches, index, self._values(self.sort_column))
+        for column, order in self._orders.items():
+            _delete_sorted(order, index, self._sort_values[column])
+
+    def _place(self, index):
+        row = TableRow(self._data, index)
+        for column, order in self._orders.items():
+            values = self._sort_values[column]
+            values.extend([None] * (len(self._alive) - len(values)))
+            values[index] = self._key_func(column)(row)
+            insort(order, index, key=values.__getitem__)
+        if self._matches is not None and self._query in self._haystack[index]:
+            insort(self._matches, index, key=self._values(self.sort_column).__getitem__)
+
+
+def _delete_sorted(order, index, values):
+    """Removes index from an order sorted by values, finding it by bisection."""
+    pos = bisect_left(order, values[index], key=values.__getitem__)
+    while order[pos] != index:
+        pos += 1
+    del order[pos]
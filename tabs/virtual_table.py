@@ -0,0 +1,181 @@
+import sys
+import customtkinter as ctk
+
+# Alternating row colours as (light, dark) pairs, matching the old per-row labels.
+ROW_COLORS = (("#DDDDDD", "#333333"), ("#EEEEEE", "#444444"))
+
+
+class VirtualTable(ctk.CTkFrame):
+    """Sortable table that only creates widgets for the rows on screen.
+
+    columns is a list of (heading, sort_key, weight, anchor, formatter)
+    tuples; formatter(row) returns the cell text. Clicking a heading calls
+    on_sort(sort_key). A fixed pool of label rows, as many as fit in the
+    visible height, is re-pointed at different data rows as the user scrolls,
+    so rendering 100 or 100,000 rows costs the same widgets. An optional
+    action column adds one button per visible row that calls
+    action_command(row).
+    """
+
+    def __init__(self, master, columns, on_sort=None, empty_text="No data.", row_height=28,
+                 action_text=None, action_command=None, **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.on_sort = on_sort
+        self.row_height = row_height
+        self.action_text = action_text
+        self.action_command = action_command
+        self._rows = []
+        self._first = 0
+        self._visible = 1
+        self._pool = []  # one dict per on-screen row slot
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.grid(row=0, column=0, sticky="ew")
+        for i, (heading, key, weight, _, _) in enumerate(columns):
+            btn = ctk.CTkButton(header, text=heading, fg_color="gray", hover_color="#555555",
+                                command=lambda k=key: self.on_sort(k) if self.on_sort else None)
+            btn.grid(row=0, column=i, sticky="ew", padx=(2 if i > 0 else 0, 2), pady=2)
+            header.grid_columnconfigure(i, weight=weight, uniform="table_columns")
+        if action_text:
+            ctk.CTkLabel(header, text="", width=64).grid(row=0, column=len(columns), padx=(2, 4))
+
+        self.body = ctk.CTkFrame(self)
+        self.body.grid(row=1, column=0, sticky="nsew", padx=2, pady=2)
+        self.body.grid_propagate(False)
+        for i, (_, _, weight, _, _) in enumerate(columns):
+            self.body.grid_columnconfigure(i, weight=weight, uniform="table_columns")
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", pady=2)
+
+        self.empty_label = ctk.CTkLabel(self.body, text=empty_text)
+
+        self.body.bind("<Configure>", self._on_resize)
+        if "linux" in sys.platform:
+            self.bind_all("<Button-4>", self._on_mouse_wheel, add="+")
+            self.bind_all("<Button-5>", self._on_mouse_wheel, add="+")
+        else:
+            self.bind_all("<MouseWheel>", self._on_mouse_wheel, add="+")
+
+    # --- Public API ---
+
+    def set_rows(self, rows, keep_position=True):
+        """Shows rows (any sequence of row objects) in their given order; None rows are drawn blank."""
+        self._rows = rows
+        if not keep_position:
+            self._first = 0
+        self._render()
+
+    def scroll_to(self, index):
+        self._first = index
+        self._render()
+
+    @property
+    def first_visible(self):
+        return self._first
+
+    @property
+    def visible_count(self):
+        return self._visible
+
+    # --- Layout and scrolling ---
+
+    def _slot_height(self):
+        return self._apply_widget_scaling(self.row_height)
+
+    def _on_resize(self, event):
+        visible = max(1, int(event.height // self._slot_height()))
+        if visible != self._visible or not self._pool:
+            self._visible = visible
+            self._grow_pool(visible)
+            self._render()
+
+    def _grow_pool(self, size):
+        last = len(self.columns) - 1
+        while len(self._pool) < size:
+            slot_index = len(self._pool)
+            widgets = []
+            for col, (_, _, _, anchor, _) in enumerate(self.columns):
+                padx = (2, 0) if col == 0 else (2, 4) if col == last and not self.action_text else 2
+                label = ctk.CTkLabel(self.body, text="", anchor=anchor, height=self.row_height - 2)
+                label.grid(row=slot_index, column=col, sticky="ew", padx=padx, pady=1)
+                label.grid_remove()
+                widgets.append(label)
+            if self.action_text:
+                btn = ctk.CTkButton(self.body, text=self.action_text, width=60, height=20,
+                                    command=lambda s=slot_index: self._on_action(s))
+                btn.grid(row=slot_index, column=len(self.columns), sticky="e", padx=(2, 4), pady=1)
+                btn.grid_remove()
+                widgets.append(btn)
+            self._pool.append({"widgets": widgets, "texts": [None] * len(self.columns), "color": None, "shown": False})
+
+    def _on_scrollbar(self, *args):
+        if not self._rows:
+            return
+        if args[0] == "moveto":
+            self._first = int(round(float(args[1]) * len(self._rows)))
+        elif args[0] == "scroll":
+            step = self._visible if args[2] == "pages" else 1
+            self._first += int(args[1]) * step
+        self._render()
+
+    def _on_mouse_wheel(self, event):
+        widget_path, own_path = str(event.widget), str(self)
+        if widget_path != own_path and not widget_path.startswith(own_path + "."):
+            return
+        if getattr(event, "num", None) == 4:
+            delta = -3
+        elif getattr(event, "num", None) == 5:
+            delta = 3
+        elif sys.platform == "darwin":
+            delta = -event.delta
+        else:
+            delta = -int(event.delta / 120) * 3
+        self._first += delta
+        self._render()
+
+    def _on_action(self, slot_index):
+        index = self._first + slot_index
+        if self.action_command and index < len(self._rows) and self._rows[index] is not None:
+            self.action_command(self._rows[index])
+
+    # --- Rendering ---
+
+    def _render(self):
+        total = len(self._rows)
+        self._first = max(0, min(self._first, total - self._visible))
+
+        if total:
+            self.empty_label.grid_remove()
+            self.scrollbar.set(self._first / total, min(1.0, (self._first + self._visible) / total))
+        else:
+            self.empty_label.grid(row=0, column=0, columnspan=len(self.columns), pady=10)
+            self.scrollbar.set(0.0, 1.0)
+
+        for slot_index, slot in enumerate(self._pool):
+            index = self._first + slot_index
+            if slot_index >= self._visible or index >= total:
+                if slot["shown"]:
+                    for widget in slot["widgets"]:
+                        widget.grid_remove()
+                    slot["shown"] = False
+                continue
+
+            row = self._rows[index]
+            color = ROW_COLORS[index % 2]
+            recolor = slot["color"] != color
+            for col, (_, _, _, _, formatter) in enumerate(self.columns):
+                text = formatter(row) if row is not None else ""
+                if recolor or slot["texts"][col] != text:
+                    slot["widgets"][col].configure(text=text, fg_color=color)
+                    slot["texts"][col] = text
+            slot["color"] = color
+            if not slot["shown"]:
+                for widget in slot["widgets"]:
+                    widget.grid()
+                slot["shown"] = True
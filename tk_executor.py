@@ -0,0 +1,129 @@
+import queue
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+# How often the Tk thread checks for finished work while anything is pending.
+POLL_MS = 10
+
+
+class Task:
+    """Handle for one submitted call. cancel() drops its result even if it already ran."""
+
+    def __init__(self, future, channel):
+        self._future = future
+        self.channel = channel
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self._future.cancel()
+
+    def done(self):
+        return self._future.done()
+
+
+class TkExecutor:
+    """Runs blocking calls on worker threads and hands results back on the Tk thread.
+
+    root is any Tk (or tkinter.Tcl()) object; only after() is used, and
+    only from the thread that created the executor. on_done and on_error
+    callbacks always run on that thread, so they may touch widgets.
+    Submitting with a channel cancels the previous task on that channel,
+    so a user clicking quickly through dropdowns only gets the last answer.
+    on_busy_change(busy) fires when the first task starts and when the
+    last one finishes.
+    """
+
+    def __init__(self, root, max_workers=DEFAULT_WORKERS, on_busy_change=None):
+        self.root = root
+        self.on_busy_change = on_busy_change
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rental-worker")
+        self._tk_thread = threading.get_ident()
+        self._finished = queue.SimpleQueue()  # (callback, args) to run on the Tk thread
+        self._channels = {}  # channel -> latest Task
+        self._pending = 0
+        self._poll_job = None
+
+    def submit(self, func, *args, on_done=None, on_error=None, channel=None, **kwargs):
+        """Runs func(*args, **kwargs) on a worker; then on_done(result) or on_error(exc) on the Tk thread."""
+        previous = self._channels.get(channel) if channel is not None else None
+        if previous is not None:
+            previous.cancel()
+
+        task = Task(self._pool.submit(func, *args, **kwargs), channel)
+        if channel is not None:
+            self._channels[channel] = task
+        self._pending += 1
+        if self._pending == 1 and self.on_busy_change:
+            self.on_busy_change(True)
+        task._future.add_done_callback(lambda future: self._finished.put((self._complete, (task, on_done, on_error))))
+        self._ensure_polling()
+        return task
+
+    def post(self, func, *args):
+        """Runs func(*args) on the Tk thread: now if called there, else at the next poll.
+
+        From another thread this only works while a task is pending (for
+        instance, a change event published by a submitted call), since that
+        keeps the poll loop running.
+        """
+        if threading.get_ident() == self._tk_thread:
+            func(*args)
+        else:
+            self._finished.put((func, args))
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def shutdown(self):
+        for task in self._channels.values():
+            task.cancel()
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Tk thread side ---
+
+    def _ensure_polling(self):
+        if self._poll_job is None:
+            self._poll_job = self.root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        try:
+            while True:
+                try:
+                    func, args = self._finished.get_nowait()
+                except queue.Empty:
+                    break
+                func(*args)
+        finally:
+            # A failing callback must not stop the loop while work is outstanding.
+            if self._pending or not self._finished.empty():
+                self._ensure_polling()
+
+    def _complete(self, task, on_done, on_error):
+        self._pending -= 1
+        if task.channel is not None and self._channels.get(task.channel) is task:
+            del self._channels[task.channel]
+        try:
+            if task.cancelled:
+                return
+            try:
+                result = task._future.result()
+            except CancelledError:
+                return
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+                else:
+                    raise
+                return
+            if on_done:
+                on_done(result)
+        finally:
+            if not self._pending and self.on_busy_change:
+                self.on_busy_change(False)
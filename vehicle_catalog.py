@@ -0,0 +1,103 @@
+"""In-memory type -> brand -> year -> model -> vehicle hierarchy for the rental dropdowns.
+
+The whole fleet is read with one query and kept as nested dicts, in the order
+the dropdowns list them. Every node also carries how many of its vehicles
+exist and how many are in service (Vehicle.available = 1, i.e. not in
+maintenance), so each dropdown level is served from memory.
+
+Staleness is decided by FleetVersion, a one-row counter that triggers bump on
+every Vehicle insert, delete or catalog-relevant update (see the
+fleet_version migration). Bookings do not touch Vehicle, so they never force
+a reload; vehicles added or sent to maintenance by any counter do.
+"""
+import threading
+
+
+class CatalogNode:
+    __slots__ = ("children", "vehicles", "total", "in_service")
+
+    def __init__(self):
+        self.children = {}
+        self.vehicles = []  # (VehicleID, plate, available) at model level
+        self.total = 0
+        self.in_service = 0
+
+
+class VehicleCatalog:
+    """Catalog for one database file; call ensure_fresh(conn) before reading."""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._root = CatalogNode()
+        self._version = None
+
+    # --- Loading and freshness ---
+
+    def load(self, conn):
+        root = CatalogNode()
+        rows = conn.execute("""
+        SELECT VehicleID, vtype, brand, year, model, plate, available
+        FROM Vehicle
+        ORDER BY vtype, brand, year DESC, model, plate
+        """).fetchall()
+        for vid, vtype, brand, year, model, plate, available in rows:
+            in_service = 1 if available == 1 else 0
+            node = root
+            node.total += 1
+            node.in_service += in_service
+            for key in (vtype, brand, str(year), model):
+                child = node.children.get(key)
+                if child is None:
+                    child = node.children[key] = CatalogNode()
+                node = child
+                node.total += 1
+                node.in_service += in_service
+            node.vehicles.append((vid, plate, available))
+
+        with self._lock:
+            self._root = root
+            self._version = fleet_version(conn)
+
+    def ensure_fresh(self, conn):
+        with self._lock:
+            if self._version is None or fleet_version(conn) != self._version:
+                self.load(conn)
+
+    # --- Queries ---
+
+    def _node(self, path):
+        node = self._root
+        for depth, key in enumerate(path):
+            if depth == 2:
+                key = str(key)  # years come from the dropdowns as strings
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node
+
+    def children(self, *path):
+        """Keys one level below path, e.g. children() -> types, children("SUV") -> brands."""
+        with self._lock:
+            node = self._node(path)
+            return list(node.children) if node is not None else []
+
+    def vehicles(self, vtype, brand, year, model, in_service_only=True):
+        """[(VehicleID, plate)] for one model, ordered by plate."""
+        with self._lock:
+            node = self._node((vtype, brand, year, model))
+            if node is None:
+                return []
+            return [(vid, plate) for vid, plate, available in node.vehicles
+                    if available == 1 or not in_service_only]
+
+    def counts(self, *path):
+        """(in_service, total) for the subtree at path; (0, 0) if it does not exist."""
+        with self._lock:
+            node = self._node(path)
+            return (node.in_service, node.total) if node is not None else (0, 0)
+
+
+def fleet_version(conn):
+    row = conn.execute("SELECT version FROM FleetVersion WHERE id = 1").fetchone()
+    return row[0] if row else 0